@@ -0,0 +1,17 @@
+"""Load yt-mtdl.py as a module (its file name is not importable directly)"""
+
+import importlib.util
+import sys
+from pathlib import Path
+
+APP_PATH = Path(__file__).resolve().parent.parent / "yt-mtdl.py"
+
+
+def load_app():
+    if "yt_mtdl" in sys.modules:
+        return sys.modules["yt_mtdl"]
+    spec = importlib.util.spec_from_file_location("yt_mtdl", APP_PATH)
+    module = importlib.util.module_from_spec(spec)
+    sys.modules["yt_mtdl"] = module
+    spec.loader.exec_module(module)
+    return module
@@ -0,0 +1,153 @@
+#!/usr/bin/env python3
+"""Coordinator/worker throughput, with one worker killed mid-download.
+
+Starts a local file server, a coordinator holding a queue of direct-file jobs and
+several worker processes. One worker is SIGKILLed while it holds leases; its jobs
+must come back to the queue once the (short) lease expires and finish elsewhere.
+
+    python benchmarks/bench_cluster.py [--jobs 24] [--workers 3] [--file-kb 2048] [--lease 4]
+"""
+
+import argparse
+import functools
+import http.server
+import json
+import os
+import signal
+import socket
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+import urllib.request
+
+APP = os.path.join(os.path.dirname(os.path.abspath(__file__)), os.pardir, "yt-mtdl.py")
+
+
+class ThrottledHandler(http.server.SimpleHTTPRequestHandler):
+    """Serves files at a limited rate so jobs overlap the kill"""
+    chunk_delay = 0.02
+
+    def copyfile(self, source, outputfile):
+        while True:
+            chunk = source.read(64 * 1024)
+            if not chunk:
+                break
+            try:
+                outputfile.write(chunk)
+            except ConnectionError:  # the killed node's connections
+                return
+            time.sleep(self.chunk_delay)
+
+    def log_message(self, *args):
+        pass
+
+
+def free_port():
+    with socket.socket() as s:
+        s.bind(("127.0.0.1", 0))
+        return s.getsockname()[1]
+
+
+def get_json(url):
+    with urllib.request.urlopen(url, timeout=10) as response:
+        return json.load(response)
+
+
+def wait_for(url, timeout=20):
+    deadline = time.time() + timeout
+    while time.time() < deadline:
+        try:
+            return get_json(url)
+        except OSError:
+            time.sleep(0.2)
+    sys.exit(f"{url} did not come up")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--jobs", type=int, default=24)
+    parser.add_argument("--workers", type=int, default=3)
+    parser.add_argument("--file-kb", type=int, default=2048)
+    parser.add_argument("--lease", type=float, default=4)
+    parser.add_argument("--capacity", type=int, default=2)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as root:
+        serve_dir = os.path.join(root, "files")
+        os.mkdir(serve_dir)
+        for index in range(args.jobs):
+            with open(os.path.join(serve_dir, f"clip{index:03d}.mp4"), "wb") as f:
+                f.write(os.urandom(args.file_kb * 1024))
+
+        server = http.server.ThreadingHTTPServer(
+            ("127.0.0.1", 0), functools.partial(ThrottledHandler, directory=serve_dir))
+        server.daemon_threads = True
+        threading.Thread(target=server.serve_forever, daemon=True).start()
+        base = f"http://127.0.0.1:{server.server_address[1]}"
+        url_list = os.path.join(root, "urls.txt")
+        with open(url_list, "w") as f:
+            f.writelines(f"E{index:03d} {base}/clip{index:03d}.mp4\n" for index in range(args.jobs))
+
+        # Separate HOME so the benchmark never reads or writes the user's settings
+        env = dict(os.environ, HOME=root, QT_QPA_PLATFORM="offscreen")
+        port = free_port()
+        coordinator_url = f"http://127.0.0.1:{port}"
+        coordinator = subprocess.Popen(
+            [sys.executable, APP, "--coordinator", "--port", str(port), "--db", os.path.join(root, "queue.db"),
+             "--import", url_list, "--lease", str(args.lease)],
+            env=env, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+        wait_for(f"{coordinator_url}/stats")
+
+        start = time.perf_counter()
+        workers = []
+        for index in range(args.workers):
+            out_dir = os.path.join(root, f"node{index}")
+            os.mkdir(out_dir)
+            workers.append(subprocess.Popen(
+                [sys.executable, APP, "--worker", coordinator_url, "--output", out_dir, "--name", f"node{index}",
+                 "--capacity", str(args.capacity), "--lease", str(args.lease), "--drain"],
+                env=env, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL))
+
+        # Kill the first node once it holds leases
+        victim = workers[0]
+        while True:
+            held = [job for job in get_json(f"{coordinator_url}/jobs")["jobs"] if job["worker"] == "node0"
+                    and job["state"] == "leased"]
+            if held:
+                break
+            time.sleep(0.1)
+        time.sleep(0.5)
+        victim.send_signal(signal.SIGKILL)
+        killed_at = time.perf_counter()
+        print(f"killed node0 holding jobs {[job['id'] for job in held]}")
+
+        for worker in workers[1:]:
+            worker.wait(timeout=600)
+        elapsed = time.perf_counter() - start
+
+        jobs = get_json(f"{coordinator_url}/jobs")["jobs"]
+        stats = get_json(f"{coordinator_url}/stats")
+        coordinator.terminate()
+        coordinator.wait()
+        server.shutdown()
+
+        done = [job for job in jobs if job["state"] == "done"]
+        requeued = [job for job in jobs if job["id"] in {h["id"] for h in held}]
+        files = sum(len(os.listdir(os.path.join(root, f"node{index}"))) for index in range(1, args.workers))
+        total = args.jobs * args.file_kb * 1024
+        print(f"{args.jobs} jobs x {args.file_kb} KiB, {args.workers} workers x {args.capacity} slots, "
+              f"lease {args.lease:g}s")
+        print(f"states: {stats['jobs']}")
+        print("jobs from the killed node: " + ", ".join(
+            f"#{job['id']} {job['state']} on {job['worker']} after {job['attempts']} leases" for job in requeued))
+        print(f"{len(done)}/{args.jobs} done, {files} files on surviving nodes, "
+              f"{elapsed:.1f}s total ({elapsed - (killed_at - start):.1f}s after the kill), "
+              f"{total / elapsed / 1048576:.1f} MiB/s")
+        if len(done) != args.jobs:
+            sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,154 @@
+#!/usr/bin/env python3
+"""Daemon API on localhost: request checks, submission latency and job completion.
+
+Starts the daemon in a subprocess with a throwaway HOME and checks that it refuses
+requests without the API token, bodies that are not application/json, episode IDs
+that would leave the output folder and output folders outside its roots. Then it
+submits direct-file jobs from a local file server and waits for them to finish.
+
+    python benchmarks/bench_daemon.py [--jobs 20] [--file-kb 512]
+"""
+
+import argparse
+import functools
+import http.server
+import json
+import os
+import socket
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+import urllib.error
+import urllib.request
+
+APP = os.path.join(os.path.dirname(os.path.abspath(__file__)), os.pardir, "yt-mtdl.py")
+
+
+class QuietHandler(http.server.SimpleHTTPRequestHandler):
+    def copyfile(self, source, outputfile):
+        try:
+            super().copyfile(source, outputfile)
+        except ConnectionError:  # probes that close after the headers
+            pass
+
+    def log_message(self, *args):
+        pass
+
+
+def free_port():
+    with socket.socket() as s:
+        s.bind(("127.0.0.1", 0))
+        return s.getsockname()[1]
+
+
+def call(url, method="GET", body=None, headers=None):
+    """(status, decoded JSON) for one API call"""
+    request = urllib.request.Request(url, data=body, method=method, headers=headers or {})
+    try:
+        with urllib.request.urlopen(request, timeout=10) as response:
+            return response.status, json.load(response)
+    except urllib.error.HTTPError as e:
+        return e.code, json.loads(e.read() or b"{}")
+
+
+def wait_for(url, timeout=20):
+    deadline = time.time() + timeout
+    while time.time() < deadline:
+        try:
+            return call(url)
+        except OSError:
+            time.sleep(0.2)
+    sys.exit(f"{url} did not come up")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--jobs", type=int, default=20)
+    parser.add_argument("--file-kb", type=int, default=512)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as root:
+        serve_dir = os.path.join(root, "files")
+        out_dir = os.path.join(root, "out")
+        os.mkdir(serve_dir)
+        os.mkdir(out_dir)
+        for index in range(args.jobs):
+            with open(os.path.join(serve_dir, f"clip{index:03d}.mp4"), "wb") as f:
+                f.write(os.urandom(args.file_kb * 1024))
+
+        server = http.server.ThreadingHTTPServer(
+            ("127.0.0.1", 0), functools.partial(QuietHandler, directory=serve_dir))
+        server.daemon_threads = True
+        threading.Thread(target=server.serve_forever, daemon=True).start()
+        files = f"http://127.0.0.1:{server.server_address[1]}"
+
+        # Separate HOME so the benchmark never reads or writes the user's settings
+        env = dict(os.environ, HOME=root, QT_QPA_PLATFORM="offscreen")
+        port = free_port()
+        api = f"http://127.0.0.1:{port}"
+        daemon = subprocess.Popen(
+            [sys.executable, APP, "--daemon", "--port", str(port), "--output", out_dir],
+            env=env, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+        try:
+            wait_for(f"{api}/jobs")
+            with open(os.path.join(root, ".ytdl_settings.json")) as f:
+                token = json.load(f)["daemon_token"]
+            auth = {"Authorization": f"Bearer {token}"}
+            json_auth = dict(auth, **{"Content-Type": "application/json"})
+
+            def submit(job, headers=json_auth):
+                return call(f"{api}/jobs", "POST", json.dumps(job).encode(), headers)
+
+            job = {"url": f"{files}/clip000.mp4", "episode_id": "E000"}
+            checks = [
+                ("no token", call(f"{api}/jobs")[0], 401),
+                ("wrong token", call(f"{api}/jobs", headers={"Authorization": "Bearer nope"})[0], 401),
+                ("text/plain body", submit(job, dict(auth, **{"Content-Type": "text/plain"}))[0], 400),
+                ("episode_id with ..", submit(dict(job, episode_id="../../escape"))[0], 400),
+                ("episode_id with /", submit(dict(job, episode_id="sub/E000"))[0], 400),
+                ("output_dir outside", submit(dict(job, output_dir=root))[0], 400),
+                ("output_dir escaping", submit(dict(job, output_dir=os.path.join(out_dir, "..")))[0], 400),
+            ]
+
+            latencies = []
+            start = time.perf_counter()
+            for index in range(args.jobs):
+                t = time.perf_counter()
+                status, _ = submit({"url": f"{files}/clip{index:03d}.mp4", "episode_id": f"E{index:03d}",
+                                    "output_dir": out_dir if index % 2 else None})
+                latencies.append(time.perf_counter() - t)
+                checks.append((f"submit E{index:03d}", status, 201))
+
+            deadline = time.time() + 300
+            while time.time() < deadline:
+                jobs = call(f"{api}/jobs", headers=auth)[1]["jobs"]
+                if all(job["state"] not in ("pending", "active", "deferred", "attached") for job in jobs):
+                    break
+                time.sleep(0.2)
+            elapsed = time.perf_counter() - start
+        finally:
+            daemon.terminate()
+            daemon.wait()
+            server.shutdown()
+
+        done = [job for job in jobs if job["state"] == "done"]
+        written = [name for name in os.listdir(out_dir) if name.startswith("E")]
+        escaped = os.path.exists(os.path.join(root, "escape.mp4"))
+        checks.append(("jobs done", len(done), args.jobs))
+        checks.append(("files in output", len(written), args.jobs))
+        checks.append(("nothing written outside", escaped, False))
+
+        failed = [(name, got, want) for name, got, want in checks if got != want]
+        for name, got, want in checks:
+            print(f"{'ok ' if got == want else 'FAIL'} {name}: {got}" + ("" if got == want else f" (want {want})"))
+        latencies.sort()
+        print(f"{args.jobs} jobs x {args.file_kb} KiB in {elapsed:.1f}s; submit latency "
+              f"median {latencies[len(latencies) // 2] * 1000:.1f} ms, max {latencies[-1] * 1000:.1f} ms")
+        if failed:
+            sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,136 @@
+#!/usr/bin/env python3
+"""Event-loop responsiveness and aggregate throughput: thread vs process backend.
+
+Serves several HLS playlists of small fragments from a local server and runs
+one download per playlist at the same time, first as DownloadWorker threads in
+this process and then in pooled --pool-worker processes. A 10 ms Qt timer stands
+in for the interface; how late its ticks fire is the lag a user would feel.
+Each backend runs the batch once to warm up (process start-up, page cache)
+before the measured run. One extra job requests a forbidden URL and checks that
+its error category is known by the time the error signal arrives, which is when
+the window decides whether to hold, defer or fail the item.
+
+    python benchmarks/bench_execution_backend.py [--jobs 4] [--segments 200] [--segment-kb 64] [--threads 8]
+"""
+
+import argparse
+import functools
+import http.server
+import os
+import shutil
+import statistics
+import tempfile
+import threading
+import time
+
+from _app import load_app
+from bench_fragment_assembly import QuietHandler, write_playlist
+
+TICK_MS = 10
+
+
+class ForbiddingHandler(QuietHandler):
+    def do_GET(self):
+        if self.path.startswith("/forbidden"):
+            self.send_error(403)
+        else:
+            super().do_GET()
+
+
+def run_batch(app, qt_app, urls, out_dir, backend, threads):
+    from PyQt6.QtCore import QTimer
+
+    settings = dict(app.SETTINGS_DEFAULTS, thread_count=threads, execution_backend=backend)
+    workers = []
+    remaining = {"count": len(urls), "failed": 0, "progress": 0, "categories": []}
+    lags = []
+    last_tick = {"at": time.perf_counter()}
+
+    def tick():
+        now = time.perf_counter()
+        lags.append(max(0.0, (now - last_tick["at"]) * 1000 - TICK_MS))
+        last_tick["at"] = now
+
+    def on_progress(progress):
+        remaining["progress"] += 1
+
+    def on_error(worker):
+        # Read the way MainWindow.download_error does
+        remaining["categories"].append(worker.error_category)
+
+    def on_finished(success):
+        remaining["count"] -= 1
+        remaining["failed"] += not success
+        if remaining["count"] == 0:
+            qt_app.quit()
+
+    timer = QTimer()
+    timer.timeout.connect(tick)
+    timer.start(TICK_MS)
+    start = time.perf_counter()
+    for index, url in enumerate(urls):
+        options = app.build_download_options(settings, out_dir, episode_id=f"job{index}")
+        options["hls_prefer_native"] = True
+        worker = app.create_download_worker(url, options)
+        worker.progress.connect(on_progress)
+        worker.error.connect(lambda _, worker=worker: on_error(worker))
+        worker.finished.connect(on_finished)
+        workers.append(worker)
+        worker.start()
+    qt_app.exec()
+    elapsed = time.perf_counter() - start
+    timer.stop()
+    for worker in workers:
+        worker.wait()
+    return elapsed, lags, remaining
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--jobs", type=int, default=4)
+    parser.add_argument("--segments", type=int, default=200)
+    parser.add_argument("--segment-kb", type=int, default=64)
+    parser.add_argument("--threads", type=int, default=8)
+    args = parser.parse_args()
+
+    os.environ.setdefault("QT_QPA_PLATFORM", "offscreen")
+    app = load_app()
+    from PyQt6.QtCore import QCoreApplication
+    qt_app = QCoreApplication([])
+
+    with tempfile.TemporaryDirectory() as root:
+        serve_dir = os.path.join(root, "hls")
+        urls = []
+        for index in range(args.jobs):
+            playlist_dir = os.path.join(serve_dir, f"p{index}")
+            os.makedirs(playlist_dir)
+            write_playlist(playlist_dir, args.segments, args.segment_kb * 1024)
+        server = http.server.ThreadingHTTPServer(
+            ("127.0.0.1", 0), functools.partial(ForbiddingHandler, directory=serve_dir))
+        server.daemon_threads = True
+        threading.Thread(target=server.serve_forever, daemon=True).start()
+        base = f"http://127.0.0.1:{server.server_address[1]}"
+        urls = [f"{base}/p{index}/index.m3u8" for index in range(args.jobs)]
+        urls.append(f"{base}/forbidden/index.m3u8")
+        total = args.jobs * args.segments * args.segment_kb * 1024
+
+        print(f"{args.jobs} concurrent jobs x {args.segments} fragments x {args.segment_kb} KiB "
+              f"({total / 1048576:.0f} MiB), {args.threads} threads per job")
+        for backend in ("thread", "process"):
+            for run in ("warm-up", "measured"):
+                out_dir = os.path.join(root, f"{backend}-{run}")
+                os.mkdir(out_dir)
+                elapsed, lags, outcome = run_batch(app, qt_app, urls, out_dir, backend, args.threads)
+                shutil.rmtree(out_dir)
+            lags.sort()
+            print(f"{backend:>8}: {total / elapsed / 1048576:7.1f} MiB/s, "
+                  f"event-loop lag p50 {statistics.median(lags):5.1f} ms, "
+                  f"p99 {lags[int(len(lags) * 0.99)]:6.1f} ms, max {lags[-1]:6.1f} ms, "
+                  f"{outcome['progress']} progress signals, {outcome['failed']} failed "
+                  f"(expected 1), error categories at the error signal: {outcome['categories']}")
+        app.process_pool().shutdown()
+        server.shutdown()
+
+
+if __name__ == "__main__":
+    main()
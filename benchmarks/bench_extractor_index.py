@@ -0,0 +1,113 @@
+#!/usr/bin/env python3
+"""URL classification over 100k URLs: yt-dlp's linear extractor scan vs the host index.
+
+The URL set is every test URL shipped with the installed yt-dlp extractors, each
+with a varying query string, padded out with direct-file links on made-up hosts
+(which only the generic extractor takes) and a few malformed lines. The index
+classifies all of them. The linear scan, which tries every extractor in yt-dlp's
+order, is slow enough that it runs on a sample and its time is projected. The
+sample always covers every test URL, and the two must pick the same extractor for
+each URL in it. Index build and cache-load times are measured against a throwaway
+cache file.
+
+    python benchmarks/bench_extractor_index.py [--urls 100000] [--linear-sample 10000]
+"""
+
+import argparse
+import os
+import random
+import tempfile
+import time
+
+from _app import load_app
+
+
+def make_urls(test_urls, count, rng):
+    urls = []
+    for index in range(count):
+        roll = rng.random()
+        if roll < 0.01:
+            urls.append(rng.choice(["not a url", "www.example", "ftp//broken", f"clip{index}.mp4"]))
+        elif roll < 0.11:
+            urls.append(f"https://cdn{index % 50}.media{index % 997}.example/v/{index}.mp4")
+        else:
+            url = rng.choice(test_urls)
+            urls.append(f"{url}{'&' if '?' in url else '?'}n={index}")
+    return urls
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--urls", type=int, default=100000)
+    parser.add_argument("--linear-sample", type=int, default=10000)
+    parser.add_argument("--seed", type=int, default=1)
+    args = parser.parse_args()
+
+    app = load_app()
+    app.load_yt_dlp()
+    from yt_dlp.extractor import gen_extractor_classes
+    classes = list(gen_extractor_classes())
+
+    with tempfile.TemporaryDirectory() as root:
+        cache_path = os.path.join(root, "extractor_index.json")
+        start = time.perf_counter()
+        app.ExtractorIndex.load(cache_path)
+        build_time = time.perf_counter() - start
+        start = time.perf_counter()
+        index = app.ExtractorIndex.load(cache_path)
+        load_time = time.perf_counter() - start
+        cache_kb = os.path.getsize(cache_path) / 1024
+
+    test_urls = list(dict.fromkeys(tc["url"] for ie in classes for tc in ie.get_testcases(include_onlymatching=True)))
+    rng = random.Random(args.seed)
+    urls = make_urls(test_urls, args.urls, rng)
+    sample = test_urls + rng.sample(urls, max(0, min(args.linear_sample - len(test_urls), len(urls))))
+
+    def linear(url):
+        for ie in classes:
+            if ie.suitable(url):
+                return ie
+        return None
+
+    # Compile every extractor's pattern before timing either side
+    for url in test_urls[:20]:
+        linear(url)
+
+    start = time.perf_counter()
+    linear_results = [linear(url) for url in sample]
+    linear_time = time.perf_counter() - start
+
+    start = time.perf_counter()
+    results = [index.match(url) for url in urls]
+    index_time = time.perf_counter() - start
+    candidates = sum(len(index.candidates(url)) for url in sample)
+
+    mismatches = [(url, expected.ie_key() if expected else None, found.ie_key() if found else None)
+                  for url, expected, found in zip(sample, linear_results, map(index.match, sample))
+                  if expected is not found]
+    counts = {}
+    for ie in results:
+        key = ie.ie_key() if ie else None
+        kind = "generic" if key == "Generic" else "unsupported" if key in app.UNSUPPORTED_SITES else "site"
+        counts[kind] = counts.get(kind, 0) + 1
+
+    per_linear = linear_time / len(sample)
+    per_index = index_time / len(urls)
+    print(f"{len(classes)} extractors, {len(index.wildcard)} checked for every URL, "
+          f"{len(index.hosts)} host keys, {len(index.prefixes)} prefix keys")
+    print(f"index build {build_time:.2f}s, cache load {load_time * 1000:.1f} ms ({cache_kb:.0f} KiB)")
+    print(f"{len(urls)} URLs ({len(test_urls)} distinct extractor test URLs): "
+          + ", ".join(f"{count} {kind}" for kind, count in sorted(counts.items())))
+    print(f"  linear scan: {per_linear * 1e6:7.1f} us/URL, {per_linear * len(urls):6.1f}s projected for "
+          f"{len(urls)} (measured on {len(sample)})")
+    print(f"  host index:  {per_index * 1e6:7.1f} us/URL, {index_time:6.1f}s measured, "
+          f"{candidates / len(sample):.0f} candidates/URL, {per_linear / per_index:.0f}x faster")
+    print(f"  same extractor as the linear scan on {len(sample) - len(mismatches)}/{len(sample)} sampled URLs")
+    for url, expected, found in mismatches[:10]:
+        print(f"    MISMATCH {url}: linear {expected}, index {found}")
+    if mismatches:
+        raise SystemExit(1)
+
+
+if __name__ == "__main__":
+    main()
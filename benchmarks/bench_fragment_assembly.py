@@ -0,0 +1,123 @@
+#!/usr/bin/env python3
+"""Bytes written per byte downloaded for HLS downloads, with and without streaming assembly.
+
+Serves a generated HLS playlist from a local server and downloads it once with
+yt-dlp's fragment files and once with fragments appended in order from memory.
+Each download runs in its own process so the kernel's write counter
+(/proc/self/io, Linux only) covers exactly that download.
+
+    python benchmarks/bench_fragment_assembly.py [--segments 64] [--segment-kb 1024] [--threads 8]
+"""
+
+import argparse
+import functools
+import hashlib
+import http.server
+import json
+import os
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+
+from _app import load_app
+
+
+class QuietHandler(http.server.SimpleHTTPRequestHandler):
+    def log_message(self, *args):
+        pass
+
+
+def write_playlist(root, segments, segment_size):
+    data = bytearray()
+    lines = ["#EXTM3U", "#EXT-X-VERSION:3", "#EXT-X-TARGETDURATION:4", "#EXT-X-MEDIA-SEQUENCE:0"]
+    for index in range(segments):
+        chunk = os.urandom(segment_size)
+        data += chunk
+        with open(os.path.join(root, f"seg{index:05d}.ts"), "wb") as f:
+            f.write(chunk)
+        lines += ["#EXTINF:4.0,", f"seg{index:05d}.ts"]
+    lines.append("#EXT-X-ENDLIST")
+    with open(os.path.join(root, "index.m3u8"), "w") as f:
+        f.write("\n".join(lines) + "\n")
+    return hashlib.sha256(data).hexdigest()
+
+
+def written_bytes():
+    with open("/proc/self/io") as f:
+        counters = dict(line.split(": ") for line in f.read().splitlines())
+    return int(counters["wchar"])
+
+
+def run_child(url, out_dir, streaming, threads):
+    app = load_app()
+    ydl_class = app.yt_dlp_extensions().YoutubeDL
+    opts = {
+        "outtmpl": os.path.join(out_dir, "video.%(ext)s"),
+        "quiet": True,
+        "no_warnings": True,
+        "noprogress": True,
+        "concurrent_fragment_downloads": threads,
+        "streaming_assembly": streaming,
+        "hls_prefer_native": True,
+    }
+    start_written = written_bytes()
+    start = time.perf_counter()
+    with ydl_class(opts) as ydl:
+        info = ydl.extract_info(url, download=True)
+    elapsed = time.perf_counter() - start
+    path = ydl.prepare_filename(info)
+    print(json.dumps({
+        "path": path,
+        "elapsed": elapsed,
+        "written": written_bytes() - start_written,
+    }))
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--segments", type=int, default=64)
+    parser.add_argument("--segment-kb", type=int, default=1024)
+    parser.add_argument("--threads", type=int, default=8)
+    parser.add_argument("--child", nargs=3, metavar=("URL", "DIR", "MODE"), help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.child:
+        url, out_dir, mode = args.child
+        run_child(url, out_dir, mode == "streaming", args.threads)
+        return
+
+    if not os.path.exists("/proc/self/io"):
+        sys.exit("needs /proc/self/io (Linux)")
+
+    with tempfile.TemporaryDirectory() as root:
+        serve_dir = os.path.join(root, "hls")
+        os.mkdir(serve_dir)
+        digest = write_playlist(serve_dir, args.segments, args.segment_kb * 1024)
+        total = args.segments * args.segment_kb * 1024
+
+        server = http.server.ThreadingHTTPServer(
+            ("127.0.0.1", 0), functools.partial(QuietHandler, directory=serve_dir))
+        server.daemon_threads = True
+        threading.Thread(target=server.serve_forever, daemon=True).start()
+        url = f"http://127.0.0.1:{server.server_address[1]}/index.m3u8"
+
+        print(f"{args.segments} segments x {args.segment_kb} KiB = {total / 1048576:.0f} MiB, "
+              f"{args.threads} threads")
+        for mode in ("fragment-files", "streaming"):
+            out_dir = os.path.join(root, mode)
+            os.mkdir(out_dir)
+            output = subprocess.run(
+                [sys.executable, __file__, "--threads", str(args.threads), "--child", url, out_dir, mode],
+                check=True, capture_output=True, text=True).stdout
+            result = json.loads(output.strip().splitlines()[-1])
+            with open(result["path"], "rb") as f:
+                ok = hashlib.sha256(f.read()).hexdigest() == digest
+            print(f"{mode:>15}: {result['written'] / total:5.2f} bytes written per byte downloaded, "
+                  f"{result['elapsed']:.2f}s, content {'ok' if ok else 'MISMATCH'}")
+        server.shutdown()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,146 @@
+#!/usr/bin/env python3
+"""HLS streams with many small fragments: the thread-pool fetcher vs the async fragment engine.
+
+Serves a generated HLS playlist of --segments small segments from a local HTTP/1.1
+keep-alive server that adds --latency-ms to every request (standing in for the
+round trip to a CDN) and counts connections and requests. The stream is downloaded
+with streaming assembly in a child process per run: once with the usual fragment
+threads, then with the async engine at each --requests level. Each run reports its
+time, peak thread count and peak resident memory, and the connections the server
+saw. The output must match the served segments byte for byte.
+
+    python benchmarks/bench_fragment_engine.py [--segments 5000] [--segment-kb 16] [--latency-ms 20]
+                                               [--threads 32] [--requests 32 256]
+"""
+
+import argparse
+import functools
+import hashlib
+import http.server
+import json
+import os
+import resource
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+
+from _app import load_app
+from bench_fragment_assembly import QuietHandler, write_playlist
+
+
+class KeepAliveHandler(QuietHandler):
+    """HTTP/1.1 with keep-alive; counts connections and requests, delays each request"""
+    protocol_version = "HTTP/1.1"
+    latency = 0.0
+    counts = None
+    lock = threading.Lock()
+
+    def setup(self):
+        super().setup()
+        with self.lock:
+            self.counts["connections"] += 1
+
+    def do_GET(self):
+        with self.lock:
+            self.counts["requests"] += 1
+        time.sleep(self.latency)
+        try:
+            super().do_GET()
+        except ConnectionError:
+            pass
+
+
+def run_child(url, out_dir, engine, concurrency):
+    app = load_app()
+    peak = {"threads": threading.active_count()}
+    done = threading.Event()
+
+    def sample_threads():
+        while not done.wait(0.01):
+            peak["threads"] = max(peak["threads"], threading.active_count())
+    threading.Thread(target=sample_threads, daemon=True).start()
+
+    opts = {
+        "outtmpl": os.path.join(out_dir, "video.%(ext)s"),
+        "quiet": True,
+        "no_warnings": True,
+        "noprogress": True,
+        "hls_prefer_native": True,
+        "streaming_assembly": True,
+        "concurrent_fragment_downloads": concurrency,
+        "fragment_engine": engine,
+        "async_fragment_requests": concurrency,
+    }
+    start = time.perf_counter()
+    with app.yt_dlp_extensions().YoutubeDL(opts) as ydl:
+        info = ydl.extract_info(url, download=True)
+    elapsed = time.perf_counter() - start
+    done.set()
+    print(json.dumps({
+        "path": ydl.prepare_filename(info),
+        "elapsed": elapsed,
+        "threads": peak["threads"] - 1,  # not counting the sampler
+        "max_rss_kb": resource.getrusage(resource.RUSAGE_SELF).ru_maxrss,
+    }))
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--segments", type=int, default=5000)
+    parser.add_argument("--segment-kb", type=int, default=16)
+    parser.add_argument("--latency-ms", type=float, default=20, help="server delay per request")
+    parser.add_argument("--threads", type=int, default=32, help="fragment threads for the threaded run")
+    parser.add_argument("--requests", type=int, nargs="+", default=[32, 256],
+                        help="requests in flight for each async run")
+    parser.add_argument("--child", nargs=4, metavar=("URL", "DIR", "ENGINE", "N"), help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.child:
+        url, out_dir, engine, concurrency = args.child
+        run_child(url, out_dir, engine, int(concurrency))
+        return
+
+    with tempfile.TemporaryDirectory() as root:
+        serve_dir = os.path.join(root, "hls")
+        os.mkdir(serve_dir)
+        digest = write_playlist(serve_dir, args.segments, args.segment_kb * 1024)
+        counts = {"connections": 0, "requests": 0}
+        handler = type("Handler", (KeepAliveHandler,), {"counts": counts, "latency": args.latency_ms / 1000})
+        server_class = type("Server", (http.server.ThreadingHTTPServer,), {"request_queue_size": 1024})
+        server = server_class(("127.0.0.1", 0), functools.partial(handler, directory=serve_dir))
+        server.daemon_threads = True
+        threading.Thread(target=server.serve_forever, daemon=True).start()
+        url = f"http://127.0.0.1:{server.server_address[1]}/index.m3u8"
+
+        print(f"{args.segments} segments x {args.segment_kb} KiB, {args.latency_ms:.0f} ms per request")
+        runs = [("threads", args.threads)] + [("async", n) for n in args.requests]
+        failed = False
+        for engine, concurrency in runs:
+            out_dir = os.path.join(root, f"{engine}-{concurrency}")
+            os.mkdir(out_dir)
+            counts.update(connections=0, requests=0)
+            child = subprocess.run(
+                [sys.executable, __file__, "--child", url, out_dir, engine, str(concurrency)],
+                capture_output=True, text=True)
+            if child.returncode:
+                print(f"{engine:>8} x{concurrency:<4} failed: {child.stderr.strip().splitlines()[-1:]}")
+                failed = True
+                continue
+            result = json.loads(child.stdout.strip().splitlines()[-1])
+            with open(result["path"], "rb") as f:
+                ok = hashlib.sha256(f.read()).hexdigest() == digest
+            failed = failed or not ok
+            label = "fragment threads" if engine == "threads" else "async requests"
+            print(f"{engine:>8} ({concurrency:>3} {label}): {result['elapsed']:6.2f}s, "
+                  f"{args.segments / result['elapsed']:7.0f} fragments/s, peak {result['threads']:>3} threads, "
+                  f"{result['max_rss_kb'] / 1024:5.0f} MiB peak RSS, {counts['connections']} connections "
+                  f"for {counts['requests']} requests, content {'ok' if ok else 'MISMATCH'}")
+        server.shutdown()
+        if failed:
+            sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
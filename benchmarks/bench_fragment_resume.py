@@ -0,0 +1,158 @@
+#!/usr/bin/env python3
+"""Kill-and-resume for HLS downloads: fragments fetched again after a SIGKILL.
+
+Serves a generated HLS playlist from a local server that counts fragment requests
+and paces them so the download is still running when it is killed. Some fragments
+are slow, so fragments after them are complete but not yet appended at the kill. Each mode
+downloads once uninterrupted for reference, then again in a DownloadWorker in a
+child process that is SIGKILLed partway through and rerun into the same output
+folder, once for each kill point. The resumed file must match the reference, and
+fragments requested by both the killed and the resumed run are the work the
+resume did not save.
+
+    python benchmarks/bench_fragment_resume.py [--segments 120] [--segment-kb 256] [--threads 4]
+                                               [--kill-at 0.3 0.5 0.7] [--delay-ms 100] [--slow-every 20]
+"""
+
+import argparse
+import collections
+import functools
+import hashlib
+import http.server
+import os
+import signal
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+
+from _app import load_app
+from bench_fragment_assembly import QuietHandler, write_playlist
+
+
+class CountingHandler(QuietHandler):
+    """Counts requests per fragment and serves each fragment after a delay; every
+    slow_every-th fragment takes ten times as long, so later ones finish before it"""
+    delay = 0.1
+    slow_every = 0
+    counts = None
+    lock = threading.Lock()
+
+    def do_GET(self):
+        if self.path.endswith(".ts"):
+            with self.lock:
+                self.counts[self.path] += 1
+            index = int(self.path.rsplit("seg", 1)[1][:-3])
+            slow = self.slow_every and index % self.slow_every == self.slow_every - 1
+            time.sleep(self.delay * (10 if slow else 1))
+        try:
+            super().do_GET()
+        except ConnectionError:  # the killed download's connections
+            pass
+
+
+def run_child(url, out_dir, streaming, threads):
+    app = load_app()
+    settings = dict(app.SETTINGS_DEFAULTS, thread_count=threads, streaming_assembly=streaming)
+    options = app.build_download_options(settings, out_dir, episode_id="EP01")
+    worker = app.DownloadWorker(url, options)
+    worker.error.connect(lambda message: print(message, file=sys.stderr))
+    worker.run()
+
+
+def list_files(out_dir):
+    """Relative path -> size for everything under out_dir"""
+    files = {}
+    for directory, _, names in os.walk(out_dir):
+        for name in names:
+            path = os.path.join(directory, name)
+            files[os.path.relpath(path, out_dir)] = os.path.getsize(path)
+    return files
+
+
+def output_digest(out_dir):
+    names = [name for name in os.listdir(out_dir) if name == "EP01.mp4"]
+    if not names:
+        return None
+    with open(os.path.join(out_dir, names[0]), "rb") as f:
+        return hashlib.sha256(f.read()).hexdigest()
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--segments", type=int, default=120)
+    parser.add_argument("--segment-kb", type=int, default=256)
+    parser.add_argument("--threads", type=int, default=4)
+    parser.add_argument("--kill-at", type=float, nargs="+", default=[0.3, 0.5, 0.7],
+                        help="fractions of the fragments requested before the kill")
+    parser.add_argument("--delay-ms", type=int, default=100, help="server delay per fragment")
+    parser.add_argument("--slow-every", type=int, default=20, help="every Nth fragment is 10x slower (0: none)")
+    parser.add_argument("--child", nargs=3, metavar=("URL", "DIR", "MODE"), help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.child:
+        url, out_dir, mode = args.child
+        run_child(url, out_dir, mode == "streaming", args.threads)
+        return
+
+    with tempfile.TemporaryDirectory() as root:
+        serve_dir = os.path.join(root, "hls")
+        os.mkdir(serve_dir)
+        write_playlist(serve_dir, args.segments, args.segment_kb * 1024)
+        counts = collections.Counter()
+        handler = type("Handler", (CountingHandler,), {"counts": counts, "delay": args.delay_ms / 1000, "slow_every": args.slow_every})
+        server = http.server.ThreadingHTTPServer(("127.0.0.1", 0), functools.partial(handler, directory=serve_dir))
+        server.daemon_threads = True
+        threading.Thread(target=server.serve_forever, daemon=True).start()
+        url = f"http://127.0.0.1:{server.server_address[1]}/index.m3u8"
+        # Separate HOME so the children never read or write the user's settings
+        env = dict(os.environ, HOME=root, QT_QPA_PLATFORM="offscreen")
+
+        def start(out_dir, mode):
+            return subprocess.Popen(
+                [sys.executable, __file__, "--threads", str(args.threads), "--child", url, out_dir, mode],
+                env=env, stdout=subprocess.DEVNULL, stderr=subprocess.PIPE, text=True)
+
+        print(f"{args.segments} segments x {args.segment_kb} KiB, {args.threads} threads")
+        failed = False
+        for mode in ("fragment-files", "streaming"):
+            reference_dir = os.path.join(root, f"{mode}-reference")
+            os.mkdir(reference_dir)
+            start(reference_dir, mode).communicate()
+            reference = output_digest(reference_dir)
+
+            for kill_at in args.kill_at:
+                out_dir = os.path.join(root, f"{mode}-{kill_at}")
+                os.mkdir(out_dir)
+                counts.clear()
+                child = start(out_dir, mode)
+                while sum(counts.values()) < args.segments * kill_at and child.poll() is None:
+                    time.sleep(0.01)
+                child.send_signal(signal.SIGKILL)
+                child.wait()
+                before = set(counts)
+                partial_kb = sum(list_files(out_dir).values()) / 1024
+
+                counts.clear()
+                _, errors = start(out_dir, mode).communicate()
+                after = set(counts)
+                resumed = output_digest(out_dir)
+                leftovers = sorted(set(list_files(out_dir)) - {"EP01.mp4"})
+
+                ok = reference is not None and resumed == reference and not leftovers
+                failed = failed or not ok or len(after) >= args.segments
+                print(f"{mode:>15} killed at {kill_at:.0%}: {len(before)} fragments requested "
+                      f"({partial_kb:.0f} KiB on disk), resumed run {len(after)}, "
+                      f"fetched twice {len(before & after)}, "
+                      f"content {'ok' if resumed == reference else 'MISMATCH'}"
+                      + (f", left behind: {leftovers}" if leftovers else ""))
+                if errors.strip():
+                    print(f"{'':>17}{errors.strip().splitlines()[-1]}")
+        server.shutdown()
+        if failed:
+            sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,136 @@
+#!/usr/bin/env python3
+"""Proxy pool against local stand-in proxies: distribution, ejection and re-admission.
+
+Starts a local origin server and three forwarding HTTP proxies (fast with
+weight 2, fast, and one with added latency), runs synthetic jobs through
+ProxyPool, kills a proxy to check it gets ejected, then restarts it to check
+it is re-admitted. Prints per-proxy stats for each assignment strategy.
+
+    python benchmarks/bench_proxy_pool.py [--jobs 60] [--concurrency 6]
+"""
+
+import argparse
+import concurrent.futures
+import http.server
+import sys
+import threading
+import time
+import urllib.request
+
+from _app import load_app
+
+BLOB = b"x" * (256 * 1024)
+
+
+class OriginHandler(http.server.BaseHTTPRequestHandler):
+    def do_GET(self):
+        if self.path.startswith("/generate_204"):
+            self.send_response(204)
+            self.end_headers()
+            return
+        self.send_response(200)
+        self.send_header("Content-Length", str(len(BLOB)))
+        self.end_headers()
+        self.wfile.write(BLOB)
+
+    def log_message(self, *args):
+        pass
+
+
+def make_proxy_handler(delay):
+    class ProxyHandler(http.server.BaseHTTPRequestHandler):
+        # Plain forward proxy: the request line carries the absolute URL
+        def do_GET(self):
+            time.sleep(delay)
+            opener = urllib.request.build_opener(urllib.request.ProxyHandler({}))
+            with opener.open(self.path, timeout=10) as upstream:
+                body = upstream.read()
+                self.send_response(upstream.status)
+            self.send_header("Content-Length", str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+
+        def log_message(self, *args):
+            pass
+    return ProxyHandler
+
+
+def serve(handler, port=0):
+    server = http.server.ThreadingHTTPServer(("127.0.0.1", port), handler)
+    server.daemon_threads = True
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server
+
+
+def run_jobs(pool, origin, jobs, concurrency):
+    def job(_):
+        proxy = pool.acquire()
+        start = time.monotonic()
+        try:
+            opener = urllib.request.build_opener(urllib.request.ProxyHandler({"http": proxy}))
+            with opener.open(f"{origin}/blob", timeout=10) as response:
+                size = len(response.read())
+            pool.release(proxy, True, size, time.monotonic() - start)
+        except Exception:
+            pool.release(proxy, False, 0, time.monotonic() - start, network_error=True)
+
+    with concurrent.futures.ThreadPoolExecutor(max_workers=concurrency) as executor:
+        list(executor.map(job, range(jobs)))
+
+
+def print_stats(title, pool):
+    print(title)
+    for proxy in pool.stats():
+        latency = f"{proxy['latency'] * 1000:6.1f} ms" if proxy["latency"] is not None else "    n/a  "
+        print(f"  {proxy['url']:<26} w={proxy['weight']:<3g} {'healthy' if proxy['healthy'] else 'EJECTED'}"
+              f"  latency {latency}  jobs {proxy['jobs']:3d} (failed {proxy['failed_jobs']})"
+              f"  {proxy['throughput'] / 1024 / 1024:7.1f} MB/s")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--jobs", type=int, default=60)
+    parser.add_argument("--concurrency", type=int, default=6)
+    args = parser.parse_args()
+
+    app = load_app()
+    origin_server = serve(OriginHandler)
+    origin = f"http://127.0.0.1:{origin_server.server_address[1]}"
+    proxies = [serve(make_proxy_handler(delay)) for delay in (0.0, 0.0, 0.1)]
+    endpoints = [(f"http://127.0.0.1:{server.server_address[1]}", weight)
+                 for server, weight in zip(proxies, (2, 1, 1))]
+
+    ok = True
+    for label, strategy in app.PROXY_STRATEGIES.items():
+        pool = app.ProxyPool(endpoints, strategy=strategy, probe_url=f"{origin}/generate_204")
+        pool.probe_all()
+        run_jobs(pool, origin, args.jobs, args.concurrency)
+        print_stats(f"\n{label}: {args.jobs} jobs, {args.concurrency} concurrent", pool)
+
+    # Ejection: stop the slow proxy and probe until it is marked unhealthy
+    pool = app.ProxyPool(endpoints, probe_url=f"{origin}/generate_204")
+    victim = proxies[2]
+    port = victim.server_address[1]
+    victim.shutdown()
+    victim.server_close()
+    for _ in range(app.PROXY_MAX_FAILURES):
+        pool.probe_all()
+    run_jobs(pool, origin, args.jobs // 2, args.concurrency)
+    print_stats("\nAfter stopping the third proxy:", pool)
+    ejected = not pool.stats()[2]["healthy"] and pool.stats()[2]["jobs"] == 0
+    ok &= ejected
+
+    # Re-admission: bring it back on the same port and probe once
+    proxies[2] = serve(make_proxy_handler(0.1), port)
+    pool.probe_all()
+    run_jobs(pool, origin, args.jobs // 2, args.concurrency)
+    print_stats("\nAfter restarting it:", pool)
+    readmitted = pool.stats()[2]["healthy"] and pool.stats()[2]["jobs"] > 0
+    ok &= readmitted
+
+    print(f"\nejected: {ejected}, re-admitted: {readmitted}")
+    return 0 if ok else 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())
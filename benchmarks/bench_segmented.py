@@ -0,0 +1,116 @@
+#!/usr/bin/env python3
+"""Segmented HTTP downloader against a local server with per-connection throttling.
+
+The server caps every connection (like a CDN per-connection throttle) and
+makes one region of the file extra slow, so work stealing has something to
+do. Compares one connection with N connections, then interrupts a download
+and resumes it to check that only the missing bytes are fetched again.
+
+    python benchmarks/bench_segmented.py [--size-mb 32] [--connections 8] [--conn-rate-mb 4]
+"""
+
+import argparse
+import hashlib
+import http.server
+import os
+import re
+import sys
+import tempfile
+import threading
+import time
+import urllib.request
+
+from _app import load_app
+
+
+def make_handler(data, conn_rate, slow_region):
+    class RangeHandler(http.server.BaseHTTPRequestHandler):
+        protocol_version = "HTTP/1.1"
+
+        def do_GET(self):
+            first, last = 0, len(data) - 1
+            match = re.match(r"bytes=(\d+)-(\d*)", self.headers.get("Range", ""))
+            if match:
+                first = int(match.group(1))
+                last = int(match.group(2)) if match.group(2) else last
+                self.send_response(206)
+                self.send_header("Content-Range", f"bytes {first}-{last}/{len(data)}")
+            else:
+                self.send_response(200)
+            self.send_header("Content-Length", str(last - first + 1))
+            self.end_headers()
+
+            position, block = first, 64 * 1024
+            try:
+                while position <= last:
+                    chunk = data[position:min(position + block, last + 1)]
+                    self.wfile.write(chunk)
+                    rate = conn_rate / 4 if slow_region[0] <= position < slow_region[1] else conn_rate
+                    time.sleep(len(chunk) / rate)
+                    position += len(chunk)
+            except (BrokenPipeError, ConnectionResetError):
+                pass
+
+        def log_message(self, *args):
+            pass
+    return RangeHandler
+
+
+def open_range_for(url):
+    def open_range(first, last):
+        return urllib.request.urlopen(urllib.request.Request(url, headers={"Range": f"bytes={first}-{last}"}))
+    return open_range
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--size-mb", type=int, default=32)
+    parser.add_argument("--connections", type=int, default=8)
+    parser.add_argument("--conn-rate-mb", type=float, default=4.0)
+    args = parser.parse_args()
+
+    app = load_app()
+    data = os.urandom(args.size_mb * 1024 * 1024)
+    digest = hashlib.sha256(data).hexdigest()
+    # First eighth of the file is served at a quarter of the normal rate
+    slow_region = (0, len(data) // 8)
+    server = http.server.ThreadingHTTPServer(
+        ("127.0.0.1", 0), make_handler(data, args.conn_rate_mb * 1024 * 1024, slow_region))
+    server.daemon_threads = True
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    url = f"http://127.0.0.1:{server.server_address[1]}/file.bin"
+
+    ok = True
+    with tempfile.TemporaryDirectory() as tmp:
+        for connections in (1, args.connections):
+            target = os.path.join(tmp, f"out{connections}.bin")
+            download = app.SegmentedDownload(open_range_for(url), target, len(data), connections)
+            start = time.monotonic()
+            download.run()
+            elapsed = time.monotonic() - start
+            with open(target, "rb") as f:
+                intact = hashlib.sha256(f.read()).hexdigest() == digest
+            ok &= intact
+            print(f"{connections:2d} connection(s): {elapsed:6.2f}s  {len(data) / elapsed / 1024 / 1024:6.1f} MB/s"
+                  f"  segments after stealing: {len(download.segments)}  intact: {intact}")
+
+        # Interrupt at roughly half way, then resume from the saved segment map
+        target = os.path.join(tmp, "resume.bin")
+        first = app.SegmentedDownload(open_range_for(url), target, len(data), args.connections, identity="bench",
+                                      should_stop=lambda: first.downloaded() >= len(data) // 2)
+        completed = first.run()
+        second = app.SegmentedDownload(open_range_for(url), target, len(data), args.connections, identity="bench")
+        second.run()
+        with open(target, "rb") as f:
+            intact = hashlib.sha256(f.read()).hexdigest() == digest
+        refetched = first.fetched_bytes + second.fetched_bytes - len(data)
+        ok &= intact and not completed and second.resumed_bytes > 0
+        print(f"resume: stopped early {not completed}, resumed with {second.resumed_bytes / 1024 / 1024:.1f}MB on disk, "
+              f"fetched again {max(refetched, 0) / 1024 / 1024:.2f}MB, intact: {intact}")
+
+    server.shutdown()
+    return 0 if ok else 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,126 @@
+#!/usr/bin/env python3
+"""Cold-start benchmark: module import cost and time to first paint.
+
+Runs each measurement in a fresh interpreter with the offscreen Qt platform
+and a throwaway home directory, then compares against the budgets below.
+Exits non-zero when a budget is exceeded.
+
+    python benchmarks/bench_startup.py [--runs 5]
+"""
+
+import argparse
+import os
+import re
+import statistics
+import subprocess
+import sys
+import tempfile
+from pathlib import Path
+
+# Budgets for a warm disk cache on a typical desktop
+IMPORT_BUDGET_MS = 150
+FIRST_PAINT_BUDGET_MS = 750
+
+BENCH_DIR = Path(__file__).resolve().parent
+
+IMPORT_SNIPPET = f"""
+import sys
+sys.path.insert(0, {str(BENCH_DIR)!r})
+from _app import load_app
+load_app()
+print('yt_dlp' in sys.modules)
+"""
+
+FIRST_PAINT_SNIPPET = f"""
+import sys, time
+start = time.perf_counter()
+sys.path.insert(0, {str(BENCH_DIR)!r})
+from _app import load_app
+app_module = load_app()
+from PyQt6.QtCore import QEvent, QObject, QTimer
+from PyQt6.QtWidgets import QApplication
+
+class FirstPaint(QObject):
+    def eventFilter(self, obj, event):
+        if event.type() == QEvent.Type.Paint:
+            print(f"{{(time.perf_counter() - start) * 1000:.1f}}")
+            QApplication.instance().quit()
+        return False
+
+app = QApplication(sys.argv)
+app_module.CustomStyle.apply_dark_theme(app)
+window = app_module.MainWindow()
+watcher = FirstPaint()
+window.installEventFilter(watcher)
+window.show()
+QTimer.singleShot(10000, app.quit)
+app.exec()
+print('yt_dlp' in sys.modules)
+"""
+
+
+def bench_env(home):
+    env = dict(os.environ)
+    env["QT_QPA_PLATFORM"] = "offscreen"
+    env["HOME"] = home
+    return env
+
+
+def measure_import(env):
+    result = subprocess.run([sys.executable, "-X", "importtime", "-c", IMPORT_SNIPPET],
+                            capture_output=True, text=True, env=env, check=True)
+    # importtime lines: "import time: self [us] | cumulative | imported package"
+    top_level = []
+    for line in result.stderr.splitlines():
+        match = re.match(r"import time:\s+(\d+) \|\s+(\d+) \| (\s*)(\S+)", line)
+        if match and not match.group(3):
+            top_level.append((int(match.group(2)), match.group(4)))
+    total_ms = sum(cumulative for cumulative, _ in top_level) / 1000
+    loaded_yt_dlp = result.stdout.strip().splitlines()[-1] == "True"
+    return total_ms, sorted(top_level, reverse=True)[:8], loaded_yt_dlp
+
+
+def measure_first_paint(env):
+    result = subprocess.run([sys.executable, "-c", FIRST_PAINT_SNIPPET],
+                            capture_output=True, text=True, env=env, check=True)
+    lines = result.stdout.strip().splitlines()
+    paint_ms = next(float(line) for line in lines if re.fullmatch(r"[\d.]+", line))
+    return paint_ms, lines[-1] == "True"
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--runs", type=int, default=5)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as home:
+        env = bench_env(home)
+        import_runs, paint_runs = [], []
+        yt_dlp_at_startup = False
+        top_imports = []
+        for _ in range(args.runs):
+            total_ms, top_imports, loaded = measure_import(env)
+            import_runs.append(total_ms)
+            yt_dlp_at_startup |= loaded
+            paint_ms, loaded = measure_first_paint(env)
+            paint_runs.append(paint_ms)
+            yt_dlp_at_startup |= loaded
+
+    import_ms = statistics.median(import_runs)
+    paint_ms = statistics.median(paint_runs)
+    print(f"Import time (median of {args.runs}): {import_ms:.1f} ms (budget {IMPORT_BUDGET_MS} ms)")
+    for cumulative, name in top_imports:
+        print(f"  {cumulative / 1000:8.1f} ms  {name}")
+    print(f"Time to first paint (median of {args.runs}): {paint_ms:.1f} ms (budget {FIRST_PAINT_BUDGET_MS} ms)")
+    print(f"yt_dlp imported during startup: {yt_dlp_at_startup}")
+
+    over_budget = import_ms > IMPORT_BUDGET_MS or paint_ms > FIRST_PAINT_BUDGET_MS
+    if over_budget or yt_dlp_at_startup:
+        print("FAIL: startup budget exceeded")
+        return 1
+    print("OK")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
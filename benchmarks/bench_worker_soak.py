@@ -0,0 +1,131 @@
+#!/usr/bin/env python3
+"""Memory soak: thousands of synthetic jobs through the main window's worker path.
+
+Each job is a DownloadWorker whose download step is replaced by a synthetic one:
+it builds an info dict of roughly --payload-kb (the formats list a real extraction
+holds), sends progress and status updates, and fills in the per-job results the
+window reads afterwards (media files, bytes, checksums, format choices). Every
+--fail-every-th job fails instead. The jobs run one after another through
+MainWindow.start_worker, as single downloads, on the offscreen Qt platform.
+
+Resident memory is sampled after a warm-up and at the end. The run fails if it
+grew by more than --budget-mb, if jobs ran on more distinct threads than the
+worker pool holds, or if finished workers are still alive at the end.
+
+    python benchmarks/bench_worker_soak.py [--jobs 5000] [--payload-kb 256] [--budget-mb 32] [--fail-every 20]
+"""
+
+import argparse
+import gc
+import os
+import sys
+import tempfile
+import threading
+import time
+
+from _app import load_app
+
+
+def rss_bytes():
+    with open("/proc/self/statm") as f:
+        return int(f.read().split()[1]) * os.sysconf("SC_PAGE_SIZE")
+
+
+def make_worker_class(app, payload_kb, fail_every, thread_ids):
+    class SyntheticWorker(app.DownloadWorker):
+        def _download_once(self, yt_dlp):
+            thread_ids.add(threading.get_ident())
+            index = int(self.url.rsplit("/", 1)[1])
+            # About payload_kb of format dicts, like an extracted info dict
+            self.info = {"id": str(index), "formats": [
+                {"format_id": f"{index}-{n}", "url": f"https://cdn.example/{index}/{n}/" + "x" * 900,
+                 "height": 144 * (n % 8 + 1), "tbr": float(n)}
+                for n in range(payload_kb)]}
+            filename = f"/tmp/soak/{index}.mp4"
+            total = 4 * 1024 * 1024
+            for step in range(1, 5):
+                self.progress.emit({"downloaded": total * step // 4, "total": total,
+                                    "filename": filename, "speed": 1048576.0, "eta": 4 - step})
+                self.status_update.emit(f"Downloading at 1.0 MB/s (ETA: {4 - step} seconds)")
+            if fail_every and index % fail_every == fail_every - 1:
+                return "HTTP Error 500: synthetic failure", app.ERROR_UNKNOWN
+            self.file_bytes[filename] = total
+            self.media_files.append((f"soak {index}", filename))
+            self.format_choices = [(f"{index}-0", total, total)]
+            self.checksums.append({"path": filename, "size": total, "algorithm": "sha256", "hash": "0" * 64})
+            return None, None
+
+    return SyntheticWorker
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--jobs", type=int, default=5000)
+    parser.add_argument("--payload-kb", type=int, default=256, help="synthetic info dict size per job")
+    parser.add_argument("--budget-mb", type=float, default=32, help="allowed RSS growth after warm-up")
+    parser.add_argument("--fail-every", type=int, default=20, help="every Nth job fails (0: none)")
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as home:
+        # Separate HOME so the window never reads or writes the user's settings and error log
+        os.environ["HOME"] = home
+        os.environ.setdefault("QT_QPA_PLATFORM", "offscreen")
+        app = load_app()
+        from PyQt6.QtCore import QTimer
+        from PyQt6.QtWidgets import QApplication
+        qt_app = QApplication(sys.argv)
+
+        thread_ids = set()
+        worker_class = make_worker_class(app, args.payload_kb, args.fail_every, thread_ids)
+        app.create_download_worker = worker_class
+        window = app.MainWindow()
+        settings = dict(app.SETTINGS_DEFAULTS, retry_attempts=1)
+        options = app.build_download_options(settings, home)
+
+        warm_up = max(1, args.jobs // 10)
+        state = {"started": 0, "samples": []}
+
+        def sample():
+            gc.collect()
+            state["samples"].append((state["started"], rss_bytes()))
+
+        def pump():
+            if window.worker is not None:
+                return
+            if state["started"] in (warm_up, args.jobs):
+                sample()
+            if state["started"] == args.jobs:
+                qt_app.quit()
+                return
+            window.start_worker(f"https://soak.example/{state['started']}", dict(options))
+            state["started"] += 1
+
+        timer = QTimer()
+        timer.timeout.connect(pump)
+        timer.start(0)
+        start = time.perf_counter()
+        qt_app.exec()
+        elapsed = time.perf_counter() - start
+        timer.stop()
+
+        qt_app.processEvents()  # deferred deletes of the last worker
+        gc.collect()
+        live = sum(isinstance(obj, worker_class) for obj in gc.get_objects())
+        (warm_jobs, warm_rss), (end_jobs, end_rss) = state["samples"]
+        growth = (end_rss - warm_rss) / 1048576
+        failed = args.fail_every and args.jobs // args.fail_every
+
+        print(f"{args.jobs} jobs ({failed} failing) with ~{args.payload_kb} KiB of info each "
+              f"in {elapsed:.1f}s ({elapsed / args.jobs * 1000:.1f} ms/job)")
+        print(f"  RSS after {warm_jobs} jobs {warm_rss / 1048576:.1f} MiB, after {end_jobs} "
+              f"{end_rss / 1048576:.1f} MiB: {growth:+.1f} MiB "
+              f"({growth * 1024 / max(1, end_jobs - warm_jobs):+.2f} KiB/job), budget {args.budget_mb:.0f} MiB")
+        print(f"  {len(thread_ids)} distinct worker threads (pool of {app.WORKER_THREADS}), "
+              f"{threading.active_count()} Python threads alive, {live} workers still alive")
+        app.worker_threads().shutdown()
+        if growth > args.budget_mb or len(thread_ids) > app.WORKER_THREADS or live > 0:
+            sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -7,16 +7,184 @@ from PyQt6.QtWidgets import (QApplication, QMainWindow, QWidget, QVBoxLayout,
                            QHBoxLayout, QLabel, QLineEdit, QPushButton, QComboBox,
                            QProgressBar, QTextEdit, QFileDialog, QSpinBox, 
                            QCheckBox, QTabWidget, QGroupBox, QMessageBox,
-                           QScrollArea, QGridLayout, QStatusBar, QDialog)
-from PyQt6.QtCore import Qt, QThread, pyqtSignal, QSize, QTimer
-from PyQt6.QtGui import QIcon, QFont, QColor, QPixmap, QPalette, QAction
-import yt_dlp
+                           QScrollArea, QGridLayout, QDialog, QListWidget,
+                           QListWidgetItem)
+from PyQt6.QtCore import Qt, QThread, pyqtSignal, QTimer, QObject, QCoreApplication
+from PyQt6.QtGui import QColor, QPixmap, QPalette, QAction
+import json
+import asyncio
+import collections
 import concurrent.futures
+import errno
+import hashlib
+import hmac
+import http.server
+import math
+import queue
+import random
+import re
+import secrets
+import shutil
+import socket
+import socketserver
+import ssl
+import sqlite3
+import subprocess
 import threading
-import json
-import requests
+import time
+import types
+import urllib.error
+import urllib.parse
+import urllib.request
 from pathlib import Path
 
+PROXY_PROBE_URL = 'http://www.gstatic.com/generate_204'
+ASYNC_FRAGMENT_REQUESTS = 128  # fragment requests in flight per download with the async engine
+
+# Settings-tab values used before the tab has been built (it is created on first view)
+SETTINGS_DEFAULTS = {
+    'use_proxy': False,
+    'proxy_url': '',
+    'rate_limit': 0,
+    'thread_count': 16,
+    'retry_attempts': 3,
+    'segmented_http': False,
+    'streaming_assembly': False,
+    'fragment_engine': 'threads',
+    'async_fragment_requests': ASYNC_FRAGMENT_REQUESTS,
+    'use_proxy_pool': False,
+    'proxy_pool': '',
+    'proxy_strategy': "Least Loaded",
+    'proxy_probe_url': PROXY_PROBE_URL,
+    'daemon_url': 'http://127.0.0.1:8765',
+    'calibration_url': '',
+    'transcode_workers': max(1, (os.cpu_count() or 2) // 2),
+    'job_parallelism': 0,
+    'execution_backend': 'thread',
+    'min_free_mb': 1024,
+    'pipe_transcode': False,
+    'checksum_algorithm': '',
+    'playlist_sync': False,
+    'section_keyframe_cuts': False,
+    'verify_media': False,
+    'output_roots': '',
+    'output_policy': "Most Free Space",
+    'format_ranking': False,
+    'codec_preference': "Smallest File",
+    'max_item_mb': 0,
+    'max_item_kbps': 0,
+    'max_audio_kbps': 0,
+}
+
+_yt_dlp = None
+
+def load_yt_dlp():
+    """Import yt-dlp on first probe or download rather than at startup.
+    Wheels ship lazy_extractors, so only the extractor matching a URL is loaded."""
+    global _yt_dlp
+    if _yt_dlp is None:
+        import yt_dlp
+        import importlib.util
+        # LAZY_EXTRACTORS.value stays None until the extractors are first loaded, so ask
+        # whether the module exists instead of reading it right after the import
+        if (os.environ.get('YTDLP_NO_LAZY_EXTRACTORS')
+                or importlib.util.find_spec('yt_dlp.extractor.lazy_extractors') is None):
+            print("Note: yt-dlp lazy extractors unavailable, first probe will load all extractors")
+        _yt_dlp = yt_dlp
+    return _yt_dlp
+
+# Bulk mode: passes over deferred transient failures once the queue is drained
+BATCH_RETRY_PASSES = 2
+RETRY_PASS_DELAY_MS = 10000
+
+# Failure classes reported by DownloadWorker
+ERROR_NETWORK = 'network'
+ERROR_THROTTLED = 'throttled'
+ERROR_GEO_AUTH = 'geo_auth'
+ERROR_EXTRACTOR = 'extractor'
+ERROR_POSTPROCESS = 'postprocess'
+ERROR_DISK_FULL = 'disk_full'
+ERROR_CANCELLED = 'cancelled'
+ERROR_UNKNOWN = 'unknown'
+
+# Transient failures: retried with backoff, then deferred to the end-of-batch retry pass
+RETRYABLE_ERRORS = {ERROR_NETWORK, ERROR_THROTTLED}
+
+ERROR_LABELS = {
+    ERROR_NETWORK: 'Network error',
+    ERROR_THROTTLED: 'Throttled',
+    ERROR_GEO_AUTH: 'Geo-restricted or login required',
+    ERROR_EXTRACTOR: 'Extractor error',
+    ERROR_POSTPROCESS: 'Post-processing error',
+    ERROR_DISK_FULL: 'Disk full',
+    ERROR_CANCELLED: 'Cancelled',
+    ERROR_UNKNOWN: 'Download error',
+}
+
+# Checked in order, first match wins
+ERROR_PATTERNS = [
+    (ERROR_DISK_FULL, r'no space left on device|disk (is )?full|errno 28\b|not enough space'),
+    (ERROR_THROTTLED, r'http error 429|too many requests|rate.?limit|confirm you.re not a bot'),
+    (ERROR_GEO_AUTH, r'not available in your country|geo.?restrict|sign in to confirm your age|'
+                     r'private video|members.only|login required|requires authentication|'
+                     r'use --cookies|http error 40[13]'),
+    # A certificate that fails verification fails the same way on every retry
+    (ERROR_UNKNOWN, r'certificate.verify.failed'),
+    (ERROR_NETWORK, r'timed? ?out|connection (reset|refused|aborted)|temporary failure in name resolution|'
+                    r'name or service not known|network is unreachable|remote end closed|incompleteread|'
+                    r'urlopen error|unable to download (webpage|video data|json)|http error 5\d\d|'
+                    r'ssl: (unexpected_eof|wrong_version_number|decryption_failed)|'
+                    r'eof occurred in violation of protocol|broken pipe|fragment .* not found'),
+    (ERROR_POSTPROCESS, r'postprocessing|ffmpeg|ffprobe|conversion failed|error merging'),
+    (ERROR_EXTRACTOR, r'unsupported url|unable to extract|extractorerror|video unavailable|'
+                      r'is not a valid url|no video formats found|requested format is not available'),
+]
+
+def classify_error(message, exc=None):
+    """Map a yt-dlp error (exception and/or message) to one of the ERROR_* classes"""
+    while exc is not None:
+        if isinstance(exc, OSError) and exc.errno == errno.ENOSPC:
+            return ERROR_DISK_FULL
+        name = type(exc).__name__
+        if name == 'PostProcessingError':
+            return ERROR_POSTPROCESS
+        if name == 'GeoRestrictedError':
+            return ERROR_GEO_AUTH
+        # DownloadError keeps the original exception in exc_info
+        exc_info = getattr(exc, 'exc_info', None)
+        inner = exc_info[1] if exc_info and len(exc_info) > 1 else None
+        exc = inner if inner is not exc else None
+
+    text = (message or '').lower()
+    for category, pattern in ERROR_PATTERNS:
+        if re.search(pattern, text):
+            return category
+    return ERROR_UNKNOWN
+
+def backoff_delay(category, attempt):
+    """Exponential backoff with jitter; throttling starts from a longer base delay"""
+    base = 15 if category == ERROR_THROTTLED else 2
+    delay = min(base * (2 ** (attempt - 1)), 300)
+    return delay * random.uniform(0.8, 1.2)
+
+class YdlErrorCollector:
+    """yt-dlp logger that keeps error messages instead of printing them"""
+    def __init__(self):
+        self.errors = []
+        self.warnings = []
+
+    def debug(self, msg):
+        pass
+
+    def info(self, msg):
+        pass
+
+    def warning(self, msg):
+        self.warnings.append(msg)
+
+    def error(self, msg):
+        self.errors.append(msg)
+
 def get_resource_path(relative_path):
     """Get absolute path to resource, works for dev and for PyInstaller"""
     try:
@@ -124,6 +292,16 @@ class CustomStyle:
                 margin: 2px;
             }
             
+            QListWidget {
+                padding: 4px;
+                border-radius: 6px;
+                border: 1px solid #3d3d3d;
+                background-color: #333333;
+                color: white;
+                selection-background-color: #4285f4;
+                margin: 2px;
+            }
+            
             QProgressBar {
                 border: none;
                 border-radius: 4px;
@@ -264,139 +442,4971 @@ class CustomStyle:
             }
         """)
 
-class DownloadWorker(QThread):
+# Segmented HTTP downloads for progressive (single-file) formats
+SEGMENT_MIN_SIZE = 1024 * 1024
+SEGMENT_MIN_STEAL = 256 * 1024
+SEGMENT_READ_SIZE = 64 * 1024
+SEGMENT_STATE_INTERVAL = 1.0
+SEGMENT_RETRIES = 5
+SEGMENT_STATE_SUFFIX = '.segments.json'
+
+class SegmentedDownload:
+    """Fetches a known-length resource as parallel byte ranges written in place
+    into a preallocated file. Idle connections split the segment with the longest
+    estimated time left; per-segment progress is saved next to the file for resume.
+    An OutputChecksum passed as checksum is fed the file's bytes as they are written."""
+
+    def __init__(self, open_range, filename, total_size, connections=8, identity=None,
+                 min_split=SEGMENT_MIN_SIZE, progress=None, should_stop=None, checksum=None):
+        self.open_range = open_range  # (start, end inclusive) -> response with read()
+        self.filename = filename
+        self.total_size = total_size
+        self.connections = max(1, connections)
+        self.identity = identity
+        self.min_split = min_split
+        self.progress = progress
+        self.should_stop = should_stop or (lambda: False)
+        self.checksum = checksum
+        self.checksum_lock = threading.Lock()
+        self._reader = None
+        self.state_path = filename + SEGMENT_STATE_SUFFIX
+        self.lock = threading.Lock()
+        self.segments = []
+        self.resumed_bytes = 0
+        self.fetched_bytes = 0
+        self.error = None
+        self._last_state_save = 0
+        self._last_progress = 0
+
+    def downloaded(self):
+        return sum(seg['pos'] - seg['start'] for seg in self.segments)
+
+    def _load_state(self):
+        try:
+            with open(self.state_path) as f:
+                state = json.load(f)
+            if (state.get('identity') == self.identity and state.get('total_size') == self.total_size
+                    and os.path.getsize(self.filename) == self.total_size):
+                return [{'start': seg['start'], 'pos': seg['pos'], 'end': seg['end'], 'owner': None, 'rate': 0.0}
+                        for seg in state['segments']]
+        except (OSError, ValueError, KeyError, TypeError):
+            pass
+        return None
+
+    def _save_state(self, force=False):
+        now = time.monotonic()
+        if not force and now - self._last_state_save < SEGMENT_STATE_INTERVAL:
+            return
+        self._last_state_save = now
+        state = {
+            'identity': self.identity,
+            'total_size': self.total_size,
+            'segments': [{'start': seg['start'], 'pos': seg['pos'], 'end': seg['end']} for seg in self.segments],
+        }
+        with open(self.state_path + '.tmp', 'w') as f:
+            json.dump(state, f)
+        os.replace(self.state_path + '.tmp', self.state_path)
+
+    def _preallocate(self):
+        with open(self.filename, 'wb') as f:
+            f.truncate(self.total_size)
+            if hasattr(os, 'posix_fallocate'):
+                try:
+                    os.posix_fallocate(f.fileno(), 0, self.total_size)
+                except OSError:
+                    pass  # sparse file is fine, e.g. on filesystems without fallocate
+
+    def run(self):
+        """Download everything; returns False if stopped early (state is kept for resume)"""
+        segments = self._load_state()
+        if segments is None:
+            self._preallocate()
+            count = max(1, min(self.connections, self.total_size // self.min_split))
+            bounds = [self.total_size * i // count for i in range(count + 1)]
+            segments = [{'start': bounds[i], 'pos': bounds[i], 'end': bounds[i + 1], 'owner': None, 'rate': 0.0}
+                        for i in range(count)]
+        self.segments = segments
+        self.resumed_bytes = self.downloaded()
+
+        threads = [threading.Thread(target=self._connection, args=(i,), daemon=True)
+                   for i in range(self.connections)]
+        if self.checksum is not None:
+            self._reader = open(self.filename, 'rb')
+        try:
+            for thread in threads:
+                thread.start()
+            for thread in threads:
+                thread.join()
+            if self.checksum is not None and self.error is None:
+                self._advance_checksum()  # a resumed file may need no writes at all
+        finally:
+            if self._reader is not None:
+                self._reader.close()
+
+        if self.error is not None:
+            self._save_state(force=True)
+            raise self.error
+        if self.downloaded() < self.total_size:
+            self._save_state(force=True)
+            return False
+        try:
+            os.remove(self.state_path)
+        except OSError:
+            pass
+        return True
+
+    def _advance_checksum(self, position=None, chunk=b''):
+        """Extend the checksum over the file's contiguous written prefix. A chunk written
+        right at the end of the prefix is hashed from memory; bytes other connections
+        wrote further on are read back (from the page cache) once the prefix reaches them."""
+        with self.checksum_lock:
+            if position == self.checksum.size:
+                self.checksum.update(chunk)
+            while True:
+                with self.lock:
+                    written = next((seg['pos'] for seg in self.segments
+                                    if seg['start'] <= self.checksum.size < seg['pos']), None)
+                if written is None:
+                    return
+                self.checksum.update_from(self._reader, written)
+
+    def _claim(self, owner):
+        """Take an unowned unfinished segment, or split the slowest one in flight"""
+        with self.lock:
+            if self.error is not None:
+                return None
+            for seg in self.segments:
+                if seg['owner'] is None and seg['pos'] < seg['end']:
+                    seg['owner'] = owner
+                    return seg
+
+            def time_left(seg):
+                return (seg['end'] - seg['pos']) / max(seg['rate'], 1.0)
+
+            busy = [seg for seg in self.segments if seg['owner'] is not None
+                    and seg['end'] - seg['pos'] >= 2 * SEGMENT_MIN_STEAL]
+            if not busy:
+                return None
+            victim = max(busy, key=time_left)
+            middle = victim['pos'] + (victim['end'] - victim['pos']) // 2
+            stolen = {'start': middle, 'pos': middle, 'end': victim['end'], 'owner': owner, 'rate': 0.0}
+            victim['end'] = middle
+            self.segments.append(stolen)
+            return stolen
+
+    def _connection(self, owner):
+        with open(self.filename, 'r+b') as f:
+            while not self.should_stop():
+                seg = self._claim(owner)
+                if seg is None:
+                    return
+                try:
+                    self._fetch_segment(seg, f)
+                except Exception as e:
+                    with self.lock:
+                        self.error = self.error or e
+                    return
+                finally:
+                    with self.lock:
+                        seg['owner'] = None
+
+    def _fetch_segment(self, seg, f):
+        attempt = 0
+        while seg['pos'] < seg['end'] and not self.should_stop():
+            try:
+                response = self.open_range(seg['pos'], seg['end'] - 1)
+                try:
+                    started, received = time.monotonic(), 0
+                    while seg['pos'] < seg['end'] and not self.should_stop():
+                        chunk = response.read(SEGMENT_READ_SIZE)
+                        if not chunk:
+                            break
+                        with self.lock:
+                            # end may have moved down if another connection stole the tail
+                            chunk = chunk[:seg['end'] - seg['pos']]
+                            position = seg['pos']
+                        f.seek(position)
+                        f.write(chunk)
+                        if self.checksum is not None:
+                            f.flush()  # visible to the checksum reader before pos moves past it
+                        received += len(chunk)
+                        with self.lock:
+                            seg['pos'] += len(chunk)
+                            self.fetched_bytes += len(chunk)
+                            elapsed = time.monotonic() - started
+                            if elapsed > 0:
+                                seg['rate'] = received / elapsed
+                            self._save_state()
+                            report = time.monotonic() - self._last_progress >= 0.1
+                            if report:
+                                self._last_progress = time.monotonic()
+                        if self.checksum is not None:
+                            self._advance_checksum(position, chunk)
+                        if report and self.progress:
+                            self.progress(self.downloaded())
+                finally:
+                    response.close()
+                if not received and seg['pos'] < seg['end'] and not self.should_stop():
+                    raise OSError(f"Connection closed with no data at byte {seg['pos']}")
+                attempt = 0
+            except Exception:
+                attempt += 1
+                if attempt > SEGMENT_RETRIES:
+                    raise
+                time.sleep(min(2 ** attempt, 30))
+
+FRAGMENT_MAP_SUFFIX = '.fragments.jsonl'
+
+class FragmentMap:
+    """Completion map of an HLS/DASH download, kept next to its .part file so a killed
+    download picks up where it stopped. It is a journal: an identity line, then one line
+    per fragment appended to the .part file (index, bytes) or parked complete in its own
+    file until its turn (index, bytes, path), each written as soon as the bytes are on
+    disk. On load only what the journal records and the file sizes confirm is kept."""
+
+    def __init__(self, part_path, identity):
+        self.part_path = part_path
+        self.path = part_path + FRAGMENT_MAP_SUFFIX
+        self.identity = identity
+        self.lock = threading.Lock()
+        self.appended = []  # [frag index, bytes] in file order
+        self.parked = {}  # frag index -> [path, bytes]
+        self._journal = None
+
+    @staticmethod
+    def _size(path):
+        try:
+            return os.path.getsize(path)
+        except OSError:
+            return None
+
+    def _read(self):
+        """(identity, entries) from the journal; a line cut off by a kill ends it"""
+        identity, entries = None, []
+        try:
+            with open(self.path) as f:
+                for number, line in enumerate(f):
+                    try:
+                        entry = json.loads(line)
+                    except ValueError:
+                        break
+                    if number == 0:
+                        identity = entry.get('identity') if isinstance(entry, dict) else None
+                    else:
+                        entries.append(entry)
+        except OSError:
+            pass
+        return identity, entries
+
+    def load(self):
+        """Replay the journal, cut the .part file back to the fragments it confirms and
+        start a fresh journal with them. Returns (last appended frag index, bytes kept);
+        (0, 0) means start over."""
+        identity, entries = self._read()
+        part_size = self._size(self.part_path) or 0
+        if identity == self.identity:
+            try:
+                for entry in entries:
+                    if len(entry) == 2:
+                        self.parked.pop(entry[0], None)
+                        self.appended.append(entry)
+                    else:
+                        self.parked[entry[0]] = [entry[2], entry[1]]
+            except (TypeError, IndexError):
+                pass
+        else:
+            # Another format or manifest under the same name: its parked fragments are useless
+            for entry in entries:
+                if isinstance(entry, list) and len(entry) == 3:
+                    try:
+                        os.remove(entry[2])
+                    except (OSError, TypeError):
+                        pass
+            entries = []
+
+        kept = 0
+        for count, (index, size) in enumerate(self.appended):
+            if kept + size > part_size:
+                # The file is shorter than recorded, e.g. writes lost in a crash
+                del self.appended[count:]
+                break
+            kept += size
+        last = self.appended[-1][0] if self.appended else 0
+        self.parked = {index: entry for index, entry in self.parked.items()
+                       if index > last and self._size(entry[0]) == entry[1]}
+        if part_size > kept:
+            # Bytes appended after the last journal line, or a .part file with no map, are not trusted
+            os.truncate(self.part_path, kept)
+
+        with open(self.path + '.tmp', 'w') as f:
+            f.write(json.dumps({'identity': self.identity}) + '\n')
+            f.writelines(json.dumps(entry) + '\n' for entry in self.appended)
+            f.writelines(json.dumps([index, size, path]) + '\n' for index, (path, size) in self.parked.items())
+        os.replace(self.path + '.tmp', self.path)
+        self._journal = open(self.path, 'a')
+        return last, kept
+
+    def _record(self, entry):
+        if self._journal is not None:
+            self._journal.write(json.dumps(entry) + '\n')
+            self._journal.flush()
+
+    def park(self, index, path):
+        """Record a complete fragment waiting in its own file"""
+        size = self._size(path)
+        if size is None:
+            return
+        with self.lock:
+            self.parked[index] = [path, size]
+            self._record([index, size, path])
+
+    def parked_file(self, index):
+        """Path of the fragment if it is parked complete and still intact, else None"""
+        with self.lock:
+            entry = self.parked.get(index)
+        if entry is not None and self._size(entry[0]) == entry[1]:
+            return entry[0]
+        return None
+
+    def append(self, index, size):
+        """Record a fragment written (and flushed) to the end of the .part file"""
+        with self.lock:
+            self.parked.pop(index, None)
+            self.appended.append([index, size])
+            self._record([index, size])
+
+    def remove(self):
+        with self.lock:
+            if self._journal is not None:
+                self._journal.close()
+                self._journal = None
+        for path in (self.path, self.path + '.tmp'):
+            try:
+                os.remove(path)
+            except OSError:
+                pass
+
+RESUME_JOURNAL_SUFFIXES = (SEGMENT_STATE_SUFFIX, FRAGMENT_MAP_SUFFIX)
+
+def scratch_leftovers(scratch):
+    """Entries of a scratch (.temp) folder no download can resume from: everything but
+    the files of downloads with a segment or fragment journal (the .part file, the
+    journal, parked fragments and yt-dlp's .ytdl file all start with the same name)"""
+    names = os.listdir(scratch)
+    stems = set()
+    for name in names:
+        for suffix in RESUME_JOURNAL_SUFFIXES:
+            if name.endswith(suffix):
+                base = name[:-len(suffix)]
+                stems.add(base[:-len('.part')] if base.endswith('.part') else base)
+    return [os.path.join(scratch, name) for name in names
+            if not any(name == stem or name.startswith(stem + '.') for stem in stems)]
+
+# Streaming fragment assembly: fragments are appended to the .part file in order
+# from memory; the reorder window is this many fragments per download thread
+STREAMING_WINDOW_FACTOR = 2
+# Fragments larger than this are spooled to disk and appended with an in-kernel copy
+STREAMING_SPILL_SIZE = 16 * 1024 * 1024
+
+# Audio conversions that can be fed from the network while the download runs
+PIPE_TRANSCODE_MUXERS = {'mp3': 'mp3', 'wav': 'wav', 'flac': 'flac'}
+AUDIO_ENCODERS = {'mp3': 'libmp3lame', 'wav': 'pcm_s16le', 'flac': 'flac'}
+
+def audio_output_args(codec):
+    """FFmpeg output arguments for an audio download converted to codec"""
+    return ['-vn', '-acodec', AUDIO_ENCODERS[codec], '-ar', '44100', '-ac', '2', '-b:a', '320k']
+# ISO media can keep its index after the samples, which ffmpeg only reaches by seeking
+SEEKABLE_CONTAINERS = {'mp4', 'm4a', 'mov', '3gp'}
+
+def append_file(dest, src_path):
+    """Append a file to an open binary file, copying in the kernel where the platform allows"""
+    dest.flush()
+    dest_fd = dest.fileno()
+    size = os.path.getsize(src_path)
+    copied = 0
+    with open(src_path, 'rb') as src:
+        src_fd = src.fileno()
+        if hasattr(os, 'copy_file_range'):
+            try:
+                while copied < size:
+                    count = os.copy_file_range(src_fd, dest_fd, size - copied, copied)
+                    if not count:
+                        break
+                    copied += count
+            except OSError:
+                pass  # e.g. O_APPEND destinations or cross-filesystem on older kernels
+        if copied < size and hasattr(os, 'sendfile'):
+            try:
+                while copied < size:
+                    count = os.sendfile(dest_fd, src_fd, copied, size - copied)
+                    if not count:
+                        break
+                    copied += count
+            except OSError:
+                pass
+        if copied < size:
+            src.seek(copied)
+            while True:
+                block = src.read(1024 * 1024)
+                if not block:
+                    break
+                os.write(dest_fd, block)
+                copied += len(block)
+    return copied
+
+# Async fragment engine: fragments fetched on one event loop over pooled keep-alive
+# connections instead of one thread per concurrent fragment
+FRAGMENT_ENGINES = {"Threads": 'threads', "Async (HTTP/1.1)": 'async', "Async (HTTP/2 if available)": 'async_http2'}
+ASYNC_MAX_REDIRECTS = 5
+# Params the engine does not implement; downloads that set them use the threaded path
+ASYNC_UNSUPPORTED_PARAMS = ('proxy', 'source_address', 'client_certificate')
+# Request headers that only go to the host they were set for, not to a redirect elsewhere
+ASYNC_HOST_HEADERS = ('cookie', 'authorization')
+
+def environment_proxied():
+    """Whether http_proxy/https_proxy/all_proxy (or the system settings) send requests
+    through a proxy, as yt-dlp's own requests would go"""
+    proxies = urllib.request.getproxies()
+    return any(proxies.get(scheme) for scheme in ('http', 'https', 'all')) and proxies.get('no') != '*'
+
+class AsyncFragmentEngine:
+    """Fetches fragments on one asyncio event loop in its own thread. Over HTTP/1.1,
+    requests reuse idle keep-alive connections to the same host and at most `limit`
+    run at once. With http2 and the optional httpx and h2 packages, requests to a
+    host are multiplexed over shared HTTP/2 connections instead. run() schedules a
+    coroutine and returns a concurrent.futures.Future, like an executor's submit()."""
+
+    def __init__(self, limit, timeout=20, verify=True, http2=False):
+        self.limit = limit
+        self.timeout = timeout
+        self.ssl_context = ssl.create_default_context()
+        if not verify:
+            self.ssl_context.check_hostname = False
+            self.ssl_context.verify_mode = ssl.CERT_NONE
+        self.idle = {}  # (scheme, host, port) -> idle (reader, writer) pairs
+        self.connections = 0  # opened so far
+        self.requests = 0
+        self.active = 0
+        self.peak_active = 0
+        self.client = None
+        if http2:
+            import importlib.util
+            try:
+                import httpx
+                # httpx needs the h2 package for HTTP/2
+                if importlib.util.find_spec('h2') is not None:
+                    self.client = httpx.AsyncClient(
+                        http2=True, verify=self.ssl_context, timeout=timeout, follow_redirects=True,
+                        limits=httpx.Limits(max_connections=limit, max_keepalive_connections=limit))
+            except ImportError:
+                pass
+        self.loop = asyncio.new_event_loop()
+        self.semaphore = None
+        self.thread = threading.Thread(target=self.loop.run_forever, name='fragments', daemon=True)
+        self.thread.start()
+
+    @property
+    def protocol(self):
+        return 'HTTP/2' if self.client is not None else 'HTTP/1.1'
+
+    def run(self, coroutine):
+        return asyncio.run_coroutine_threadsafe(coroutine, self.loop)
+
+    async def fetch(self, url, headers, spill_path=None, spill_size=None):
+        """(body, size) for a GET; bodies over spill_size go to spill_path and body is None"""
+        if self.semaphore is None:
+            self.semaphore = asyncio.Semaphore(self.limit)
+        async with self.semaphore:
+            self.requests += 1
+            self.active += 1
+            self.peak_active = max(self.peak_active, self.active)
+            try:
+                sink = FragmentSink(spill_path, spill_size)
+                try:
+                    if self.client is not None:
+                        await self._fetch_http2(url, headers, sink)
+                    else:
+                        await self._fetch_http1(url, headers, sink)
+                except BaseException:
+                    sink.discard()
+                    raise
+                return sink.result()
+            finally:
+                self.active -= 1
+
+    async def _fetch_http2(self, url, headers, sink):
+        # Raw bytes are written as they come, so ask for them unencoded like the HTTP/1.1 path
+        headers = {name: value for name, value in headers.items() if name.lower() != 'accept-encoding'}
+        headers['Accept-Encoding'] = 'identity'
+        async with self.client.stream('GET', url, headers=headers) as response:
+            if response.status_code >= 400:
+                raise OSError(f"HTTP Error {response.status_code}")
+            async for block in response.aiter_raw():
+                sink.write(block)
+
+    async def _fetch_http1(self, url, headers, sink):
+        for _ in range(ASYNC_MAX_REDIRECTS + 1):
+            parts = urllib.parse.urlsplit(url)
+            if parts.scheme not in ('http', 'https') or not parts.hostname:
+                raise OSError(f"Unsupported fragment URL {url}")
+            key = (parts.scheme, parts.hostname, parts.port or (443 if parts.scheme == 'https' else 80))
+            target = (parts.path or '/') + (f'?{parts.query}' if parts.query else '')
+            lines = [f'GET {target} HTTP/1.1', f'Host: {parts.netloc}']
+            lines += [f'{name}: {value}' for name, value in headers.items()
+                      if name.lower() not in ('host', 'connection', 'accept-encoding')]
+            request = '\r\n'.join(lines + ['Accept-Encoding: identity', 'Connection: keep-alive', '', '']).encode()
+
+            reader, writer, status, response_headers = await self._send(key, request)
+            reusable = response_headers.get('connection', '').lower() != 'close'
+            try:
+                if 300 <= status < 400 and response_headers.get('location'):
+                    reusable = await self._read_body(reader, response_headers, None) and reusable
+                    url = urllib.parse.urljoin(url, response_headers['location'])
+                    if urllib.parse.urlsplit(url).hostname != parts.hostname:
+                        headers = {name: value for name, value in headers.items()
+                                   if name.lower() not in ASYNC_HOST_HEADERS}
+                    continue
+                if status >= 400:
+                    reusable = False
+                    raise OSError(f"HTTP Error {status}")
+                reusable = await self._read_body(reader, response_headers, sink) and reusable
+                return
+            except BaseException:
+                reusable = False
+                raise
+            finally:
+                if reusable:
+                    self.idle.setdefault(key, []).append((reader, writer))
+                else:
+                    writer.close()
+        raise OSError(f"Too many redirects for {url}")
+
+    async def _send(self, key, request):
+        """Send a request on an idle connection to the host, or a new one if the idle
+        connection turns out to be closed; returns it with the response status and headers"""
+        while True:
+            pooled = bool(self.idle.get(key))
+            if pooled:
+                reader, writer = self.idle[key].pop()
+            else:
+                reader, writer = await asyncio.wait_for(asyncio.open_connection(
+                    key[1], key[2], ssl=self.ssl_context if key[0] == 'https' else None), self.timeout)
+                self.connections += 1
+            try:
+                writer.write(request)
+                await writer.drain()
+                status_line = await asyncio.wait_for(reader.readline(), self.timeout)
+                if not status_line:
+                    raise ConnectionResetError("Connection closed before the response")
+                status = int(status_line.split(None, 2)[1])
+                response_headers = {}
+                while True:
+                    line = await asyncio.wait_for(reader.readline(), self.timeout)
+                    if line in (b'\r\n', b'\n', b''):
+                        break
+                    name, _, value = line.decode('latin-1').partition(':')
+                    response_headers[name.strip().lower()] = value.strip()
+                return reader, writer, status, response_headers
+            except (ConnectionError, asyncio.IncompleteReadError):
+                writer.close()
+                if not pooled:
+                    raise
+                # The server closed the idle connection; try the next one
+            except BaseException:
+                writer.close()
+                raise
+
+    async def _read_body(self, reader, headers, sink):
+        """Read the body into sink (None: discard); returns whether the connection can be reused"""
+        if headers.get('transfer-encoding', '').lower() == 'chunked':
+            while True:
+                size_line = await asyncio.wait_for(reader.readline(), self.timeout)
+                size = int(size_line.split(b';', 1)[0], 16)
+                if size == 0:
+                    while await asyncio.wait_for(reader.readline(), self.timeout) not in (b'\r\n', b'\n', b''):
+                        pass  # trailers
+                    return True
+                await self._read_exactly(reader, size, sink)
+                await asyncio.wait_for(reader.readexactly(2), self.timeout)
+        if 'content-length' in headers:
+            await self._read_exactly(reader, int(headers['content-length']), sink)
+            return True
+        while True:  # delimited by the server closing the connection
+            block = await asyncio.wait_for(reader.read(SEGMENT_READ_SIZE), self.timeout)
+            if not block:
+                return False
+            if sink is not None:
+                sink.write(block)
+
+    async def _read_exactly(self, reader, size, sink):
+        while size > 0:
+            block = await asyncio.wait_for(reader.read(min(size, SEGMENT_READ_SIZE)), self.timeout)
+            if not block:
+                raise asyncio.IncompleteReadError(b'', size)
+            size -= len(block)
+            if sink is not None:
+                sink.write(block)
+
+    async def _shutdown(self):
+        current = asyncio.current_task()
+        tasks = [task for task in asyncio.all_tasks() if task is not current]
+        for task in tasks:
+            task.cancel()
+        await asyncio.gather(*tasks, return_exceptions=True)
+        for connections in self.idle.values():
+            for _, writer in connections:
+                writer.close()
+        self.idle.clear()
+        if self.client is not None:
+            await self.client.aclose()
+
+    def close(self):
+        """Cancel what is still running, close the connections and stop the loop"""
+        try:
+            self.run(self._shutdown()).result(self.timeout)
+        except Exception:
+            pass
+        self.loop.call_soon_threadsafe(self.loop.stop)
+        self.thread.join(self.timeout)
+        if not self.thread.is_alive():
+            self.loop.close()
+
+class FragmentSink:
+    """Collects a response body in memory, moving it to a spill file once it passes spill_size"""
+
+    def __init__(self, spill_path, spill_size):
+        self.spill_path = spill_path
+        self.spill_size = spill_size
+        self.chunks = []
+        self.size = 0
+        self.spill = None
+
+    def write(self, block):
+        self.size += len(block)
+        if self.spill is None and self.spill_path and self.size > self.spill_size:
+            self.spill = open(self.spill_path, 'wb')
+            self.spill.writelines(self.chunks)
+            self.chunks = []
+        if self.spill is not None:
+            self.spill.write(block)
+        else:
+            self.chunks.append(block)
+
+    def result(self):
+        if self.spill is not None:
+            self.spill.close()
+            return None, self.size
+        return b''.join(self.chunks), self.size
+
+    def discard(self):
+        if self.spill is not None:
+            self.spill.close()
+            self.spill = None
+
+# Output checksums (settings combo label -> algorithm recorded in the manifest)
+CHECKSUM_ALGORITHMS = {"Off": '', "SHA-256": 'sha256', "xxHash": 'xxh3_128'}
+CHECKSUM_READ_SIZE = 1024 * 1024
+MANIFEST_NAME = 'manifest-{}.json'  # written to the output folder once per batch
+
+class OutputChecksum:
+    """Checksum of a file fed in file order while it is written. xxHash needs the
+    optional xxhash package; without it SHA-256 is used and recorded instead."""
+
+    def __init__(self, algorithm):
+        self.algorithm = 'sha256'
+        self._hash = None
+        if algorithm == 'xxh3_128':
+            try:
+                import xxhash
+                self._hash = xxhash.xxh3_128()
+                self.algorithm = algorithm
+            except ImportError:
+                pass
+        if self._hash is None:
+            self._hash = hashlib.sha256()
+        self.size = 0
+
+    def update(self, data):
+        self._hash.update(data)
+        self.size += len(data)
+
+    def update_from(self, f, end):
+        """Read the file from what has been hashed so far up to end. Only used for bytes
+        written moments ago, which are still in the page cache."""
+        f.seek(self.size)
+        while self.size < end:
+            block = f.read(min(CHECKSUM_READ_SIZE, end - self.size))
+            if not block:
+                raise OSError(f"{getattr(f, 'name', 'file')} ended at byte {self.size}, expected {end}")
+            self.update(block)
+
+    def update_file(self, path):
+        """Append a whole file's bytes"""
+        with open(path, 'rb') as f:
+            for block in iter(lambda: f.read(CHECKSUM_READ_SIZE), b''):
+                self.update(block)
+
+    def hexdigest(self):
+        return self._hash.hexdigest()
+
+    @classmethod
+    def of_file(cls, path, algorithm):
+        checksum = cls(algorithm)
+        checksum.update_file(path)
+        return checksum
+
+# Subtitles and thumbnails are fetched on a side lane with its own small connection
+# budget, in parallel with the media instead of before it
+SIDE_LANE_CONNECTIONS = 2
+SIDE_LANE_TIMEOUT = 120  # seconds to wait for side files once the media is done
+# Postprocessors that need the side files before the media is finalised
+SIDE_LANE_EMBEDDERS = ('EmbedThumbnail', 'FFmpegEmbedSubtitle')
+# Params not passed on to the side lane's YoutubeDL
+SIDE_LANE_DROPPED_PARAMS = ('logger', 'progress_hooks', 'postprocessor_hooks', 'finished_media_hooks',
+                            'postprocessors', 'side_lane_connections')
+
+_yt_dlp_extensions = None
+
+def yt_dlp_extensions():
+    """App downloaders and the YoutubeDL subclass that selects them. Built on first
+    use because they subclass yt-dlp classes, which are imported lazily."""
+    global _yt_dlp_extensions
+    if _yt_dlp_extensions is not None:
+        return _yt_dlp_extensions
+
+    yt_dlp = load_yt_dlp()
+    from yt_dlp.downloader import get_suitable_downloader
+    from yt_dlp.downloader.common import FileDownloader
+    from yt_dlp.downloader.dash import DashSegmentsFD
+    from yt_dlp.downloader.hls import HlsFD
+    from yt_dlp.downloader.http import HttpFD
+    from yt_dlp.networking import Request
+    from yt_dlp.networking.exceptions import IncompleteRead
+    from yt_dlp.postprocessor.common import PostProcessor
+    from yt_dlp.postprocessor.ffmpeg import FFmpegExtractAudioPP, FFmpegPostProcessor
+    from yt_dlp.utils import ContentTooShortError, int_or_none, parse_http_range, replace_extension
+
+    class SegmentedHttpFD(FileDownloader):
+        """yt-dlp downloader for http(s) formats that uses SegmentedDownload"""
+
+        @staticmethod
+        def can_download(info_dict, params, name):
+            return (name != '-'
+                    and info_dict.get('protocol') in ('http', 'https')
+                    and not info_dict.get('section_start') and not info_dict.get('section_end')
+                    and not info_dict.get('impersonate')
+                    and not params.get('ratelimit')  # the limiter is per connection
+                    and params.get('segmented_connections', 1) > 1)
+
+        def _probe_size(self, url, headers):
+            """Total size if the server honours range requests, else None"""
+            response = self.ydl.urlopen(Request(url, headers={**headers, 'Range': 'bytes=0-0'}))
+            try:
+                if response.status != 206:
+                    return None
+                _, _, total = parse_http_range(response.headers.get('Content-Range'))
+                return total
+            finally:
+                response.close()
+
+        def real_download(self, filename, info_dict):
+            url = info_dict['url']
+            headers = dict(info_dict.get('http_headers') or {})
+            tmpfilename = self.temp_name(filename)
+            connections = self.params.get('segmented_connections', 8)
+
+            total = self._probe_size(url, headers)
+            if not total or total < 2 * SEGMENT_MIN_SIZE:
+                # No range support or not worth splitting: use the regular downloader
+                fallback = HttpFD(self.ydl, self.params)
+                for hook in self._progress_hooks:
+                    fallback.add_progress_hook(hook)
+                self.ydl.follow_checksum(fallback)
+                return fallback.real_download(filename, info_dict)
+
+            self.report_destination(filename)
+            start = time.time()
+
+            def open_range(first, last):
+                return self.ydl.urlopen(Request(url, headers={**headers, 'Range': f'bytes={first}-{last}'}))
+
+            def progress(downloaded):
+                elapsed = time.time() - start
+                speed = (downloaded - download.resumed_bytes) / elapsed if elapsed > 0 else None
+                self._hook_progress({
+                    'status': 'downloading',
+                    'downloaded_bytes': downloaded,
+                    'total_bytes': total,
+                    'filename': filename,
+                    'tmpfilename': tmpfilename,
+                    'elapsed': elapsed,
+                    'speed': speed,
+                    'eta': int((total - downloaded) / speed) if speed else None,
+                }, info_dict)
+
+            identity = [info_dict.get('id'), info_dict.get('format_id'), total]
+            checksum = self.ydl.start_checksum()
+            download = SegmentedDownload(open_range, tmpfilename, total, connections, identity,
+                                         progress=progress, checksum=checksum)
+            if not download.run():
+                return False
+
+            self.try_rename(tmpfilename, filename)
+            if checksum is not None:
+                self.ydl.record_checksum(filename, checksum)
+            self._hook_progress({
+                'status': 'finished',
+                'downloaded_bytes': total,
+                'total_bytes': total,
+                'filename': filename,
+                'elapsed': time.time() - start,
+            }, info_dict)
+            return True
+
+    class PipeTranscodeError(Exception):
+        pass
+
+    class PipeTranscodeFD(FileDownloader):
+        """Feeds an http(s) audio stream into ffmpeg as it arrives, so the conversion runs
+        alongside the transfer and the source file is never written. Raises
+        PipeTranscodeError when ffmpeg cannot read the stream and ContentTooShortError
+        when the stream ends before its Content-Length or filesize."""
+
+        @staticmethod
+        def target_codec(info_dict, params, name):
+            """Codec to encode to, or None when the item takes the download-then-convert path"""
+            codec = params.get('pipe_transcode')
+            if (codec not in PIPE_TRANSCODE_MUXERS or name == '-'
+                    or info_dict.get('requested_formats')
+                    or info_dict.get('protocol') not in ('http', 'https')
+                    or info_dict.get('section_start') or info_dict.get('section_end')
+                    or info_dict.get('impersonate')):
+                return None
+            # DASH audio (m4a_dash) carries its index up front, other ISO files may not
+            if (info_dict.get('ext') in SEEKABLE_CONTAINERS
+                    and not (info_dict.get('container') or '').endswith('_dash')):
+                return None
+            return codec
+
+        def real_download(self, filename, info_dict):
+            url = info_dict['url']
+            headers = dict(info_dict.get('http_headers') or {})
+            tmpfilename = self.temp_name(filename)
+            codec = self.params['pipe_transcode']
+            args = self.params.get('postprocessor_args') or []
+            if isinstance(args, dict):
+                args = args.get('default', [])
+
+            self.report_destination(filename)
+            start = time.time()
+            response = self.ydl.urlopen(Request(url, headers=headers))
+            total = int_or_none(response.headers.get('Content-Length')) or info_dict.get('filesize')
+            ffmpeg = subprocess.Popen(
+                [FFmpegPostProcessor(self.ydl).executable, '-y', '-loglevel', 'error', '-i', 'pipe:0',
+                 *args, '-f', PIPE_TRANSCODE_MUXERS[codec], tmpfilename],
+                stdin=subprocess.PIPE, stdout=subprocess.DEVNULL, stderr=subprocess.PIPE)
+            # Read ffmpeg's messages as they come so a chatty failure cannot block it
+            messages = collections.deque(maxlen=20)
+            reader = threading.Thread(target=lambda: messages.extend(ffmpeg.stderr), daemon=True)
+            reader.start()
+
+            downloaded = 0
+            try:
+                try:
+                    while True:
+                        try:
+                            block = response.read(SEGMENT_READ_SIZE)
+                        except IncompleteRead:
+                            break  # checked against the expected size below
+                        if not block:
+                            break
+                        ffmpeg.stdin.write(block)
+                        downloaded += len(block)
+                        elapsed = time.time() - start
+                        speed = downloaded / elapsed if elapsed > 0 else None
+                        status = {
+                            'status': 'downloading',
+                            'downloaded_bytes': downloaded,
+                            'filename': filename,
+                            'tmpfilename': tmpfilename,
+                            'elapsed': elapsed,
+                            'speed': speed,
+                            'eta': int((total - downloaded) / speed) if speed and total else None,
+                        }
+                        if total:
+                            status['total_bytes'] = total
+                        self._hook_progress(status, info_dict)
+                        self.slow_down(start, None, downloaded)
+                    ffmpeg.stdin.close()
+                except BrokenPipeError:
+                    pass  # ffmpeg gave up on the input; its exit status says why
+                ffmpeg.wait()
+                reader.join(5)
+            finally:
+                response.close()
+                if ffmpeg.poll() is None:  # cancelled or a network error mid-stream
+                    ffmpeg.kill()
+                    ffmpeg.wait()
+                if ffmpeg.returncode and os.path.exists(tmpfilename):
+                    os.remove(tmpfilename)
+            if total and downloaded < total:
+                # ffmpeg ends cleanly on a cut-off stream, so the output would just be shorter
+                if os.path.exists(tmpfilename):
+                    os.remove(tmpfilename)
+                raise ContentTooShortError(downloaded, total)
+            if ffmpeg.returncode:
+                detail = b''.join(messages).decode('utf-8', 'replace').strip().splitlines()
+                raise PipeTranscodeError(detail[-1] if detail else f'ffmpeg exited with {ffmpeg.returncode}')
+
+            self.try_rename(tmpfilename, filename)
+            self._hook_progress({
+                'status': 'finished',
+                'downloaded_bytes': downloaded,
+                'total_bytes': downloaded,
+                'filename': filename,
+                'elapsed': time.time() - start,
+            }, info_dict)
+            return True
+
+    class FragmentResumeMixin:
+        """Resume for FragmentFD subclasses from a FragmentMap rather than the bare fragment
+        index in yt-dlp's .ytdl file: the .part file is cut back to the fragments the map
+        confirms, and fragments that finished in their own files are not fetched again."""
+
+        def _prepare_and_start_frag_download(self, ctx, info_dict):
+            if (not ctx.get('live') and ctx['filename'] != '-' and self.params.get('continuedl', True)
+                    and not self.params.get('_no_ytdl_file')):
+                # Signed query strings change between runs, the manifest path and format do not
+                manifest = urllib.parse.urlsplit(info_dict.get('fragment_base_url') or info_dict.get('url') or '')
+                identity = [info_dict.get('id'), info_dict.get('format_id'),
+                            manifest._replace(query='', fragment='').geturl(), ctx.get('total_frags')]
+                fragment_map = FragmentMap(self.temp_name(ctx['filename']), identity)
+                index, _ = fragment_map.load()
+                # yt-dlp skips fragments up to the index in the .ytdl file; make it agree with the map
+                self._write_ytdl_file({'filename': ctx['filename'], 'fragment_index': index})
+                ctx['fragment_map'] = fragment_map
+            return super()._prepare_and_start_frag_download(ctx, info_dict)
+
+        def _download_fragment(self, ctx, frag_url, info_dict, headers=None, request_data=None):
+            fragment_map = ctx.get('fragment_map')
+            if fragment_map is None:
+                return super()._download_fragment(ctx, frag_url, info_dict, headers, request_data)
+            parked = fragment_map.parked_file(ctx['fragment_index'])
+            if parked:
+                ctx['fragment_filename_sanitized'] = parked
+                return True
+            if not super()._download_fragment(ctx, frag_url, info_dict, headers, request_data):
+                return False
+            fragment_map.park(ctx['fragment_index'], ctx['fragment_filename_sanitized'])
+            return True
+
+        def _append_fragment(self, ctx, frag_content):
+            super()._append_fragment(ctx, frag_content)
+            if ctx.get('fragment_map') is not None:
+                ctx['fragment_map'].append(ctx['fragment_index'], len(frag_content))
+
+        def _finish_frag_download(self, ctx, info_dict):
+            result = super()._finish_frag_download(ctx, info_dict)
+            if ctx.get('fragment_map') is not None:
+                ctx['fragment_map'].remove()
+            return result
+
+    class StreamingAssemblyMixin:
+        """Fragment downloading for FragmentFD subclasses that keeps fragments in memory
+        and appends each one to the .part file as soon as it is next in order, instead of
+        writing every fragment to its own file and reading it back."""
+
+        def _fetch_fragment(self, ctx, fragment, info_dict, allow_spill):
+            """Returns (bytes, None), (None, spill path) or (None, None) if unavailable"""
+            headers = dict(info_dict.get('http_headers') or {})
+            byte_range = fragment.get('byte_range')
+            if byte_range:
+                headers['Range'] = 'bytes=%d-%d' % (byte_range['start'], byte_range['end'] - 1)
+            retries = self.params.get('fragment_retries', 10)
+            spill_path = '%s-Frag%d.spill' % (ctx['tmpfilename'], fragment['frag_index'])
+            fragment_map = ctx.get('fragment_map')
+            if allow_spill and fragment_map is not None:
+                parked = fragment_map.parked_file(fragment['frag_index'])
+                if parked:
+                    return None, parked  # spooled completely before the last run stopped
+
+            for attempt in range(retries + 1):
+                chunks, size, spill = [], 0, None
+                try:
+                    response = self.ydl.urlopen(Request(
+                        fragment['url'], data=info_dict.get('request_data'), headers=headers))
+                    try:
+                        while True:
+                            block = response.read(SEGMENT_READ_SIZE)
+                            if not block:
+                                break
+                            size += len(block)
+                            if spill is None and allow_spill and size > STREAMING_SPILL_SIZE:
+                                spill = open(spill_path, 'wb')
+                                spill.writelines(chunks)
+                                chunks = []
+                            if spill is not None:
+                                spill.write(block)
+                            else:
+                                chunks.append(block)
+                    finally:
+                        response.close()
+                        if spill is not None:
+                            spill.close()
+                except Exception as err:
+                    if attempt >= retries:
+                        return None, None
+                    self.report_retry(err, attempt + 1, retries, fragment['frag_index'], fatal=False)
+                    time.sleep(min(2 ** attempt, 30) * 0.1)
+                    continue
+                return self._fragment_fetched(ctx, fragment, size, None if spill is not None else b''.join(chunks),
+                                              spill_path)
+            return None, None
+
+        def _fragment_fetched(self, ctx, fragment, size, content, spill_path):
+            """Count a fetched fragment; content None means it was spooled to spill_path"""
+            with self._assembly_lock:
+                ctx['assembly_fetched'] += size
+                if content is None:
+                    ctx['assembly_written'] += size
+            if content is None:
+                if ctx.get('fragment_map') is not None:
+                    ctx['fragment_map'].park(fragment['frag_index'], spill_path)
+                return None, spill_path
+            return content, None
+
+        def _async_engine(self, ctx, info_dict):
+            """AsyncFragmentEngine for this download, or None for the thread pool"""
+            engine = self.params.get('fragment_engine')
+            if (engine not in ('async', 'async_http2') or info_dict.get('request_data')
+                    or info_dict.get('impersonate') or any(self.params.get(name) for name in ASYNC_UNSUPPORTED_PARAMS)
+                    or environment_proxied()):
+                return None
+            limit = max(1, math.ceil(self.params.get('async_fragment_requests', ASYNC_FRAGMENT_REQUESTS)
+                                     / ctx.get('max_progress', 1)))
+            return AsyncFragmentEngine(limit, self.params.get('socket_timeout') or 20,
+                                       not self.params.get('nocheckcertificate'), engine == 'async_http2')
+
+        async def _fetch_fragment_async(self, engine, ctx, fragment, info_dict, allow_spill):
+            """_fetch_fragment as a coroutine on the engine's event loop"""
+            headers = dict(self.ydl.params.get('http_headers') or {})
+            headers.update(info_dict.get('http_headers') or {})
+            byte_range = fragment.get('byte_range')
+            if byte_range:
+                headers['Range'] = 'bytes=%d-%d' % (byte_range['start'], byte_range['end'] - 1)
+            cookies = self.ydl.cookiejar.get_cookie_header(fragment['url'])
+            if cookies:
+                headers['Cookie'] = cookies
+            retries = self.params.get('fragment_retries', 10)
+            spill_path = '%s-Frag%d.spill' % (ctx['tmpfilename'], fragment['frag_index'])
+            if allow_spill and ctx.get('fragment_map') is not None:
+                parked = ctx['fragment_map'].parked_file(fragment['frag_index'])
+                if parked:
+                    return None, parked
+
+            for attempt in range(retries + 1):
+                try:
+                    content, size = await engine.fetch(
+                        fragment['url'], headers, spill_path if allow_spill else None, STREAMING_SPILL_SIZE)
+                except Exception as err:
+                    if attempt >= retries:
+                        return None, None
+                    self.report_retry(err, attempt + 1, retries, fragment['frag_index'], fatal=False)
+                    await asyncio.sleep(min(2 ** attempt, 30) * 0.1)
+                    continue
+                return self._fragment_fetched(ctx, fragment, size, content, spill_path)
+            return None, None
+
+        def _report_streaming_progress(self, ctx, info_dict, appended):
+            elapsed = time.time() - ctx['started']
+            fetched = ctx['assembly_fetched']
+            speed = fetched / elapsed if elapsed > 0 else None
+            state = {
+                'status': 'downloading',
+                'downloaded_bytes': ctx['complete_frags_downloaded_bytes'],
+                'fragment_index': ctx['fragment_index'],
+                'fragment_count': ctx.get('total_frags'),
+                'filename': ctx['filename'],
+                'tmpfilename': ctx['tmpfilename'],
+                'elapsed': elapsed,
+                'speed': speed,
+                'max_progress': ctx.get('max_progress'),
+                'progress_idx': ctx.get('progress_idx'),
+                'assembly_fetched': fetched,
+                'assembly_written': ctx['assembly_written'],
+            }
+            if ctx.get('total_frags') and appended:
+                estimate = ctx['complete_frags_downloaded_bytes'] / appended * ctx['total_frags']
+                state['total_bytes_estimate'] = estimate
+                if speed:
+                    state['eta'] = int(max(estimate - ctx['complete_frags_downloaded_bytes'], 0) / speed)
+            self._hook_progress(state, info_dict)
+
+        def download_and_append_fragments(
+                self, ctx, fragments, info_dict, *, is_fatal=(lambda idx: False),
+                pack_func=None, finish_func=None, tpe=None, interrupt_trigger=(True, )):
+            if not self.params.get('skip_unavailable_fragments', True):
+                is_fatal = lambda _: True
+
+            decrypt_fragment = self.decrypter(info_dict)
+            max_workers = max(1, math.ceil(
+                self.params.get('concurrent_fragment_downloads', 1) / ctx.get('max_progress', 1)))
+            window = max_workers * STREAMING_WINDOW_FACTOR
+            self._assembly_lock = threading.Lock()
+            ctx.setdefault('assembly_fetched', 0)
+            ctx.setdefault('assembly_written', 0)
+            ctx['started'] = ctx.get('started') or time.time()
+            keep_ytdl_file = (not ctx['live'] and ctx['tmpfilename'] != '-'
+                              and not self.params.get('_no_ytdl_file'))
+            dest = ctx['dest_stream']
+            fragment_map = ctx.get('fragment_map')
+            checksum = self.ydl.start_checksum() if ctx['tmpfilename'] != '-' else None
+            if checksum is not None and dest.tell():
+                with open(ctx['tmpfilename'], 'rb') as f:  # resumed .part file
+                    checksum.update_from(f, dest.tell())
+
+            def allow_spill(fragment):
+                # Encrypted or repacked fragments have to be in memory anyway
+                return pack_func is None and not fragment.get('decrypt_info')
+
+            # One event loop with hundreds of requests in flight, or a thread per fragment
+            engine = self._async_engine(ctx, info_dict)
+            if engine is not None:
+                window += engine.limit
+                executor = None
+
+                def start(fragment):
+                    return engine.run(self._fetch_fragment_async(engine, ctx, fragment, info_dict, allow_spill(fragment)))
+            else:
+                executor = concurrent.futures.ThreadPoolExecutor(max_workers)
+
+                def start(fragment):
+                    return executor.submit(self._fetch_fragment, ctx, fragment, info_dict, allow_spill(fragment))
+
+            in_flight = collections.deque()
+            fragment_iter = iter(fragments)
+            appended = 0
+            try:
+                while True:
+                    # Keep at most `window` fragments downloading or waiting for their turn
+                    while len(in_flight) < window and interrupt_trigger[0]:
+                        fragment = next(fragment_iter, None)
+                        if fragment is None:
+                            break
+                        in_flight.append((fragment, start(fragment)))
+                    if not in_flight:
+                        break
+
+                    fragment, future = in_flight.popleft()
+                    frag_index = fragment['frag_index']
+                    content, spill_path = future.result()
+                    if content is None and spill_path is None:
+                        if is_fatal(fragment.get('index') or (frag_index - 1)):
+                            dest.close()
+                            self.report_error(f'fragment {frag_index} not found, unable to continue')
+                            return False
+                        self.report_skip_fragment(frag_index, 'fragment not found')
+                        continue
+
+                    if spill_path is not None:
+                        if checksum is not None:
+                            checksum.update_file(spill_path)
+                        size = append_file(dest, spill_path)
+                        self.try_remove(spill_path)
+                    else:
+                        content = decrypt_fragment(fragment, content)
+                        if pack_func is not None:
+                            content = pack_func(content, frag_index)
+                        dest.write(content)
+                        if checksum is not None:
+                            checksum.update(content)
+                        size = len(content)
+                    dest.flush()
+                    if fragment_map is not None:
+                        fragment_map.append(frag_index, size)
+                    appended += 1
+                    with self._assembly_lock:
+                        ctx['assembly_written'] += size
+                    ctx['complete_frags_downloaded_bytes'] += size
+                    ctx['fragment_index'] = frag_index
+                    if keep_ytdl_file:
+                        self._write_ytdl_file(ctx)
+                    self._report_streaming_progress(ctx, info_dict, appended)
+            finally:
+                if engine is not None:
+                    engine.close()
+                else:
+                    executor.shutdown(wait=False, cancel_futures=True)
+
+            if finish_func is not None:
+                content = finish_func()
+                dest.write(content)
+                dest.flush()
+                if checksum is not None:
+                    checksum.update(content)
+            result = self._finish_frag_download(ctx, info_dict)
+            if result and checksum is not None:
+                self.ydl.record_checksum(ctx['filename'], checksum)
+            return result
+
+    class StreamingHlsFD(StreamingAssemblyMixin, FragmentResumeMixin, HlsFD):
+        pass
+
+    class StreamingDashFD(StreamingAssemblyMixin, FragmentResumeMixin, DashSegmentsFD):
+        pass
+
+    class ResumableHlsFD(FragmentResumeMixin, HlsFD):
+        pass
+
+    class ResumableDashFD(FragmentResumeMixin, DashSegmentsFD):
+        pass
+
+    STREAMING_DOWNLOADERS = {HlsFD: StreamingHlsFD, DashSegmentsFD: StreamingDashFD}
+    RESUMABLE_DOWNLOADERS = {HlsFD: ResumableHlsFD, DashSegmentsFD: ResumableDashFD}
+
+    class FanOutPP(PostProcessor):
+        """Encodes every requested audio output from the one downloaded file, running
+        the FFmpeg conversions side by side. Runs ahead of FFmpegExtractAudio, which is
+        skipped for items it handled. For audio downloads the main output takes the
+        item's place and the source is deleted; a video stays as the main output."""
+
+        def __init__(self, downloader, codecs, main_codec=None, workers=1):
+            super().__init__(downloader)
+            self.codecs = list(codecs)
+            self.main_codec = main_codec
+            self.workers = max(1, workers)
+
+        def convert(self, source, codec):
+            output = replace_extension(source, codec)
+            self.to_screen(f'Encoding {codec} to "{output}"')
+            # One instance per conversion; run_ffmpeg is not shared between threads
+            FFmpegPostProcessor(self._downloader).run_ffmpeg(source, output, audio_output_args(codec))
+            return output
+
+        def run(self, info):
+            source = info['filepath']
+            codecs = [codec for codec in self.codecs if replace_extension(source, codec) != source]
+            with concurrent.futures.ThreadPoolExecutor(min(len(codecs), self.workers) or 1) as pool:
+                outputs = dict(zip(codecs, pool.map(lambda codec: self.convert(source, codec), codecs)))
+            outputs.update({codec: source for codec in self.codecs if codec not in outputs})
+            info['__fanout_outputs'] = outputs
+            info['__fanout_extras'] = [outputs[codec] for codec in self.codecs if codec != self.main_codec]
+            for path in info['__fanout_extras']:
+                info['__files_to_move'].setdefault(path, '')  # moved next to the item
+            if not self.main_codec:
+                return [], info
+            info['filepath'] = outputs[self.main_codec]
+            info['ext'] = self.main_codec
+            return ([] if source in outputs.values() else [source]), info
+
+    class AppYoutubeDL(yt_dlp.YoutubeDL):
+        """YoutubeDL that swaps in the app's downloaders when their options are set"""
+
+        def __init__(self, params=None, *args, **kwargs):
+            super().__init__(params, *args, **kwargs)
+            self._side_lane = None
+            self._side_ydl = None
+            self._side_jobs = []
+            self.side_log = YdlErrorCollector()
+            self._ranking_duration = None
+            self._ffmpeg_available = None
+            self._checksums = {}  # (device, inode) -> (size, mtime, OutputChecksum) per downloaded file
+            self.format_choices = []  # (default format, ranked format, default bytes, ranked bytes)
+            self._evaluating_default = False
+            self.request_count = 0  # HTTP requests made, for playlist sync stats
+            if self.params.get('output_targets'):
+                targets = self.params['output_targets']
+                fan_out = FanOutPP(self, targets['codecs'], targets.get('main'), self.params.get('transcode_workers', 1))
+                self._pps['post_process'].insert(0, fan_out)
+
+        def urlopen(self, req):
+            self.request_count += 1
+            return super().urlopen(req)
+
+        def _app_downloader(self, name, info):
+            info['protocol'] = info.get('protocol') or yt_dlp.utils.determine_protocol(info)
+            if SegmentedHttpFD.can_download(info, self.params, name):
+                return SegmentedHttpFD
+            if name == '-':
+                return None
+            fd_class = get_suitable_downloader(info, self.params)
+            if self.params.get('streaming_assembly') and fd_class in STREAMING_DOWNLOADERS:
+                return STREAMING_DOWNLOADERS[fd_class]
+            if fd_class in RESUMABLE_DOWNLOADERS:
+                return RESUMABLE_DOWNLOADERS[fd_class]
+            if self.params.get('checksum_algorithm') and fd_class is HttpFD:
+                return HttpFD  # run here so the checksum can follow it
+            return None
+
+        def _pipe_transcode(self, name, info):
+            """Download and convert in one pass; None when the regular path should run"""
+            codec = PipeTranscodeFD.target_codec(info, self.params, name)
+            if codec is None:
+                return None
+            if self._ffmpeg_available is None:
+                self._ffmpeg_available = FFmpegPostProcessor(self).available
+            if not self._ffmpeg_available:
+                return None
+
+            output = replace_extension(name, codec, info.get('ext'))
+            fd = PipeTranscodeFD(self, self.params)
+            for hook in self._progress_hooks:
+                fd.add_progress_hook(hook)
+            new_info = self._copy_infodict(info)
+            if new_info.get('http_headers') is None:
+                new_info['http_headers'] = self._calc_headers(new_info)
+            try:
+                result = fd.download(output, new_info)
+            except PipeTranscodeError as e:
+                self.report_warning(f"Could not convert while downloading ({e}); downloading first instead")
+                return None
+            except ContentTooShortError as e:
+                # The regular downloader retries and resumes a cut-off transfer
+                self.report_warning(f"Stream ended after {e.downloaded} of {e.expected} bytes while converting; "
+                                    "downloading first instead")
+                return None
+            # The m4a_dash fixup must not remux the converted file
+            info['ext'] = codec
+            info.pop('container', None)
+            info['__pipe_output'] = output
+            return result
+
+        def dl(self, name, info, subtitle=False, test=False):
+            if not (test or subtitle) and self.params.get('pipe_transcode'):
+                result = self._pipe_transcode(name, info)
+                if result is not None:
+                    return result
+            fd_class = None if (test or subtitle) else self._app_downloader(name, info)
+            if fd_class is None:
+                return super().dl(name, info, subtitle, test)
+
+            fd = fd_class(self, self.params)
+            for hook in self._progress_hooks:
+                fd.add_progress_hook(hook)
+            if fd_class is HttpFD:
+                self.follow_checksum(fd)
+            new_info = self._copy_infodict(info)
+            if new_info.get('http_headers') is None:
+                new_info['http_headers'] = self._calc_headers(new_info)
+            return fd.download(name, new_info, subtitle)
+
+        def start_checksum(self):
+            """OutputChecksum for a downloader that writes its file in order, or None"""
+            algorithm = self.params.get('checksum_algorithm')
+            return OutputChecksum(algorithm) if algorithm else None
+
+        def record_checksum(self, path, checksum):
+            """Keep a checksum computed while path was written, for when it becomes the final file"""
+            st = os.stat(path)
+            self._checksums[(st.st_dev, st.st_ino)] = (st.st_size, st.st_mtime_ns, checksum)
+
+        def follow_checksum(self, fd):
+            """Hash what yt-dlp's HttpFD writes from its progress reports, reading each
+            block back just after it was written. HttpFD only appends, except when a resume
+            is refused and it starts the file over, which shows as the count going down."""
+            checksum = self.start_checksum()
+            if checksum is None:
+                return
+            state = {'checksum': checksum, 'reader': None}
+
+            def hook(d):
+                if d['status'] == 'downloading' and d.get('tmpfilename') and d.get('downloaded_bytes') is not None:
+                    if d['downloaded_bytes'] < state['checksum'].size:
+                        state['checksum'] = self.start_checksum()
+                    if state['reader'] is None:
+                        state['reader'] = open(d['tmpfilename'], 'rb')
+                    visible = os.fstat(state['reader'].fileno()).st_size  # the writer buffers a little
+                    state['checksum'].update_from(state['reader'], min(d['downloaded_bytes'], visible))
+                elif d['status'] == 'finished':
+                    if state['reader'] is not None:
+                        state['reader'].close()
+                        state['reader'] = None
+                    with open(d['filename'], 'rb') as f:
+                        state['checksum'].update_from(f, os.fstat(f.fileno()).st_size)
+                    self.record_checksum(d['filename'], state['checksum'])
+            fd.add_progress_hook(hook)
+
+        def final_checksum(self, path):
+            """(OutputChecksum, hashed while writing) for a finished file. Downloads that
+            post-processing left alone (moved, not rewritten) reuse the checksum from the
+            write; merged or converted files are hashed right after FFmpeg wrote them."""
+            st = os.stat(path)
+            size, mtime, checksum = self._checksums.pop((st.st_dev, st.st_ino), (None, None, None))
+            if checksum is not None and size == checksum.size == st.st_size and mtime == st.st_mtime_ns:
+                return checksum, True
+            return OutputChecksum.of_file(path, self.params['checksum_algorithm']), False
+
+        def _side_lane_submit(self, write, *args):
+            """Run a subtitle/thumbnail write on the side lane. Its files are moved to their
+            final names there, since the media may be finalised before they arrive."""
+            if self._side_lane is None:
+                params = {key: value for key, value in self.params.items() if key not in SIDE_LANE_DROPPED_PARAMS}
+                params.update({'logger': self.side_log, 'ignoreerrors': True, 'concurrent_fragment_downloads': 1})
+                self._side_ydl = yt_dlp.YoutubeDL(params)
+                self._side_lane = concurrent.futures.ThreadPoolExecutor(
+                    self.params['side_lane_connections'], thread_name_prefix='side-lane')
+
+            def run():
+                for path, final in getattr(self._side_ydl, write)(*args) or []:
+                    if os.path.abspath(path) != os.path.abspath(final) and os.path.exists(path):
+                        os.makedirs(os.path.dirname(final) or '.', exist_ok=True)
+                        shutil.move(path, final)
+            self._side_jobs.append(self._side_lane.submit(run))
+
+        def _write_subtitles(self, info_dict, filename):
+            if not self.params.get('side_lane_connections'):
+                return super()._write_subtitles(info_dict, filename)
+            self._side_lane_submit('_write_subtitles', dict(info_dict), filename)
+            return []
+
+        def _write_thumbnails(self, label, info_dict, filename, thumb_filename_base=None):
+            if not self.params.get('side_lane_connections') or label != 'video':
+                return super()._write_thumbnails(label, info_dict, filename, thumb_filename_base)
+            self._side_lane_submit('_write_thumbnails', label, dict(info_dict), filename, thumb_filename_base)
+            return []
+
+        def finish_side_lane(self, timeout=None):
+            """Wait for the side lane; returns its error and warning messages"""
+            if self._side_lane is None:
+                return []
+            done, not_done = concurrent.futures.wait(self._side_jobs, timeout)
+            messages = self.side_log.errors + self.side_log.warnings
+            messages += [str(future.exception()) for future in done if future.exception()]
+            if not_done:
+                messages.append(f"{len(not_done)} subtitle/thumbnail download(s) did not finish in time")
+            return messages
+
+        def close(self):
+            if self._side_lane is not None:
+                self._side_lane.shutdown(wait=False, cancel_futures=True)
+                self._side_ydl.close()
+            super().close()
+
+        def _default_format_spec(self, *args, **kwargs):
+            # Without FFmpeg it compares two specs through _select_formats; those are not the selection
+            self._evaluating_default = True
+            try:
+                return super()._default_format_spec(*args, **kwargs)
+            finally:
+                self._evaluating_default = False
+
+        def _select_formats(self, formats, selector):
+            selected = super()._select_formats(formats, selector)
+            ranking = self.params.get('format_ranking')
+            if not ranking or not formats or self._evaluating_default:
+                return selected
+            duration = next((f.get('duration') for f in formats if f.get('duration')), None)
+            duration = duration or self._ranking_duration
+            spec = rank_formats(formats, duration, ranking)
+            if spec is None:
+                return selected
+            ranked = super()._select_formats(formats, self.build_format_selector(spec)) or selected
+            # Bytes against what the configured format string would have downloaded
+            if selected and ranked:
+                default_bytes = sum(format_bytes(f, duration) or 0
+                                    for f in selected[-1].get('requested_formats') or selected[-1:])
+                ranked_bytes = sum(format_bytes(f, duration) or 0
+                                   for f in ranked[-1].get('requested_formats') or ranked[-1:])
+                if default_bytes and ranked_bytes:
+                    self.format_choices.append((selected[-1]['format_id'], ranked[-1]['format_id'],
+                                                int(default_bytes), int(ranked_bytes)))
+            return ranked
+
+        def extract_info(self, url, download=True, ie_key=None, extra_info=None, process=True,
+                         force_generic_extractor=False):
+            # The extractor index narrows yt-dlp's scan over every extractor to a few candidates
+            if not ie_key and not force_generic_extractor and isinstance(url, str):
+                ie = extractor_index().match(url, self._ies)
+                if ie is not None:
+                    ie_key = ie.ie_key()
+            return super().extract_info(url, download, ie_key, extra_info, process, force_generic_extractor)
+
+        def process_video_result(self, info_dict, *args, **kwargs):
+            # Format dicts do not carry the duration needed for bitrate-based estimates
+            self._ranking_duration = info_dict.get('duration')
+            return super().process_video_result(info_dict, *args, **kwargs)
+
+        def run_pp(self, pp, infodict):
+            if ((infodict.get('__pipe_output') or infodict.get('__fanout_outputs'))
+                    and isinstance(pp, FFmpegExtractAudioPP)):
+                return infodict  # already converted while downloading, or by FanOutPP
+            return super().run_pp(pp, infodict)
+
+        def post_process(self, filename, info, files_to_move=None):
+            # yt-dlp passes the source file name; a piped conversion wrote the target instead
+            filename = info.get('__pipe_output', filename)
+            info = super().post_process(filename, info, files_to_move)
+            if info.get('__fanout_extras'):
+                # FanOutPP outputs other than the item's own file, now moved next to it
+                directory = os.path.dirname(info['filepath'])
+                info['__extra_outputs'] = [os.path.join(directory, os.path.basename(path))
+                                           for path in info['__fanout_extras']]
+            if info.get('section_start') is not None:
+                # yt-dlp set the duration to the section's; size the whole item for comparison
+                info['__full_bytes'] = estimate_download_bytes(dict(info, duration=self._ranking_duration))
+            if self.params.get('measure_writes') and info.get('filepath'):
+                # Flushing the finished file shows how fast its disk takes writes
+                info['__write_timings'] = [flush_timing(path) for path in
+                                           [info['filepath']] + info.get('__extra_outputs', [])
+                                           if os.path.exists(path)]
+            if self.params.get('checksum_algorithm') and info.get('filepath'):
+                info['__checksum'] = self.final_checksum(info['filepath'])
+                info['__extra_checksums'] = [self.final_checksum(path) for path in info.get('__extra_outputs', ())]
+            for hook in self.params.get('finished_media_hooks') or ():
+                hook(info)
+            return info
+
+    _yt_dlp_extensions = types.SimpleNamespace(
+        SegmentedHttpFD=SegmentedHttpFD,
+        StreamingHlsFD=StreamingHlsFD,
+        StreamingDashFD=StreamingDashFD,
+        ResumableHlsFD=ResumableHlsFD,
+        ResumableDashFD=ResumableDashFD,
+        YoutubeDL=AppYoutubeDL,
+    )
+    return _yt_dlp_extensions
+
+# Download workers run on a fixed set of threads that are reused from job to job,
+# instead of a new QThread (and its native thread) per item
+WORKER_THREADS = 16  # jobs that can run at once; further jobs wait for a free thread
+
+_worker_threads = None
+
+def worker_threads():
+    """The shared thread pool download workers run on, created on first use"""
+    global _worker_threads
+    if _worker_threads is None:
+        _worker_threads = concurrent.futures.ThreadPoolExecutor(
+            max_workers=WORKER_THREADS, thread_name_prefix='download')
+    return _worker_threads
+
+class PooledWorker(QObject):
+    """One download job run on a worker_threads() thread, with the QThread-style
+    start/isRunning/wait the owners use. The owner calls release() once it has read
+    the results, which drops the job's connections and state."""
     progress = pyqtSignal(dict)
     finished = pyqtSignal(bool)
     error = pyqtSignal(str)
-    error_logged = pyqtSignal(dict)  # New signal for error logging
+    error_logged = pyqtSignal(dict)
     status_update = pyqtSignal(str)
 
+    def __init__(self):
+        super().__init__()
+        self._done = threading.Event()
+        self._done.set()
+
+    def start(self):
+        self._done.clear()
+        worker_threads().submit(self._run_pooled)
+
+    def _run_pooled(self):
+        try:
+            self.run()
+        finally:
+            self._done.set()
+
+    def isRunning(self):
+        return not self._done.is_set()
+
+    def wait(self, timeout=None):
+        return self._done.wait(timeout)
+
+    def release(self):
+        """Disconnect the owner and drop per-job state (options, info-derived results)"""
+        for signal in (self.progress, self.finished, self.error, self.error_logged, self.status_update):
+            try:
+                signal.disconnect()
+            except TypeError:
+                pass  # nothing connected
+        self.options = {}
+        self.file_bytes = {}
+        self.assembly_bytes = {}
+        self.media_files = []
+        self.format_choices = []
+        self.checksums = []
+        self.full_bytes = []
+        self.write_timings = []
+        self.expected_media = []
+        self.deleteLater()
+
+class DownloadWorker(PooledWorker):
     def __init__(self, url, options):
         super().__init__()
         self.url = url
         self.options = options
         self.is_cancelled = False
         self.chunk_size = 8192
+        self.error_category = None
+        self.file_bytes = {}  # bytes transferred per output file
+        self.assembly_bytes = {}  # (fetched, written) per streamed file
+        self.merged_bytes = 0  # written again by the merger
+        self.media_files = []  # (media key, final path) per finished item
+        self.space_checked = 0.0
+        self.low_space = None  # (path, free bytes) when stopped for disk space
+        self.format_choices = []  # from the ranked format selection, per item
+        self.checksums = []  # manifest entries for finished files
+        self.full_bytes = []  # estimated size of the whole item, per finished section
+        self.write_timings = []  # (bytes, seconds) to flush each finished file, when measured
+        self.expected_media = []  # media_expectation() per finished file, for the integrity sweep
 
     def run(self):
         try:
-            thread_count = int(self.options.get('thread_count', 3))
-            self.status_update.emit(f"Initializing download with {thread_count} threads...")
+            yt_dlp = load_yt_dlp()
+            max_attempts = max(1, int(self.options.get('retry_attempts', 3)))
+            attempt = 0
+            while True:
+                attempt += 1
+                error_message, category = self._download_once(yt_dlp)
+                if error_message is None:
+                    self.finished.emit(True)
+                    return
     
-            # Base ydl options with quiet settings
-            ydl_opts = {
-                'format': self.options.get('format', 'bestvideo+bestaudio/best'),
-                'outtmpl': self.options.get('outtmpl', '%(title)s.%(ext)s'),
-                'writesubtitles': self.options.get('writesubtitles', False),
-                'noplaylist': self.options.get('noplaylist', True),
-                'progress_hooks': [self._progress_hook],
-                'concurrent_fragment_downloads': thread_count,
-                'ignoreerrors': True,
-                'no_warnings': True,
-                'quiet': True,
-                'no_color': True,
-                'paths': {'temp': os.path.join(os.path.dirname(self.options.get('outtmpl', '')), '.temp')},
-                'keepvideo': self.options.get('keepvideo', False),
-                'postprocessors': self.options.get('postprocessors', []),
-                'extractaudio': self.options.get('extractaudio', False),
-                'addmetadata': self.options.get('addmetadata', False),
-                'writethumbnail': self.options.get('writethumbnail', False),
-            }
-    
-            # Add postprocessor_args if present
-            if 'postprocessor_args' in self.options:
-                ydl_opts['postprocessor_args'] = self.options['postprocessor_args']
-    
-            if 'ratelimit' in self.options:
-                ydl_opts['ratelimit'] = self.options['ratelimit']
-    
-            if 'proxy' in self.options:
-                ydl_opts['proxy'] = self.options['proxy']
-    
-            # Add any merge format options
-            if 'merge_output_format' in self.options:
-                ydl_opts['merge_output_format'] = self.options['merge_output_format']
-    
-            try:
-                with yt_dlp.YoutubeDL(ydl_opts) as ydl:
-                    self.status_update.emit("Starting download...")
-                    result = ydl.download([self.url])
-                    
-                    if result != 0:
-                        error_info = {
-                            'url': self.url,
-                            'error': 'Download failed with non-zero exit code',
-                            'timestamp': datetime.now().strftime('%Y-%m-%d %H:%M:%S')
-                        }
-                        self.error_logged.emit(error_info)
-                        self.error.emit("Download failed - check error log for details")
-                        self.finished.emit(False)
-                    else:
-                        self.finished.emit(True)
+                if category in RETRYABLE_ERRORS and attempt < max_attempts and not self.is_cancelled:
+                    delay = backoff_delay(category, attempt)
+                    self.status_update.emit(
+                        f"{ERROR_LABELS[category]}, retrying in {delay:.0f}s "
+                        f"(attempt {attempt + 1}/{max_attempts})")
+                    if self._wait(delay):
+                        continue
+                break
     
-            except yt_dlp.utils.DownloadError as e:
-                error_info = {
-                    'url': self.url,
-                    'error': f"Download error: {str(e)}",
-                    'timestamp': datetime.now().strftime('%Y-%m-%d %H:%M:%S')
-                }
-                self.error_logged.emit(error_info)
-                self.error.emit(f"Download error: {str(e)}")
-                self.finished.emit(False)
+            if self.is_cancelled:
+                error_message, category = "Download cancelled", ERROR_CANCELLED
+            self._report_failure(error_message, category, attempt)
     
         except Exception as e:
-            error_info = {
-                'url': self.url,
-                'error': str(e),
-                'timestamp': datetime.now().strftime('%Y-%m-%d %H:%M:%S')
-            }
-            self.error_logged.emit(error_info)
-            self.error.emit(str(e))
-            self.finished.emit(False)
+            self._report_failure(str(e), classify_error(str(e), e), 1)
+
+    def _build_ydl_opts(self):
+        thread_count = int(self.options.get('thread_count', 3))
+        noplaylist = self.options.get('noplaylist', True)
+
+        # Base ydl options with quiet settings
+        ydl_opts = {
+            'format': self.options.get('format', 'bestvideo+bestaudio/best'),
+            'outtmpl': self.options.get('outtmpl', '%(title)s.%(ext)s'),
+            'writesubtitles': self.options.get('writesubtitles', False),
+            'noplaylist': noplaylist,
+            'progress_hooks': [self._progress_hook],
+            'finished_media_hooks': [self._media_finished],
+            'concurrent_fragment_downloads': thread_count,
+            # Single items raise so the failure can be classified; playlists keep
+            # going past a bad entry and report collected errors afterwards
+            'ignoreerrors': not noplaylist,
+            'no_warnings': True,
+            'quiet': True,
+            'no_color': True,
+            'paths': {'temp': os.path.join(os.path.dirname(self.options.get('outtmpl', '')), '.temp')},
+            'keepvideo': self.options.get('keepvideo', False),
+            'postprocessors': self.options.get('postprocessors', []),
+            'extractaudio': self.options.get('extractaudio', False),
+            'addmetadata': self.options.get('addmetadata', False),
+            'writethumbnail': self.options.get('writethumbnail', False),
+        }
+
+        # Add postprocessor_args if present
+        if 'postprocessor_args' in self.options and not self.options.get('output_targets'):
+            ydl_opts['postprocessor_args'] = self.options['postprocessor_args']
+
+        if self.options.get('output_targets'):
+            # FanOutPP gives each output its own arguments
+            ydl_opts['output_targets'] = self.options['output_targets']
+            ydl_opts['transcode_workers'] = self.options['transcode_workers']
+
+        if 'ratelimit' in self.options:
+            ydl_opts['ratelimit'] = self.options['ratelimit']
+
+        if 'proxy' in self.options:
+            ydl_opts['proxy'] = self.options['proxy']
+
+        if self.options.get('segmented_http'):
+            # One connection per download thread for progressive http(s) formats
+            ydl_opts['segmented_connections'] = thread_count
+
+        postprocessor_keys = {pp.get('key') for pp in ydl_opts['postprocessors']}
+        if ((ydl_opts['writesubtitles'] or ydl_opts['writethumbnail'])
+                and not postprocessor_keys.intersection(SIDE_LANE_EMBEDDERS)):
+            ydl_opts['side_lane_connections'] = SIDE_LANE_CONNECTIONS
+
+        if self.options.get('streaming_assembly'):
+            ydl_opts['streaming_assembly'] = True
+            ydl_opts['postprocessor_hooks'] = [self._postprocessor_hook]
+
+        if self.options.get('fragment_engine', 'threads') != 'threads':
+            ydl_opts['fragment_engine'] = self.options['fragment_engine']
+            ydl_opts['async_fragment_requests'] = self.options['async_fragment_requests']
+
+        if self.options.get('format_ranking'):
+            ydl_opts['format_ranking'] = self.options['format_ranking']
+
+        if self.options.get('pipe_transcode') and self.options.get('extractaudio'):
+            ydl_opts['pipe_transcode'] = ydl_opts['postprocessors'][0]['preferredcodec']
+
+        if self.options.get('checksum_algorithm'):
+            ydl_opts['checksum_algorithm'] = self.options['checksum_algorithm']
+
+        if self.options.get('measure_writes'):
+            ydl_opts['measure_writes'] = True
+
+        if self.options.get('section'):
+            # yt-dlp hands sections to FFmpeg, which reads only the byte ranges or
+            # fragments that cover them; cuts fall on keyframes unless re-encoded
+            start, end = self.options['section']
+            ydl_opts['download_ranges'] = load_yt_dlp().utils.download_range_func(
+                None, [(start, end if end is not None else math.inf)])
+            ydl_opts['force_keyframes_at_cuts'] = self.options.get('force_keyframes_at_cuts', False)
+
+        # Add any merge format options
+        if 'merge_output_format' in self.options:
+            ydl_opts['merge_output_format'] = self.options['merge_output_format']
+
+        return ydl_opts
+
+    def _download_once(self, yt_dlp):
+        """Run one download attempt; returns (error message, category) or (None, None)"""
+        thread_count = int(self.options.get('thread_count', 3))
+        self.status_update.emit(f"Initializing download with {thread_count} threads...")
+
+        collector = YdlErrorCollector()
+        ydl_opts = self._build_ydl_opts()
+        ydl_opts['logger'] = collector
+
+        try:
+            with yt_dlp_extensions().YoutubeDL(ydl_opts) as ydl:
+                self.status_update.emit("Starting download...")
+                result = ydl.download([self.url])
+                self.format_choices = ydl.format_choices
+                if ydl_opts.get('side_lane_connections'):
+                    self.status_update.emit("Finishing subtitles and thumbnails...")
+                    for message in ydl.finish_side_lane(SIDE_LANE_TIMEOUT):
+                        self.status_update.emit(f"Warning: {message}")
+        except yt_dlp.utils.DownloadCancelled:
+            if self.low_space:
+                path, free = self.low_space
+                return (f"Stopped with {free / 1024 / 1024:.0f}MB free on {path}, below the "
+                        f"{self.options['min_free_bytes'] / 1024 / 1024:.0f}MB minimum"), ERROR_DISK_FULL
+            return "Download cancelled", ERROR_CANCELLED
+        except yt_dlp.utils.DownloadError as e:
+            return f"Download error: {str(e)}", classify_error(str(e), e)
+        except OSError as e:
+            return str(e), classify_error(str(e), e)
+
+        if result != 0:
+            message = collector.errors[-1] if collector.errors else 'Download failed with non-zero exit code'
+            # Classify on the first error that gives a reason, not the trailing summary
+            categories = [classify_error(error) for error in collector.errors]
+            category = next((c for c in categories if c != ERROR_UNKNOWN), ERROR_UNKNOWN)
+            return message, category
+        return None, None
+
+    def _wait(self, seconds):
+        """Sleep between retries; returns False if the download was cancelled meanwhile"""
+        deadline = time.monotonic() + seconds
+        while time.monotonic() < deadline:
+            if self.is_cancelled:
+                return False
+            time.sleep(0.2)
+        return not self.is_cancelled
+
+    def _report_failure(self, message, category, attempts):
+        self.error_category = category
+        error_info = {
+            'url': self.url,
+            'error': message,
+            'category': category,
+            'attempts': attempts,
+            'timestamp': datetime.now().strftime('%Y-%m-%d %H:%M:%S')
+        }
+        self.error_logged.emit(error_info)
+        self.error.emit(f"{ERROR_LABELS[category]}: {message}")
+        self.finished.emit(False)
+
+    def downloaded_bytes(self):
+        return sum(self.file_bytes.values())
+
+    def write_stats(self):
+        """Bytes fetched and written to disk by streamed fragment downloads, or None"""
+        if not self.assembly_bytes:
+            return None
+        fetched = sum(f for f, _ in self.assembly_bytes.values())
+        written = sum(w for _, w in self.assembly_bytes.values()) + self.merged_bytes
+        return {
+            'bytes_fetched': fetched,
+            'bytes_written': written,
+            'write_amplification': round(written / fetched, 3) if fetched else None,
+        }
+
+    def selection_stats(self):
+        """Bytes the ranked format selection chose against the configured format, or None"""
+        if not self.format_choices:
+            return None
+        return {
+            'default_format_bytes': sum(choice[2] for choice in self.format_choices),
+            'selected_format_bytes': sum(choice[3] for choice in self.format_choices),
+            'formats': [f"{choice[0]} -> {choice[1]}" for choice in self.format_choices],
+        }
+
+    def section_stats(self):
+        """Bytes fetched for a section download against the whole item's size, or None.
+        FFmpeg does the fetching for sections, so the bytes are what it wrote out."""
+        if not self.full_bytes or not all(self.full_bytes):
+            return None
+        fetched = self.downloaded_bytes()
+        full = sum(self.full_bytes)
+        return {
+            'section': format_section(self.options['section']),
+            'section_bytes': fetched,
+            'full_bytes': full,
+            'section_fraction': round(fetched / full, 3),
+        }
+
+    def _media_finished(self, info):
+        if info.get('filepath'):
+            self.media_files.append((f"{info.get('extractor_key')}:{info.get('id')}", info['filepath']))
+            self.expected_media.extend(media_expectation(info, path)
+                                       for path in [info['filepath']] + info.get('__extra_outputs', []))
+        if info.get('section_start') is not None:
+            self.full_bytes.append(info.get('__full_bytes'))
+        self.write_timings.extend(info.get('__write_timings', ()))
+        if info.get('__checksum'):
+            paths = [info['filepath']] + info.get('__extra_outputs', [])
+            for path, (checksum, while_writing) in zip(paths, [info['__checksum']] + info['__extra_checksums']):
+                self.checksums.append({
+                    'path': path,
+                    'size': checksum.size,
+                    'algorithm': checksum.algorithm,
+                    'hash': checksum.hexdigest(),
+                    'url': info.get('webpage_url') or self.url,
+                    'format_id': info.get('format_id'),
+                    'hashed_while_writing': while_writing,
+                })
+
+    def _postprocessor_hook(self, d):
+        if d['status'] == 'finished' and d.get('postprocessor') == 'Merger':
+            path = d.get('info_dict', {}).get('filepath')
+            if path and os.path.exists(path):
+                self.merged_bytes += os.path.getsize(path)
+
+    def _progress_hook(self, d):
+        if self.is_cancelled:
+            raise load_yt_dlp().utils.DownloadCancelled("Cancelled by user")
+        if d['status'] == 'downloading' and self.options.get('min_free_bytes'):
+            self._check_free_space(d)
+        if d.get('filename') and d.get('downloaded_bytes') is not None:
+            self.file_bytes[d['filename']] = d['downloaded_bytes']
+        if 'assembly_written' in d:
+            self.assembly_bytes[d['filename']] = (d['assembly_fetched'], d['assembly_written'])
+        
+        if d['status'] == 'downloading':
+            total = d.get('total_bytes', 0)
+            if total == 0:
+                total = d.get('total_bytes_estimate', 0)
+            
+            downloaded = d.get('downloaded_bytes', 0)
+            
+            if total > 0:
+                progress = {
+                    'downloaded': downloaded,
+                    'total': total,
+                    'filename': d.get('filename', 'Unknown'),
+                    'speed': d.get('speed', 0),
+                    'eta': d.get('eta', 0)
+                }
+                self.progress.emit(progress)
+                
+                if 'speed' in d and d['speed']:
+                    speed = d['speed'] / 1024 / 1024
+                    status = f"Downloading at {speed:.1f} MB/s"
+                    if d.get('eta'):
+                        status += f" (ETA: {d['eta']} seconds)"
+                    self.status_update.emit(status)
+        
+        elif d['status'] == 'finished':
+            self.status_update.emit(f"Download complete, starting conversion...")
+            self.progress.emit({'format': "Converting...", 'percent': 0})
+        
+        elif d['status'] == 'started_conversion':
+            self.status_update.emit("Starting audio conversion...")
+            self.progress.emit({'format': "Converting...", 'percent': 0})
+        
+        elif d['status'] == 'converting':
+            if d.get('postprocessor') == 'FFmpegExtractAudio':
+                # For audio conversion, try different percentage indicators
+                percent = d.get('percent', d.get('progress', 0) * 100)
+                if percent:
+                    self.progress.emit({'format': f"Converting... {percent:.1f}%", 'percent': percent})
+                    self.status_update.emit(f"Converting audio: {percent:.1f}% complete")
+
+    def _check_free_space(self, d):
+        """Stop the download before the scratch or output volume runs out of space"""
+        now = time.monotonic()
+        if now - self.space_checked < DISK_CHECK_INTERVAL:
+            return
+        self.space_checked = now
+        for path in (d.get('tmpfilename') or d.get('filename'), self.options['outtmpl']):
+            directory = os.path.dirname(path or '') or '.'
+            free = volume_free_bytes(directory)
+            if free < self.options['min_free_bytes']:
+                self.low_space = (existing_parent(directory), free)
+                raise load_yt_dlp().utils.DownloadCancelled("Low disk space")
+
+    def cancel(self):
+        self.is_cancelled = True
+
+# Process execution backend: each download runs in a pooled child process
+# (yt-mtdl.py --pool-worker) so extraction, fragment bookkeeping and progress
+# hooks do not share the GUI process's GIL with the Qt event loop
+PROCESS_PROGRESS_INTERVAL = 0.1  # seconds between progress messages from a child
+PROCESS_CANCEL_GRACE = 5  # seconds a child gets to stop before it is killed
+PROCESS_POOL_SIZE = os.cpu_count() or 2  # idle children kept for reuse
+EXECUTION_BACKENDS = {"Threads": 'thread', "Processes": 'process'}  # settings combo label -> backend
+
+class PoolProcess:
+    """A --pool-worker child. Messages are JSON lines: jobs and cancels on its stdin,
+    events on its stdout."""
+
+    def __init__(self):
+        # A frozen build (PyInstaller) is its own interpreter and has no script to pass
+        if getattr(sys, 'frozen', False):
+            command = [sys.executable, '--pool-worker']
+        else:
+            command = [sys.executable, os.path.abspath(__file__), '--pool-worker']
+        self.process = subprocess.Popen(command, stdin=subprocess.PIPE, stdout=subprocess.PIPE, bufsize=0)
+        self.lock = threading.Lock()
+
+    def alive(self):
+        return self.process.poll() is None
+
+    def send(self, message):
+        with self.lock:
+            self.process.stdin.write(json.dumps(message).encode() + b'\n')
+
+    def messages(self):
+        """Events until the child's stdout closes"""
+        for line in self.process.stdout:
+            yield json.loads(line)
+
+    def kill(self):
+        if self.alive():
+            self.process.kill()
+        self.process.wait()
+
+    def close(self):
+        try:
+            self.process.stdin.close()
+            self.process.wait(timeout=PROCESS_CANCEL_GRACE)
+        except (OSError, subprocess.TimeoutExpired):
+            self.kill()
+
+class ProcessPool:
+    """Idle --pool-worker children, started on demand and reused between jobs"""
+
+    def __init__(self, size=PROCESS_POOL_SIZE):
+        self.size = size
+        self.idle = []
+        self.lock = threading.Lock()
+
+    def acquire(self):
+        with self.lock:
+            while self.idle:
+                process = self.idle.pop()
+                if process.alive():
+                    return process
+        return PoolProcess()
+
+    def release(self, process, reusable=True):
+        with self.lock:
+            if reusable and process.alive() and len(self.idle) < self.size:
+                self.idle.append(process)
+                return
+        process.close()
+
+    def shutdown(self):
+        with self.lock:
+            idle, self.idle = self.idle, []
+        for process in idle:
+            process.close()
+
+_process_pool = None
+
+def process_pool():
+    """The shared ProcessPool, created on first use"""
+    global _process_pool
+    if _process_pool is None:
+        _process_pool = ProcessPool()
+    return _process_pool
+
+class ProcessDownloadWorker(PooledWorker):
+    """DownloadWorker stand-in that runs the download in a pooled child process.
+    The worker thread here only relays the child's events as the usual signals."""
+
+    def __init__(self, url, options, pool=None):
+        super().__init__()
+        self.url = url
+        self.options = options
+        self.pool = pool or process_pool()
+        self.process = None
+        self.is_cancelled = False
+        self.error_category = None
+        self.file_bytes = {}
+        self.assembly_bytes = {}
+        self.merged_bytes = 0
+        self.media_files = []
+        self.format_choices = []
+        self.checksums = []
+        self.full_bytes = []
+        self.write_timings = []
+        self.expected_media = []
+
+    def run(self):
+        try:
+            self.process = self.pool.acquire()
+            if self.is_cancelled:
+                raise OSError("Download cancelled")
+            self.process.send({'job': self.url, 'options': self.options})
+        except OSError as e:
+            self._process_failed(str(e))
+            return
+
+        result = None
+        for message in self.process.messages():
+            kind = message[0]
+            if kind == 'p':
+                self.progress.emit(message[1])
+            elif kind == 's':
+                self.status_update.emit(message[1])
+            elif kind == 'e':
+                # The category comes with the error: the window reads it in its error handler
+                self.error_category = message[2]
+                self.error.emit(message[1])
+            elif kind == 'l':
+                self.error_logged.emit(message[1])
+            elif kind == 'done':
+                result = message[1]
+                break
+
+        if result is None:
+            # The child died (crash, out of memory, killed after a cancel)
+            self.process.kill()
+            self.pool.release(self.process, reusable=False)
+            self._process_failed(f"Download process exited with code {self.process.process.returncode}")
+            return
+
+        self.pool.release(self.process, reusable=not self.is_cancelled)
+        self.error_category = result['category']
+        self.media_files = [tuple(item) for item in result['media_files']]
+        self.file_bytes = result['file_bytes']
+        self.assembly_bytes = {name: tuple(value) for name, value in result['assembly_bytes'].items()}
+        self.merged_bytes = result['merged_bytes']
+        self.format_choices = [tuple(choice) for choice in result['format_choices']]
+        self.checksums = result['checksums']
+        self.full_bytes = result['full_bytes']
+        self.write_timings = [tuple(timing) for timing in result['write_timings']]
+        self.expected_media = result['expected_media']
+        self.finished.emit(result['success'])
+
+    def _process_failed(self, message):
+        if self.is_cancelled:
+            message, category = "Download cancelled", ERROR_CANCELLED
+        else:
+            category = ERROR_UNKNOWN
+        self.error_category = category
+        self.error_logged.emit({
+            'url': self.url,
+            'error': message,
+            'category': category,
+            'attempts': 1,
+            'timestamp': datetime.now().strftime('%Y-%m-%d %H:%M:%S')
+        })
+        self.error.emit(f"{ERROR_LABELS[category]}: {message}")
+        self.finished.emit(False)
+
+    def cancel(self):
+        self.is_cancelled = True
+        process = self.process
+        if process is None:
+            return
+        try:
+            process.send({'cancel': True})
+        except OSError:
+            pass
+        # A child stuck outside the progress hook (extraction, FFmpeg) is killed
+        timer = threading.Timer(PROCESS_CANCEL_GRACE,
+                                lambda: self.isRunning() and process.kill())
+        timer.daemon = True
+        timer.start()
+
+    def release(self):
+        super().release()
+        self.process = None
+
+    downloaded_bytes = DownloadWorker.downloaded_bytes
+    write_stats = DownloadWorker.write_stats
+    selection_stats = DownloadWorker.selection_stats
+    section_stats = DownloadWorker.section_stats
+
+def create_download_worker(url, options):
+    """DownloadWorker for the backend chosen in the settings"""
+    if options.get('execution_backend') == 'process':
+        return ProcessDownloadWorker(url, options)
+    return DownloadWorker(url, options)
+
+def run_pool_worker():
+    """Entry point for --pool-worker: run jobs sent by ProcessDownloadWorker"""
+    # The channel gets its own copy of stdout; anything else printing to stdout
+    # (including FFmpeg and other children) goes to stderr instead
+    channel = os.fdopen(os.dup(sys.stdout.fileno()), 'wb', buffering=0)
+    os.dup2(sys.stderr.fileno(), sys.stdout.fileno())
+    sys.stdout = sys.stderr
+
+    channel_lock = threading.Lock()
+
+    def send(*message):
+        data = json.dumps(message).encode() + b'\n'
+        with channel_lock:
+            channel.write(data)
+
+    jobs = queue.Queue()
+    current = {}
+
+    def read_commands():
+        for line in sys.stdin.buffer:
+            message = json.loads(line)
+            if message.get('cancel'):
+                if current.get('worker'):
+                    current['worker'].cancel()
+            else:
+                jobs.put(message)
+        jobs.put(None)
+    threading.Thread(target=read_commands, daemon=True).start()
+
+    while True:
+        message = jobs.get()
+        if message is None:
+            return
+        worker = DownloadWorker(message['job'], message['options'])
+        outcome = {'success': False, 'last_progress': 0.0, 'progress_sent': False}
+
+        def on_progress(progress):
+            # Intermediate updates are throttled; conversion steps always go through
+            with channel_lock:
+                now = time.monotonic()
+                due = 'downloaded' not in progress or now - outcome['last_progress'] >= PROCESS_PROGRESS_INTERVAL
+                if due:
+                    outcome['last_progress'] = now
+                outcome['progress_sent'] = due
+            if due:
+                send('p', progress)
+
+        def on_status(text):
+            # Speed lines follow each progress update and share its throttling
+            if not text.startswith("Downloading at") or outcome['progress_sent']:
+                send('s', text)
+
+        # Hooks fire on yt-dlp's fragment threads and there is no event loop here,
+        # so the signals are delivered directly
+        direct = Qt.ConnectionType.DirectConnection
+        worker.progress.connect(on_progress, direct)
+        worker.status_update.connect(on_status, direct)
+        worker.error.connect(lambda text: send('e', text, worker.error_category), direct)
+        worker.error_logged.connect(lambda info: send('l', info), direct)
+        worker.finished.connect(lambda success: outcome.update(success=success), direct)
+        current['worker'] = worker
+        worker.run()  # in this thread; the child has nothing else to do
+        current['worker'] = None
+        send('done', {
+            'success': outcome['success'],
+            'category': worker.error_category,
+            'media_files': worker.media_files,
+            'file_bytes': worker.file_bytes,
+            'assembly_bytes': worker.assembly_bytes,
+            'merged_bytes': worker.merged_bytes,
+            'format_choices': worker.format_choices,
+            'checksums': worker.checksums,
+            'full_bytes': worker.full_bytes,
+            'write_timings': worker.write_timings,
+            'expected_media': worker.expected_media,
+        })
+        worker.release()
+
+def build_download_options(settings, output_dir, format_data=None, quality='Best',
+                           writesubtitles=False, noplaylist=True, episode_id=None, extra_outputs=(),
+                           section=None):
+    """DownloadWorker options from the app settings and the per-download choices.
+    format_data is a format combo entry ({'type': 'audio', 'ext': 'mp3'} etc.);
+    extra_outputs are audio codecs also encoded from the same download; section is
+    [start, end] in seconds (end None: to the end) to download only that part."""
+    if episode_id:
+        output_template = os.path.join(output_dir, f'{episode_id}.%(ext)s')
+    elif section:
+        # Sections of one item each get their own file
+        label = format_section(section).replace(':', '.')
+        output_template = os.path.join(output_dir, f'%(title)s [{label}].%(ext)s')
+    else:
+        output_template = os.path.join(output_dir, '%(title)s.%(ext)s')
+
+    # Base options
+    options = {
+        'outtmpl': output_template,
+        'writesubtitles': writesubtitles,
+        'noplaylist': noplaylist,
+        'thread_count': settings['thread_count'],
+        'retry_attempts': settings['retry_attempts'],
+        'segmented_http': settings['segmented_http'],
+        # The async fragment engine keeps fragments in memory, so it assembles them streaming
+        'streaming_assembly': settings['streaming_assembly'] or settings['fragment_engine'] != 'threads',
+        'fragment_engine': settings['fragment_engine'],
+        'async_fragment_requests': settings['async_fragment_requests'],
+        'execution_backend': settings['execution_backend'],
+        'min_free_bytes': settings['min_free_mb'] * 1024 * 1024,
+        'checksum_algorithm': settings['checksum_algorithm'],
+        'keepvideo': False,
+    }
+
+    # Handle quality selection for video formats
+    quality_map = {
+        "Best": None,  # No limit = best available
+        "High": "1080",
+        "Medium": "720",
+        "Low": "480"
+    }
+    height_limit = quality_map[quality]
+
+    # Format selection
+    if format_data and format_data['type'] == 'audio':
+        ext = format_data['ext']
+        audio_format = 'bestaudio/best'
+        if settings['format_ranking'] and settings['max_audio_kbps']:
+            audio_format = f"bestaudio[abr<={settings['max_audio_kbps']}]/{audio_format}"
+        options.update({
+            'format': audio_format,
+            'postprocessors': [{
+                'key': 'FFmpegExtractAudio',
+                'preferredcodec': ext,
+                'preferredquality': '320' if ext == 'mp3' else None,
+                'nopostoverwrites': False
+            }],
+            'extractaudio': True,
+            'pipe_transcode': settings['pipe_transcode'],
+            'addmetadata': True,
+            'writethumbnail': False,
+            'postprocessor_args': audio_output_args(ext),
+        })
+    else:
+        # Video format selection with quality consideration
+        if height_limit:
+            format_str = f'bestvideo[height<={height_limit}]+bestaudio/best[height<={height_limit}]'
+        else:
+            format_str = 'bestvideo+bestaudio/best'
+        
+        options.update({
+            'format': format_str,
+            'merge_output_format': 'mp4'
+        })
+        if settings['format_ranking']:
+            options['format_ranking'] = {
+                'codecs': CODEC_PREFERENCES.get(settings['codec_preference'], []),
+                'max_height': int(height_limit) if height_limit else None,
+                'max_bytes': settings['max_item_mb'] * 1024 * 1024,
+                'max_kbps': settings['max_item_kbps'],
+                'max_audio_kbps': settings['max_audio_kbps'],
+            }
+
+    # More outputs from the one download: FanOutPP encodes them all side by side
+    main_codec = options['postprocessors'][0]['preferredcodec'] if options.get('extractaudio') else None
+    extras = [codec for codec in dict.fromkeys(extra_outputs) if codec != main_codec]
+    if extras:
+        options['output_targets'] = {'codecs': ([main_codec] if main_codec else []) + extras, 'main': main_codec}
+        options['transcode_workers'] = settings['transcode_workers']
+        options['pipe_transcode'] = False  # the source file is needed for the other outputs
+
+    if section:
+        options['section'] = list(section)
+        options['force_keyframes_at_cuts'] = settings['section_keyframe_cuts']
+
+    if settings['output_roots'].strip() and OUTPUT_POLICIES.get(settings['output_policy']) == 'latency':
+        options['measure_writes'] = True  # feeds the Fastest Writes placement
+
+    if settings['use_proxy'] and settings['proxy_url'].strip():
+        options['proxy'] = settings['proxy_url'].strip()
+    
+    if settings['rate_limit'] > 0:
+        options['ratelimit'] = settings['rate_limit'] * 1024
+
+    return options
+
+# Bulk queue ordering policies (combo box label -> DownloadQueue.order)
+QUEUE_ORDERS = {
+    "File Order": 'fifo',
+    "Shortest First": 'shortest',
+    "Largest First": 'largest',
+    "Manual Priority": 'priority',
+    "Episode ID": 'episode',
+}
+
+# Used to turn a duration into a size estimate when a format reports no size (~4 Mbit/s)
+ASSUMED_BYTES_PER_SECOND = 500 * 1024
+
+# Disk-space admission for batches
+DISK_RECHECK_MS = 30000  # how often a batch held for disk space checks again
+DISK_CHECK_INTERVAL = 2  # seconds between free-space checks while downloading
+AUDIO_BYTES_PER_SECOND = {'mp3': 40000, 'wav': 176400, 'flac': 110000}  # converted output size
+
+def existing_parent(path):
+    """path, or its nearest existing parent (output folders are created on demand)"""
+    path = os.path.abspath(path)
+    while not os.path.exists(path) and os.path.dirname(path) != path:
+        path = os.path.dirname(path)
+    return path
+
+def volume_free_bytes(path):
+    return shutil.disk_usage(existing_parent(path)).free
+
+def volume_id(path):
+    return os.stat(existing_parent(path)).st_dev
+
+def estimate_disk_usage(estimate_bytes, duration, options):
+    """Where a job writes and how much: the download in the scratch (.temp) folder and
+    the final file in the output folder. in_place is True when the download is moved
+    to the output folder as is rather than merged or converted."""
+    output_dir = os.path.dirname(options['outtmpl']) or '.'
+    if options.get('section') and duration:
+        # Only the section is fetched: scale the whole item's estimate down to it
+        start, end = options['section']
+        length = max(0, min(duration, end if end is not None else duration) - start)
+        estimate_bytes = estimate_bytes and int(estimate_bytes * length / duration)
+        duration = length
+    usage = {
+        'scratch_dir': os.path.join(output_dir, '.temp'),
+        'output_dir': output_dir,
+        'download': estimate_bytes or 0,
+        'output': estimate_bytes or 0,
+        'in_place': True,
+    }
+    if options.get('extractaudio'):
+        codec = options['postprocessors'][0]['preferredcodec']
+        if duration:
+            usage['output'] = int(AUDIO_BYTES_PER_SECOND.get(codec, ASSUMED_BYTES_PER_SECOND) * duration)
+        usage['in_place'] = False
+    elif '+' in options.get('format', ''):
+        usage['in_place'] = False
+    targets = options.get('output_targets')
+    if targets and duration:
+        for codec in targets['codecs']:
+            if codec != targets['main']:
+                usage['output'] += int(AUDIO_BYTES_PER_SECOND.get(codec, ASSUMED_BYTES_PER_SECOND) * duration)
+    return usage
+
+def peak_disk_usage(usage):
+    """Most disk space a job holds at once, as {path: bytes}. Merged and converted
+    downloads stay in scratch until the output is written; a file moved within one
+    volume is only counted once."""
+    if usage['in_place'] and volume_id(usage['scratch_dir']) == volume_id(usage['output_dir']):
+        return {usage['scratch_dir']: usage['download']}
+    return {usage['scratch_dir']: usage['download'], usage['output_dir']: usage['output']}
+
+def plan_disk_usage(usages):
+    """Space a batch needs per volume, as {path: bytes}. Every final file stays,
+    while scratch space is reused from job to job, so only the largest job's counts."""
+    volumes = {}
+    for usage in usages:
+        for key, path in (('output', usage['output_dir']), ('scratch', usage['scratch_dir'])):
+            volumes.setdefault(volume_id(path), {'path': path, 'output': 0, 'scratch': 0})
+        volumes[volume_id(usage['output_dir'])]['output'] += usage['output']
+        if not usage['in_place']:
+            scratch = volumes[volume_id(usage['scratch_dir'])]
+            scratch['scratch'] = max(scratch['scratch'], usage['download'])
+    return {existing_parent(entry['path']): entry['output'] + entry['scratch'] for entry in volumes.values()}
+
+class DiskSpaceBudget:
+    """Free-space admission control. Each started job reserves its peak disk use
+    until it finishes, and a job is only admitted if every volume it writes to keeps
+    min_free bytes after the reservations already held."""
+
+    def __init__(self, min_free):
+        self.min_free = min_free
+        self.reservations = {}  # job key -> {volume id: bytes}
+
+    def _by_volume(self, peak):
+        volumes = {}
+        for path, size in peak.items():
+            entry = volumes.setdefault(volume_id(path), [path, 0])
+            entry[1] += size
+        return volumes
+
+    def shortfall(self, peak):
+        """(path, bytes missing) for the first volume the job would take below
+        min_free, or None if it fits"""
+        for volume, (path, size) in self._by_volume(peak).items():
+            reserved = sum(held.get(volume, 0) for held in self.reservations.values())
+            missing = size + reserved + self.min_free - volume_free_bytes(path)
+            if missing >= 0:
+                return existing_parent(path), missing
+        return None
+
+    def reserve(self, key, peak):
+        self.reservations[key] = {volume: size for volume, (path, size) in self._by_volume(peak).items()}
+
+    def release(self, key):
+        self.reservations.pop(key, None)
+
+# Output volumes: placement policy combo label -> OutputVolumes.policy
+OUTPUT_POLICIES = {
+    "Most Free Space": 'free',
+    "Round Robin": 'round_robin',
+    "Fastest Writes": 'latency',
+}
+OUTPUT_INDEX_NAME = 'output-index.json'  # in the first output root
+OUTPUT_PLACEMENT_RESERVE = 1024 * 1024 * 1024  # held against a root per unfinished job without an estimate
+WRITE_LATENCY_WEIGHT = 0.3  # weight of the newest finalisation sample in a root's write latency
+
+def flush_timing(path):
+    """(size, seconds) to flush a finished file to its disk"""
+    start = time.monotonic()
+    fd = os.open(path, os.O_RDONLY)
+    try:
+        os.fsync(fd)
+    finally:
+        os.close(fd)
+    return os.path.getsize(path), time.monotonic() - start
+
+class FileLock:
+    """Exclusive lock between processes, held on path + '.lock' (flock, or msvcrt on
+    Windows) for the duration of a with block"""
+
+    def __init__(self, path):
+        self.path = path + '.lock'
+        self.file = None
+
+    def __enter__(self):
+        self.file = open(self.path, 'a+')
+        try:
+            if os.name == 'nt':
+                import msvcrt
+                self.file.seek(0)
+                while True:
+                    try:
+                        msvcrt.locking(self.file.fileno(), msvcrt.LK_LOCK, 1)
+                        break
+                    except OSError:
+                        continue  # LK_LOCK gives up after 10 seconds
+            else:
+                import fcntl
+                fcntl.flock(self.file, fcntl.LOCK_EX)
+        except BaseException:
+            self.file.close()
+            raise
+        return self
+
+    def __exit__(self, *exc):
+        try:
+            if os.name == 'nt':
+                import msvcrt
+                self.file.seek(0)
+                msvcrt.locking(self.file.fileno(), msvcrt.LK_UNLCK, 1)
+            else:
+                import fcntl
+                fcntl.flock(self.file, fcntl.LOCK_UN)
+        finally:
+            self.file.close()
+
+class OutputVolumes:
+    """Output roots a batch spreads its items over, by policy: the most free space
+    (less what unfinished items placed there may still write), in turn, or the lowest
+    recent write latency (seconds per MB to flush finished files to the disk). An
+    item keeps the root it was first placed on, so an episode ID names one file
+    across retries and reruns. The index file in the first root records where
+    each item was placed and the files it ended up as. Nodes sharing the roots
+    share the index: every change re-reads it under a file lock before writing."""
+
+    def __init__(self, roots, policy='free'):
+        self.roots = [os.path.abspath(root) for root in dict.fromkeys(roots)]
+        self.policy = policy
+        self.path = os.path.join(self.roots[0], OUTPUT_INDEX_NAME)
+        self.load()
+        self.active = {}  # item key -> (root, bytes held against it)
+        self.turn = 0
+
+    def load(self):
+        """Read the index as the last writer left it"""
+        try:
+            with open(self.path) as f:
+                data = json.load(f)
+        except (OSError, ValueError):
+            data = {}
+        self.items = data.get('items', {})
+        self.latency = data.get('write_latency', {})  # other nodes' roots are kept for them
+
+    @staticmethod
+    def item_key(job):
+        if job.get('episode_id'):
+            return f"episode:{job['episode_id']}"
+        key = f"media:{job['media_key']}" if job.get('media_key') else f"url:{job['url']}"
+        if job.get('section'):
+            key += f"@{format_section(job['section'])}"
+        return key
+
+    def held(self, root):
+        return [size for placed, size in self.active.values() if placed == root]
+
+    def choose(self, job):
+        """The root the job would be placed on now"""
+        item = self.items.get(self.item_key(job))
+        if item and item['root'] in self.roots:
+            return item['root']
+        if self.policy == 'round_robin':
+            return self.roots[self.turn % len(self.roots)]
+        if self.policy == 'latency':
+            # Roots without a sample yet are tried first; concurrent writers share a disk
+            return min(self.roots, key=lambda root: (root in self.latency,
+                                                     self.latency.get(root, 0) * (1 + len(self.held(root)))))
+        free = {}
+        for root in self.roots:
+            try:
+                free[root] = volume_free_bytes(root) - sum(self.held(root))
+            except OSError:
+                continue  # unmounted or unreadable
+        return max(free, key=free.get) if free else self.roots[0]
+
+    def place(self, job, estimate_bytes=None):
+        """Place the job (keeping an earlier placement) and record it in the index"""
+        os.makedirs(self.roots[0], exist_ok=True)
+        with FileLock(self.path):
+            self.load()  # another node may have placed the same item since
+            root = self.choose(job)
+            key = self.item_key(job)
+            if self.policy == 'round_robin' and self.items.get(key, {}).get('root') != root:
+                self.turn += 1
+            self.active[key] = (root, estimate_bytes or OUTPUT_PLACEMENT_RESERVE)
+            item = self.items.setdefault(key, {})
+            item.update({'root': root, 'url': job['url'], 'episode_id': job.get('episode_id'),
+                         'placed': datetime.now().strftime('%Y-%m-%d %H:%M:%S')})
+            self.save()
+        return root
+
+    def finish(self, job, files=(), write_timings=()):
+        """The job is over: record its files (if it succeeded) and the write latency
+        measured while they were finalised"""
+        key = self.item_key(job)
+        placed = self.active.pop(key, None)
+        os.makedirs(self.roots[0], exist_ok=True)
+        with FileLock(self.path):
+            self.load()
+            root = placed[0] if placed else self.items.get(key, {}).get('root')
+            for size, seconds in write_timings:
+                sample = seconds / max(size / 1024 / 1024, 1)
+                previous = self.latency.get(root)
+                self.latency[root] = sample if previous is None else (
+                    WRITE_LATENCY_WEIGHT * sample + (1 - WRITE_LATENCY_WEIGHT) * previous)
+            if files and key in self.items:
+                self.items[key]['files'] = list(files)
+                self.items[key]['finished'] = datetime.now().strftime('%Y-%m-%d %H:%M:%S')
+            self.save()
+
+    def save(self):
+        """Write the index; callers hold the FileLock and have just load()ed it"""
+        tmp_path = self.path + '.tmp'
+        with open(tmp_path, 'w') as f:
+            json.dump({'roots': self.roots, 'write_latency': self.latency, 'items': self.items}, f, indent=1)
+        os.replace(tmp_path, self.path)
+
+def output_volumes_for(settings, output_dir):
+    """OutputVolumes over output_dir and the extra output roots in the settings, or None without any"""
+    extra = [line.strip() for line in settings['output_roots'].splitlines() if line.strip()]
+    if not extra:
+        return None
+    return OutputVolumes([output_dir] + extra, OUTPUT_POLICIES.get(settings['output_policy'], 'free'))
+
+BATCH_REPORT_PATH = os.path.join(os.path.expanduser('~'), '.ytdl_batch_report.json')
+
+def format_bytes(fmt, duration):
+    """Estimated size of one format: reported size, else bitrate x duration, else None"""
+    size = fmt.get('filesize') or fmt.get('filesize_approx')
+    if not size and fmt.get('tbr') and duration:
+        size = fmt['tbr'] * 1000 / 8 * duration
+    return size or None
+
+def estimate_download_bytes(info):
+    """Estimated transfer size of the formats yt-dlp selected for an info dict, or None"""
+    if not info or info.get('entries') is not None:
+        return None
+    duration = info.get('duration')
+    total = 0
+    for fmt in info.get('requested_formats') or [info]:
+        size = format_bytes(fmt, duration)
+        if not size:
+            return None
+        total += size
+    return int(total)
+
+# Bandwidth-optimal format selection: codec preference combo label -> codec families
+# in order of preference (empty: any codec, smallest first)
+CODEC_PREFERENCES = {
+    "Smallest File": [],
+    "AV1 > VP9 > H.264": ['av1', 'vp9', 'h264'],
+    "VP9 > H.264": ['vp9', 'h264'],
+    "H.264 Only": ['h264'],
+}
+VIDEO_CODEC_FAMILIES = {
+    'av01': 'av1', 'vp09': 'vp9', 'vp9': 'vp9', 'vp8': 'vp8',
+    'avc1': 'h264', 'avc3': 'h264', 'h264': 'h264', 'hev1': 'h265', 'hvc1': 'h265', 'h265': 'h265',
+}
+
+def video_codec_family(fmt):
+    vcodec = (fmt.get('vcodec') or '').lower()
+    return VIDEO_CODEC_FAMILIES.get(vcodec.split('.')[0], vcodec.split('.')[0] or None)
+
+def rank_formats(formats, duration, ranking):
+    """Format spec ('137+140', '18') for the smallest download at the best quality level
+    the ranking allows, or None to leave the choice to yt-dlp.
+
+    Quality levels are (height, frame rate) pairs, best first. Within a level, candidates
+    (video-only + the chosen audio, or combined formats) go by codec preference and then
+    estimated bytes; the first that fits max_bytes and max_kbps wins. If nothing fits,
+    the smallest candidate is used."""
+    def audio_kbps(fmt):
+        return fmt.get('abr') or fmt.get('tbr') or 0
+
+    is_audio = lambda f: f.get('vcodec') == 'none' and f.get('acodec') not in (None, 'none')
+    is_video = lambda f: f.get('vcodec') not in (None, 'none')
+    audios = [f for f in formats if is_audio(f)]
+    codecs = ranking.get('codecs') or []
+    if codecs == ['h264']:
+        # H.264 only is a compatibility choice, so pair it with AAC rather than Opus
+        audios = [f for f in audios if (f.get('acodec') or '').startswith('mp4a')] or audios
+    ceiling = ranking.get('max_audio_kbps')
+    audio = None
+    if audios:
+        # Best bitrate under the ceiling, smallest on ties; else the lowest bitrate available
+        under = [f for f in audios if not ceiling or audio_kbps(f) <= ceiling] or [min(audios, key=audio_kbps)]
+        audio = max(under, key=lambda f: (audio_kbps(f), -(format_bytes(f, duration) or 0)))
+
+    candidates = []
+    for fmt in formats:
+        if not is_video(fmt) or not fmt.get('height'):
+            continue
+        family = video_codec_family(fmt)
+        if codecs and family not in codecs:
+            continue
+        if ranking.get('max_height') and fmt['height'] > ranking['max_height']:
+            continue
+        if fmt.get('acodec') == 'none':
+            if audio is None:
+                continue
+            parts = [fmt, audio]
+        else:
+            parts = [fmt]
+        sizes = [format_bytes(part, duration) for part in parts]
+        size = sum(sizes) if all(sizes) else None
+        candidates.append({
+            'spec': '+'.join(part['format_id'] for part in parts),
+            'level': (fmt['height'], round(fmt.get('fps') or 30)),
+            'codec_rank': codecs.index(family) if codecs else 0,
+            'size': size,
+        })
+    if not candidates:
+        return None
+
+    def fits(candidate):
+        if candidate['size'] is None:
+            return True  # nothing to check against
+        if ranking.get('max_bytes') and candidate['size'] > ranking['max_bytes']:
+            return False
+        if ranking.get('max_kbps') and duration and candidate['size'] * 8 / 1000 / duration > ranking['max_kbps']:
+            return False
+        return True
+
+    # Unknown sizes rank after known ones within a level
+    candidates.sort(key=lambda c: (tuple(-x for x in c['level']), c['codec_rank'], c['size'] is None, c['size'] or 0))
+    chosen = next((c for c in candidates if fits(c)), None)
+    if chosen is None:
+        chosen = min((c for c in candidates if c['size'] is not None), key=lambda c: c['size'])
+    return chosen['spec']
+
+def episode_sort_key(episode_id):
+    """Natural sort key so EP2 comes before EP10"""
+    return [int(part) if part.isdigit() else part.lower() for part in re.split(r'(\d+)', episode_id)]
+
+YOUTUBE_HOSTS = ('youtube.com', 'www.youtube.com', 'm.youtube.com', 'music.youtube.com', 'youtu.be')
+YOUTUBE_WATCH_URL = 'https://www.youtube.com/watch?v={}'
+
+# Time ranges ('1:02:00-1:10:30', '90-120', '45:00-'): seconds, M:SS or H:MM:SS on either side
+SECTION_TIME = r'\d+(?::\d{1,2}){0,2}(?:\.\d+)?'
+SECTION_PATTERN = re.compile(rf'^({SECTION_TIME})?-({SECTION_TIME})?$')
+
+def parse_timestamp(text):
+    """Seconds in '90', '1:30' or '1:02:03.5'"""
+    seconds = 0.0
+    for part in text.split(':'):
+        seconds = seconds * 60 + float(part)
+    return seconds
+
+def format_timestamp(seconds):
+    """'1:02:03' style text for a number of seconds"""
+    whole, millis = divmod(round(seconds * 1000), 1000)
+    hours, rest = divmod(whole, 3600)
+    text = f"{hours}:{rest // 60:02d}:{rest % 60:02d}" if hours else f"{rest // 60}:{rest % 60:02d}"
+    return text + (f".{millis:03d}".rstrip('0') if millis else '')
+
+def parse_section(text):
+    """[start, end] in seconds for a 'start-end' range, or None if text is not one.
+    Either side can be left out for the start or the end of the item (end is None)."""
+    match = SECTION_PATTERN.match(text.strip())
+    if not match or not any(match.groups()):
+        return None
+    start = parse_timestamp(match.group(1)) if match.group(1) else 0.0
+    end = parse_timestamp(match.group(2)) if match.group(2) else None
+    if end is not None and end <= start:
+        return None
+    return [start, end]
+
+def format_section(section):
+    start, end = section
+    return f"{format_timestamp(start)}-{format_timestamp(end) if end is not None else ''}"
+
+def list_section(token):
+    """Time range in a URL list token, or None. Plain seconds ('101-102') read as an
+    episode ID there, so a range needs a ':' in it ('1:00-2:00') or a leading '@' ('@90-120')."""
+    if token.startswith('@'):
+        return parse_section(token[1:])
+    if ':' in token:
+        return parse_section(token)
+    return None
+
+def parse_url_list(lines):
+    """Entries from a URL list: one URL per line, optionally preceded by an episode
+    identifier and/or a time range to download only that section"""
+    parsed_urls = []
+    for line in lines:
+        parts = line.split()
+        if not parts:
+            continue
+        url = complete_url(parts[-1])  # Take the last part as URL
+        section = list_section(parts[-2]) if len(parts) >= 2 else None
+        if section:
+            parts = parts[:-2] + parts[-1:]
+        parsed_urls.append({
+            'episode_id': parts[0] if len(parts) >= 2 else None,
+            'url': url,
+            'section': section,
+        })
+    return parsed_urls
+
+EXTRACTOR_INDEX_PATH = os.path.join(os.path.expanduser('~'), '.ytdl_extractor_index.json')
+EXTRACTOR_INDEX_FORMAT = 1  # bump when the cached layout or the expansion rules change
+EXTRACTOR_INDEX_EXPANSIONS = 8192  # host spellings per pattern before it is checked for every URL
+HOST_WILDCARD = '\0'  # stands for any run of characters in an expanded host
+HOST_TERMINATORS = '/?#:'
+URL_SCHEME = re.compile(r'(?i)[a-z][a-z0-9+.-]*:')
+BARE_HOST_URL = re.compile(r'[^\s/]+\.[^\s/]+/')  # www.youtube.com/watch?v=X
+
+# yt-dlp matches these so it can refuse them; they are rejected at import instead
+UNSUPPORTED_SITES = {
+    'KnownDRM': "site uses DRM protection",
+    'KnownPiracy': "site is known for piracy",
+    'KnownLiability': "site will not be supported",
+}
+
+def split_host(text):
+    """(host, complete) for a URL or an expanded URL pattern. Strings without '//', such as
+    'ytsearch5:query', use their leading word as the host. complete is False while the
+    host could still continue."""
+    match = URL_SCHEME.match(text)
+    if match and text[match.end():match.end() + 2] == '//':
+        rest = text[match.end() + 2:]
+    elif match and text[match.end():] in ('', '/'):
+        return '', False
+    elif text.startswith('//'):
+        rest = text[2:]
+    elif text in ('', '/'):
+        return '', False
+    else:
+        rest = text
+    for i, char in enumerate(rest):
+        if char in HOST_TERMINATORS:
+            return rest[:i].lower(), True
+    return rest.lower(), False
+
+class ExtractorIndex:
+    """Hostname -> candidate extractors, built from yt-dlp's _VALID_URL patterns.
+    Each pattern's host part is expanded into its literal spellings ('(?:www\\.)?vimeo\\.com'
+    gives vimeo.com and www.vimeo.com); spellings with a wildcard are indexed by their
+    literal domain suffix or host prefix. Patterns whose host cannot be pinned down are
+    checked for every URL. A lookup only runs suitable() on the candidates, in yt-dlp's own
+    order, so it returns the extractor the full linear scan would."""
+
+    def __init__(self, data, classes):
+        self.classes = classes
+        self.hosts = data['hosts']
+        self.prefixes = data['prefixes']
+        self.wildcard = data['wildcard']
+        self.prefix_lengths = sorted({len(prefix) for prefix in self.prefixes}, reverse=True)
+        self.cache_error = None  # why the index could not be cached, for the caller to report
+
+    @staticmethod
+    def signature(classes):
+        return {
+            'format': EXTRACTOR_INDEX_FORMAT,
+            'yt_dlp': load_yt_dlp().version.__version__,
+            'extractors': [ie.ie_key() for ie in classes],
+        }
+
+    @classmethod
+    def load(cls, path=EXTRACTOR_INDEX_PATH):
+        """The cached index when it matches the installed yt-dlp and extractor set,
+        otherwise a freshly built one (saved for next time)"""
+        load_yt_dlp()
+        from yt_dlp.extractor import gen_extractor_classes
+        classes = list(gen_extractor_classes())
+        signature = cls.signature(classes)
+        try:
+            with open(path, 'r') as f:
+                data = json.load(f)
+            if data.get('signature') == signature:
+                return cls(data, classes)
+        except (OSError, ValueError):
+            pass
+        data = cls.build(classes)
+        data['signature'] = signature
+        index = cls(data, classes)
+        try:
+            temp_path = f'{path}.{os.getpid()}.tmp'
+            with open(temp_path, 'w') as f:
+                json.dump(data, f, separators=(',', ':'))
+            os.replace(temp_path, path)
+        except OSError as e:
+            index.cache_error = str(e)
+        return index
+
+    @classmethod
+    def build(cls, classes):
+        hosts, prefixes, wildcard = {}, {}, []
+        for position, ie in enumerate(classes):
+            patterns = ie._VALID_URL
+            if not patterns:  # embed-only extractors never match a URL directly
+                continue
+            keys = set()
+            for pattern in [patterns] if isinstance(patterns, str) else patterns:
+                pattern_keys = cls.host_keys(pattern)
+                if pattern_keys is None:
+                    keys = None
+                    break
+                keys |= pattern_keys
+            if keys is None:
+                wildcard.append(position)
+                continue
+            for table, key in keys:
+                (hosts if table == 'host' else prefixes).setdefault(key, []).append(position)
+        return {'hosts': hosts, 'prefixes': prefixes, 'wildcard': wildcard}
+
+    @classmethod
+    def host_keys(cls, pattern):
+        """{('host', domain suffix) or ('prefix', host prefix)} for a URL pattern, or
+        None if the pattern has to be checked for every URL"""
+        try:
+            from re import _parser as sre_parse
+        except ImportError:  # Python < 3.11
+            import sre_parse
+        try:
+            spellings = cls.expand([''], sre_parse.parse(pattern), sre_parse)
+        except (re.error, OverflowError):
+            return None
+
+        keys = set()
+        for spelling in spellings:
+            host, complete = split_host(spelling)
+            if not complete:
+                host += HOST_WILDCARD
+            if HOST_WILDCARD not in host:
+                keys.add(('host', host))
+                continue
+            # 'x\0.wistia.com' -> wistia.com; 'dailymotion.\0' -> prefix dailymotion.
+            suffix = host[host.rfind(HOST_WILDCARD) + 1:]
+            suffix = suffix[1:] if suffix.startswith('.') else suffix.partition('.')[2]
+            prefix = host[:host.find(HOST_WILDCARD)]
+            if '.' in suffix:
+                keys.add(('host', suffix))
+            elif len(prefix) >= 4 and prefix != 'www.':
+                keys.add(('prefix', prefix))
+            else:
+                return None
+        return keys
+
+    @classmethod
+    def expand(cls, spellings, tokens, sre_parse):
+        """Extend each spelling by a parsed regex until its host is complete.
+        Raises OverflowError past EXTRACTOR_INDEX_EXPANSIONS spellings."""
+        constants = sre_parse  # re._parser re-exports the opcode constants
+        for op, arg in tokens:
+            live = [s for s in spellings if not split_host(s)[1]]
+            if not live:
+                break
+            if op is constants.LITERAL:
+                grown = [s + chr(arg) for s in live]
+            elif op is constants.IN:
+                chars = [chr(value) for kind, value in arg if kind is constants.LITERAL]
+                if len(chars) != len(arg) or len(chars) > 8:
+                    chars = [HOST_WILDCARD]
+                grown = [s + char for s in live for char in chars]
+            elif op is constants.BRANCH:
+                grown = [g for branch in arg[1] for g in cls.expand(live, branch, sre_parse)]
+            elif op is constants.SUBPATTERN:
+                grown = cls.expand(live, arg[-1], sre_parse)
+            elif op in (constants.MAX_REPEAT, constants.MIN_REPEAT) and arg[:2] in ((0, 1), (1, 1)):
+                grown = cls.expand(live, arg[2], sre_parse)
+                if arg[0] == 0:
+                    grown = live + grown
+            elif op in (constants.AT, constants.ASSERT, constants.ASSERT_NOT):
+                grown = live  # anchors and lookarounds consume nothing
+            else:
+                grown = [s + HOST_WILDCARD for s in live]
+            spellings = list(dict.fromkeys([s for s in spellings if split_host(s)[1]] + grown))
+            if len(spellings) > EXTRACTOR_INDEX_EXPANSIONS:
+                raise OverflowError(len(spellings))
+        return spellings
+
+    def candidates(self, url):
+        """Extractors that could match url, in yt-dlp's order"""
+        host, _ = split_host(url)
+        if not host:  # a bare 'scheme:' such as 'tvpstream:'
+            host = url.partition(':')[0].lower()
+        positions = set(self.wildcard)
+        labels = host.split('.')
+        for i in range(len(labels)):
+            positions.update(self.hosts.get('.'.join(labels[i:]), ()))
+        for length in self.prefix_lengths:
+            if length <= len(host):
+                positions.update(self.prefixes.get(host[:length], ()))
+        return [self.classes[position] for position in sorted(positions)]
+
+    def match(self, url, allowed=None):
+        """The first extractor suitable for url (what yt-dlp would pick), optionally
+        limited to the ie_keys in allowed"""
+        for ie in self.candidates(url):
+            if (allowed is None or ie.ie_key() in allowed) and ie.suitable(url):
+                return ie
+        return None
+
+_extractor_index = None
+_extractor_index_lock = threading.Lock()
+
+def extractor_index():
+    """Shared ExtractorIndex, loaded from the disk cache on first use"""
+    global _extractor_index
+    with _extractor_index_lock:
+        if _extractor_index is None:
+            _extractor_index = ExtractorIndex.load()
+        return _extractor_index
+
+IMPORT_REJECTS_SHOWN = 10  # rejected URLs listed in the import summary
+
+def complete_url(url):
+    """url with https:// in front when it starts with a host name but no scheme"""
+    if '://' not in url and not url.startswith('//') and BARE_HOST_URL.match(url):
+        return 'https://' + url
+    return url
+
+def url_problem(url):
+    """Why an imported URL cannot be downloaded, or None: sites yt-dlp refuses and
+    strings the generic extractor would not accept as URLs"""
+    ie = extractor_index().match(url)
+    if ie is None:
+        return "no extractor accepts it"
+    if ie.ie_key() in UNSUPPORTED_SITES:
+        return f"unsupported: {UNSUPPORTED_SITES[ie.ie_key()]}"
+    if ie.ie_key() == 'Generic':
+        parsed = urllib.parse.urlparse(url)
+        if parsed.scheme not in ('http', 'https') or not parsed.hostname:
+            return "not a valid URL"
+    return None
+
+def canonical_media(url, noplaylist=True):
+    """(media key, canonical URL) for an imported URL, so youtu.be/X, watch?v=X&t=30 and
+    shorts/X all become ('Youtube:X', watch URL). The key is None when only the generic
+    extractor would handle the URL."""
+    parsed = urllib.parse.urlparse(url)
+    if noplaylist and parsed.hostname in YOUTUBE_HOSTS:
+        # A watch link inside a playlist downloads just the video when playlists are off
+        query = urllib.parse.parse_qs(parsed.query)
+        if query.get('v') and query.get('list'):
+            url = YOUTUBE_WATCH_URL.format(query['v'][0])
+
+    ie = extractor_index().match(url)
+    if ie is None or ie.ie_key() == 'Generic':
+        return None, url
+    video_id = ie.get_temp_id(url)
+    if not video_id:
+        return None, url
+    if ie.ie_key() == 'Youtube':
+        url = YOUTUBE_WATCH_URL.format(video_id)
+    return f'{ie.ie_key()}:{video_id}', url
+
+def format_identity(options):
+    """What a job's options produce, so jobs for the same media only share output when it matches"""
+    codecs = [pp.get('preferredcodec') for pp in options.get('postprocessors', [])]
+    targets = (options.get('output_targets') or {}).get('codecs')
+    return json.dumps([options.get('format'), options.get('merge_output_format'), codecs, targets,
+                       options.get('section')])
+
+FICLONE = 0x40049409  # from linux/fs.h
+
+def link_media(src, dst):
+    """Give dst the contents of src without downloading it again: a reflink where the
+    filesystem supports it, else a hardlink, else a copy. Returns the method used."""
+    if os.path.exists(dst):
+        return 'existing'
+    os.makedirs(os.path.dirname(dst) or '.', exist_ok=True)
+    try:
+        import fcntl
+        with open(src, 'rb') as source, open(dst, 'wb') as target:
+            fcntl.ioctl(target.fileno(), FICLONE, source.fileno())
+        return 'reflink'
+    except (ImportError, OSError):
+        if os.path.exists(dst):
+            os.remove(dst)
+    try:
+        os.link(src, dst)
+        return 'hardlink'
+    except OSError:
+        shutil.copy2(src, dst)
+        return 'copy'
+
+class MediaFlights:
+    """Single-flight table keyed by (media key, format identity): the first job for a
+    media item downloads it, jobs arriving while it is in flight attach to it, and later
+    jobs reuse the finished files."""
+
+    def __init__(self):
+        self.finished = {}  # flight key -> output files
+        self.in_flight = {}  # flight key -> leader job id
+        self.waiters = {}  # flight key -> attached jobs
+
+    def claim(self, key, job):
+        """'leader' if the job should download, 'finished' or 'attached' otherwise"""
+        if key is None or key[0] is None:
+            return 'leader'
+        files = self.finished.get(key)
+        if files and all(os.path.exists(path) for path in files):
+            return 'finished'
+        if key in self.in_flight:
+            self.waiters.setdefault(key, []).append(job)
+            return 'attached'
+        self.in_flight[key] = job['id']
+        return 'leader'
+
+    def complete(self, key, files):
+        """Record the leader's output; returns the jobs that were attached to it"""
+        self.in_flight.pop(key, None)
+        if files:
+            self.finished[key] = files
+        return self.waiters.pop(key, [])
+
+    def fail(self, key):
+        """The leader failed; returns the attached jobs so they can run on their own"""
+        self.in_flight.pop(key, None)
+        return self.waiters.pop(key, [])
+
+class DownloadQueue:
+    """Bulk download jobs. The next job is chosen when the previous one finishes,
+    so reordering, pinning or pausing never touches the transfer in flight."""
+
+    def __init__(self, entries=(), order='fifo'):
+        self.jobs = []
+        self.order = order
+        self.dispatched = 0
+        for entry in entries:
+            self.add(entry)
+
+    def __len__(self):
+        return len(self.jobs)
+
+    def find_duplicate(self, entry):
+        """A live job for the same media and output name as an entry, if any"""
+        if not entry.get('media_key'):
+            return None
+        for job in self.jobs:
+            if (job.get('media_key') == entry['media_key'] and job.get('episode_id') == entry.get('episode_id')
+                    and job.get('section') == entry.get('section') and job['state'] != 'failed'):
+                return job
+        return None
+
+    def add(self, entry):
+        """Queue an entry; returns None if it duplicates a job already queued"""
+        if self.find_duplicate(entry):
+            return None
+        job = dict(entry)
+        job.update({
+            'id': len(self.jobs),
+            'state': 'pending',  # pending, active, attached, done, failed, deferred, cancelled, sent
+            'priority': entry.get('priority', 0),
+            'pinned': False,
+            'paused': False,
+            'estimate_bytes': None,
+            'duration': None,
+            'retry_pass': entry.get('retry_pass', 0),
+            'started_seq': None,
+            'held': None,  # why a pending job is held back (disk space)
+        })
+        self.jobs.append(job)
+        return job
+
+    def get(self, job_id):
+        return self.jobs[job_id]
+
+    def estimated_size(self, job):
+        if job['estimate_bytes']:
+            return job['estimate_bytes']
+        if job['duration']:
+            return job['duration'] * ASSUMED_BYTES_PER_SECOND
+        return None
+
+    def _sort_key(self, job):
+        # Pinned jobs always go first; jobs without an estimate go last in size orders
+        if self.order in ('shortest', 'largest'):
+            size = self.estimated_size(job)
+            policy_key = (size is None, (size or 0) * (1 if self.order == 'shortest' else -1))
+        elif self.order == 'priority':
+            policy_key = (False, -job['priority'])
+        elif self.order == 'episode':
+            episode_id = job.get('episode_id')
+            policy_key = (episode_id is None, episode_sort_key(episode_id or ''))
+        else:
+            policy_key = (False, 0)
+        return (not job['pinned'], policy_key, job['id'])
+
+    def pending_jobs(self):
+        """Pending jobs in the order they will be started (paused ones included)"""
+        return sorted((job for job in self.jobs if job['state'] == 'pending'), key=self._sort_key)
+
+    def ordered_jobs(self):
+        """Every job for display: started ones first, then the pending order"""
+        # Jobs cancelled or handed off before they started have no started_seq
+        started = sorted((job for job in self.jobs if job['state'] != 'pending'),
+                         key=lambda job: (job['started_seq'] is None, job['started_seq'] or 0, job['id']))
+        return started + self.pending_jobs()
+
+    def has_pending(self):
+        return any(job['state'] == 'pending' for job in self.jobs)
+
+    def paused_count(self):
+        return sum(1 for job in self.jobs if job['state'] == 'pending' and job['paused'])
+
+    def held_count(self):
+        return sum(1 for job in self.jobs if job['state'] == 'pending' and job['held'] and not job['paused'])
+
+    def next_job(self, admit=None):
+        """Start the first runnable pending job. admit(job) can hold a job back by
+        returning a reason, which is kept in job['held'] until it is admitted."""
+        for job in self.pending_jobs():
+            if job['paused']:
+                continue
+            job['held'] = admit(job) if admit else None
+            if not job['held']:
+                job['state'] = 'active'
+                job['started_seq'] = self.dispatched
+                self.dispatched += 1
+                return job
+        return None
+
+    def finish(self, job, state):
+        job['state'] = state
+
+    def deferred_jobs(self):
+        return [job for job in self.jobs if job['state'] == 'deferred']
+
+    def requeue_deferred(self):
+        """Move deferred jobs back to pending for a retry pass"""
+        jobs = self.deferred_jobs()
+        for job in jobs:
+            job['state'] = 'pending'
+            job['retry_pass'] += 1
+        return jobs
+
+    def started_count(self):
+        return sum(1 for job in self.jobs if job['state'] != 'pending')
+
+    def set_estimate(self, job_id, estimate_bytes, duration):
+        job = self.jobs[job_id]
+        job['estimate_bytes'] = estimate_bytes
+        job['duration'] = duration
+
+    def move(self, job_id, offset):
+        """Move a pending job up or down; switches the queue to manual priority"""
+        pending = self.pending_jobs()
+        index = next((i for i, job in enumerate(pending) if job['id'] == job_id), None)
+        if index is None:
+            return False
+        target = max(0, min(len(pending) - 1, index + offset))
+        pending.insert(target, pending.pop(index))
+        # Freeze the current order into priorities so the move survives re-sorting
+        for rank, job in enumerate(pending):
+            job['priority'] = len(pending) - rank
+        self.order = 'priority'
+        return True
+
+    def set_pinned(self, job_id, pinned):
+        self.jobs[job_id]['pinned'] = pinned
+
+    def set_paused(self, job_id, paused):
+        self.jobs[job_id]['paused'] = paused
+
+class BatchReport:
+    """Per-job timings for a bulk run, used to compare queue orders by turnaround"""
+
+    def __init__(self, order):
+        self.order = order
+        self.started = time.time()
+        self.jobs = []
+        self._open = {}
+        self._latest = {}  # job id -> its latest record
+        self.files = []  # checksum manifest entries
+        self.integrity = []  # probe_media results from the integrity sweep
+
+    def job_started(self, job):
+        # One record per attempt, so retry passes show up separately
+        record = {
+            'url': job['url'],
+            'episode_id': job.get('episode_id'),
+            'estimate_bytes': job.get('estimate_bytes'),
+            'duration': job.get('duration'),
+            'retry_pass': job.get('retry_pass', 0),
+            'integrity_requeues': job.get('integrity_requeues', 0),
+            'proxy': job.get('proxy'),
+            'started': time.time(),
+        }
+        self.jobs.append(record)
+        self._open[job['id']] = record
+        self._latest[job['id']] = record
+
+    def job_finished(self, job, status, bytes_downloaded=0, category=None, details=None):
+        record = self._open.pop(job['id'], None)
+        if record is None:
+            return
+        now = time.time()
+        record.update({
+            'status': status,
+            'category': category,
+            'bytes': bytes_downloaded,
+            'elapsed': round(now - record['started'], 2),
+            'completed_at': round(now - self.started, 2),
+        })
+        if details:
+            record.update(details)
+
+    def job_failed_check(self, job, problems, requeued):
+        """A finished job's files failed the integrity sweep: its attempt counts as failed"""
+        record = self._latest.get(job['id'])
+        if record is not None:
+            record.update({'status': 'failed', 'category': 'integrity', 'integrity_problems': problems,
+                           'requeued': requeued})
+
+    def summary(self):
+        elapsed = max(time.time() - self.started, 1e-6)
+        done = [r for r in self.jobs if r.get('status') == 'done']
+        turnaround = sum(r['completed_at'] for r in done) / len(done) if done else 0
+        summary = {
+            'order': self.order,
+            'elapsed': round(elapsed, 2),
+            'completed': len(done),
+            'failed': sum(1 for r in self.jobs if r.get('status') == 'failed'),
+            'items_per_hour': round(len(done) * 3600 / elapsed, 2),
+            'mean_turnaround': round(turnaround, 2),
+            'bytes': sum(r.get('bytes') or 0 for r in self.jobs),
+        }
+        ranked = [r for r in self.jobs if r.get('status') == 'done' and r.get('default_format_bytes')]
+        if ranked:
+            summary['format_bytes_saved'] = sum(r['default_format_bytes'] - r['selected_format_bytes']
+                                                for r in ranked)
+        streamed = [r for r in self.jobs if r.get('bytes_fetched')]
+        if streamed:
+            fetched = sum(r['bytes_fetched'] for r in streamed)
+            summary['write_amplification'] = round(sum(r['bytes_written'] for r in streamed) / fetched, 3)
+        if self.integrity:
+            summary['files_verified'] = len(self.integrity)
+            summary['integrity_failures'] = sum(1 for result in self.integrity if result['problems'])
+        return summary
+
+    def save(self, path=BATCH_REPORT_PATH):
+        report = {
+            'started': datetime.fromtimestamp(self.started).strftime('%Y-%m-%d %H:%M:%S'),
+            'summary': self.summary(),
+            'jobs': self.jobs,
+            'integrity': self.integrity,
+        }
+        with open(path, 'w') as f:
+            json.dump(report, f, indent=4)
+
+    def save_manifest(self, directory):
+        """Write the batch's checksum manifest to directory; returns its path.
+        Files under directory are listed relative to it."""
+        stamp = datetime.fromtimestamp(self.started).strftime('%Y%m%d-%H%M%S')
+        path = os.path.join(directory, MANIFEST_NAME.format(stamp))
+        files = []
+        for entry in self.files:
+            relative = os.path.relpath(entry['path'], directory)
+            files.append(dict(entry, path=entry['path'] if relative.startswith(os.pardir) else relative))
+        with open(path, 'w') as f:
+            json.dump({'created': datetime.now().strftime('%Y-%m-%d %H:%M:%S'), 'files': files}, f, indent=4)
+        return path
+
+# Integrity sweep: ffprobe checks every file a batch produced against its extracted
+# metadata, so truncated merges and missing fragments are found before anyone plays them
+INTEGRITY_PROBES = max(2, os.cpu_count() or 2)  # ffprobe processes at once
+INTEGRITY_TOLERANCE = 2.0  # seconds of duration difference allowed...
+INTEGRITY_TOLERANCE_FRACTION = 0.01  # ...or this share of the duration, if larger
+INTEGRITY_TAIL = 30.0  # seconds before the expected end where reading packets starts
+INTEGRITY_REQUEUES = 1  # re-downloads per job after a failed check
+
+def media_expectation(info, path):
+    """What ffprobe should find in a finished file: the item's duration (the section's,
+    for sections) and whether it has video and audio streams; None where unknown"""
+    duration = info.get('duration')
+    if duration and info.get('section_start') is not None and info.get('section_end') is None:
+        duration -= info['section_start']  # yt-dlp only shortens the duration for closed ranges
+    formats = info.get('requested_formats') or [info]
+    vcodecs = [fmt.get('vcodec') for fmt in formats]
+    acodecs = [fmt.get('acodec') for fmt in formats]
+    video = None if None in vcodecs else any(codec != 'none' for codec in vcodecs)
+    if os.path.splitext(path)[1][1:] in AUDIO_ENCODERS:
+        video = False  # converted to audio
+    return {
+        'path': path,
+        'duration': duration,
+        'section': info.get('section_start') is not None,
+        'video': video,
+        'audio': None if None in acodecs else any(codec != 'none' for codec in acodecs),
+    }
+
+def run_ffprobe(ffprobe, path, *args):
+    """ffprobe's JSON output for path; raises OSError if it fails"""
+    probe = subprocess.run([ffprobe, '-v', 'error', *args, '-of', 'json', path],
+                           capture_output=True, text=True, errors='replace')
+    if probe.returncode:
+        raise OSError(f"ffprobe failed: {(probe.stderr.strip().splitlines() or [probe.returncode])[-1]}")
+    return json.loads(probe.stdout or '{}')
+
+def probe_media(expected, ffprobe):
+    """Check one file with ffprobe; returns the expectation with the stream counts, the
+    time each stream's packets actually reach, and a list of problems (empty if it passed).
+    A truncated file can keep a header with the full duration, so the packets are read
+    from INTEGRITY_TAIL before the expected end to INTEGRITY_TAIL after it."""
+    result = dict(expected, problems=[])
+    path = expected['path']
+    if not os.path.exists(path) or not os.path.getsize(path):
+        result['problems'].append("missing or empty")
+        return result
+    try:
+        header = run_ffprobe(ffprobe, path, '-show_entries', 'format=duration,start_time:stream=index,codec_type')
+        start = float(header.get('format', {}).get('start_time') or 0)
+        header_duration = float(header.get('format', {}).get('duration') or 0)
+        target = expected['duration'] or header_duration
+        tail = run_ffprobe(ffprobe, path, '-read_intervals',
+                           f"{start + max(0.0, target - INTEGRITY_TAIL)}%+{2 * INTEGRITY_TAIL}",
+                           '-show_entries', 'packet=stream_index,pts_time,duration_time')
+    except (OSError, ValueError) as e:
+        result['problems'].append(str(e))
+        return result
+
+    kinds = {stream['index']: stream.get('codec_type') for stream in header.get('streams', [])}
+    ends = {}  # stream kind -> where its last packet ends, from the start of the file
+    for packet in tail.get('packets', []):
+        kind = kinds.get(packet.get('stream_index'))
+        if kind in ('video', 'audio') and packet.get('pts_time') not in (None, 'N/A'):
+            end = float(packet['pts_time']) + float(packet.get('duration_time') or 0) - start
+            ends[kind] = max(ends.get(kind, 0.0), end)
+    result['streams'] = {kind: list(kinds.values()).count(kind) for kind in ('video', 'audio')}
+    result['probed_duration'] = round(max(ends.values(), default=0.0), 2)
+    for kind in ('video', 'audio'):
+        if expected[kind] and not result['streams'][kind]:
+            result['problems'].append(f"no {kind} stream")
+    if target:
+        tolerance = max(INTEGRITY_TOLERANCE, target * INTEGRITY_TOLERANCE_FRACTION)
+        for kind in ('video', 'audio'):
+            if result['streams'][kind] and ends.get(kind, 0.0) < target - tolerance:
+                result['problems'].append(f"truncated: {kind} ends at {ends.get(kind, 0.0):.1f}s of {target:.1f}s")
+        # Stream-copied section cuts start at the keyframe before the range, so they may run long
+        if expected['duration'] and not expected['section'] and header_duration > expected['duration'] + tolerance:
+            result['problems'].append(f"longer than expected: {header_duration:.1f}s of {expected['duration']:.1f}s")
+    return result
+
+class IntegritySweepWorker(QThread):
+    """Runs probe_media over a batch's files, INTEGRITY_PROBES ffprobe processes at once"""
+    verified = pyqtSignal(list)  # probe_media results, in the order given
+    failed = pyqtSignal(str)
+
+    def __init__(self, expectations):
+        super().__init__()
+        self.expectations = expectations
+        self.is_cancelled = False
+
+    def run(self):
+        try:
+            load_yt_dlp()
+            from yt_dlp.postprocessor.ffmpeg import FFmpegPostProcessor
+            ffmpeg = FFmpegPostProcessor()
+            if not ffmpeg.probe_available:
+                raise OSError("ffprobe not found")
+            ffprobe = ffmpeg.probe_executable
+            with concurrent.futures.ThreadPoolExecutor(INTEGRITY_PROBES) as pool:
+                results = list(pool.map(
+                    lambda expected: None if self.is_cancelled else probe_media(expected, ffprobe),
+                    self.expectations))
+        except Exception as e:
+            self.failed.emit(str(e))
+            return
+        if not self.is_cancelled:
+            self.verified.emit(results)
+
+    def cancel(self):
+        self.is_cancelled = True
+
+class QueueProbeWorker(QThread):
+    """Extracts metadata for queued jobs in the background to get size/duration estimates"""
+    estimated = pyqtSignal(int, object, object)  # job id, estimated bytes, duration
+
+    def __init__(self, jobs, options):
+        super().__init__()
+        self.jobs = [(job['id'], job['url']) for job in jobs]
+        self.options = options
+        self.is_cancelled = False
+
+    def run(self):
+        ydl_opts = {
+            'quiet': True,
+            'no_warnings': True,
+            'noplaylist': True,
+            'format': self.options.get('format', 'bestvideo+bestaudio/best'),
+            'logger': YdlErrorCollector(),
+        }
+        if 'proxy' in self.options:
+            ydl_opts['proxy'] = self.options['proxy']
+        if self.options.get('format_ranking'):
+            ydl_opts['format_ranking'] = self.options['format_ranking']
+
+        with yt_dlp_extensions().YoutubeDL(ydl_opts) as ydl:
+            for job_id, url in self.jobs:
+                if self.is_cancelled:
+                    return
+                try:
+                    info = ydl.extract_info(url, download=False)
+                except Exception:
+                    continue
+                if info:
+                    self.estimated.emit(job_id, estimate_download_bytes(info), info.get('duration'))
+
+    def cancel(self):
+        self.is_cancelled = True
+
+class UrlImportWorker(QThread):
+    """Checks and normalises imported URLs off the GUI thread; the first check builds
+    the extractor index, which takes seconds"""
+    checked = pyqtSignal(list, list, list, object)  # entries, playlist entries, rejected, index cache error
+
+    def __init__(self, entries, noplaylist, playlist_sync):
+        super().__init__()
+        self.entries = entries
+        self.noplaylist = noplaylist
+        self.playlist_sync = playlist_sync
+        self.is_cancelled = False
+
+    def run(self):
+        # Unsupported sites and malformed lines are reported now, not mid-batch
+        rejected = []
+        accepted = []
+        for entry in self.entries:
+            if self.is_cancelled:
+                return
+            problem = url_problem(entry['url'])
+            if problem:
+                rejected.append(f"{entry['url']}: {problem}")
+            else:
+                accepted.append(entry)
+
+        # Playlists are listed in the background and only their new entries queued
+        sync_entries = []
+        if not self.noplaylist and self.playlist_sync:
+            sync_entries = [entry for entry in accepted if playlist_sync_candidate(entry['url'])]
+            accepted = [entry for entry in accepted if entry not in sync_entries]
+
+        # Same media under different URL spellings gets one key
+        for entry in accepted + sync_entries:
+            entry['media_key'], entry['url'] = canonical_media(entry['url'], self.noplaylist)
+
+        index = extractor_index()
+        cache_error, index.cache_error = index.cache_error, None
+        if not self.is_cancelled:
+            self.checked.emit(accepted, sync_entries, rejected, cache_error)
+
+    def cancel(self):
+        self.is_cancelled = True
+
+# Incremental playlist sync: channel and playlist URLs are listed newest first and
+# the listing stops at the first entry an earlier sync already downloaded
+PLAYLIST_SYNC_PATH = os.path.join(os.path.expanduser('~'), '.ytdl_playlist_sync.json')
+PLAYLIST_SYNC_KEEP = 5000  # downloaded entry IDs remembered per playlist
+PLAYLIST_SYNC_DEPTH = 2  # nested listings followed, such as a channel's Videos/Shorts/Live tabs
+
+def playlist_sync_candidate(url):
+    """True if the URL's extractor can return a playlist, so an import lists it
+    instead of queueing the URL as one item. Extractors that return either ('any')
+    are listed too; the sync queues the URL as one item if it turns out to be one."""
+    ie = extractor_index().match(url)
+    return (ie is not None and ie.ie_key() != 'Generic'
+            and getattr(ie, '_RETURN_TYPE', None) in ('playlist', 'any'))
+
+class PlaylistSync:
+    """Per-playlist sync state, keyed by the playlist's media key or URL: entry IDs
+    downloaded (oldest first) and the newest upload date among them, entry IDs queued
+    by a sync but not downloaded yet, and per listing URL its entry count and whether
+    it lists oldest first"""
+
+    def __init__(self, path=PLAYLIST_SYNC_PATH):
+        self.path = path
+        try:
+            with open(path) as f:
+                self.playlists = json.load(f)
+        except (OSError, ValueError):
+            self.playlists = {}
+
+    def state(self, key):
+        """Copy of a playlist's state for a sync running on another thread"""
+        state = self.playlists.get(key, {})
+        return {
+            'seen': set(state.get('seen', ())),
+            'pending': set(state.get('pending', ())),
+            'newest_date': state.get('newest_date'),
+            'listings': dict(state.get('listings', {})),
+        }
+
+    def record_sync(self, key, result):
+        state = self.playlists.setdefault(key, {})
+        seen = set(state.get('seen', ()))
+        state['pending'] = sorted(set(result['pending']) - seen)
+        state.setdefault('listings', {}).update(result['listings'])
+        state['last_sync'] = datetime.now().strftime('%Y-%m-%d %H:%M:%S')
+        self.save()
+
+    def mark_downloaded(self, key, entry_id, upload_date=None):
+        state = self.playlists.setdefault(key, {})
+        seen = state.setdefault('seen', [])
+        if entry_id not in seen:
+            seen.append(entry_id)
+            del seen[:-PLAYLIST_SYNC_KEEP]
+        if entry_id in state.get('pending', ()):
+            state['pending'].remove(entry_id)
+        if upload_date and upload_date > (state.get('newest_date') or ''):
+            state['newest_date'] = upload_date
+        self.save()
+
+    def save(self):
+        tmp_path = self.path + '.tmp'
+        with open(tmp_path, 'w') as f:
+            json.dump(self.playlists, f)
+        os.replace(tmp_path, self.path)
+
+class PlaylistSyncWorker(QThread):
+    """Lists playlists in the background and reports the entries not downloaded yet.
+    Listings are read newest first and stop at the first entry already downloaded,
+    once every entry an earlier sync queued but did not download has come up again.
+    Listings that turn out to add entries at the end (their count grew while the first
+    entry is known) are read in full from then on."""
+    synced = pyqtSignal(dict)
+
+    def __init__(self, entries, states, options):
+        super().__init__()
+        self.entries = entries  # import entries with a 'sync_key'
+        self.states = states  # sync key -> PlaylistSync.state()
+        self.options = options
+        self.is_cancelled = False
+
+    def run(self):
+        ydl_opts = {
+            'quiet': True,
+            'no_warnings': True,
+            'extract_flat': 'in_playlist',
+            'lazy_playlist': True,
+            'logger': YdlErrorCollector(),
+        }
+        if 'proxy' in self.options:
+            ydl_opts['proxy'] = self.options['proxy']
+
+        load_yt_dlp()
+        with yt_dlp_extensions().YoutubeDL(ydl_opts) as ydl:
+            for entry in self.entries:
+                if self.is_cancelled:
+                    return
+                state = self.states[entry['sync_key']]
+                result = {'entry': entry, 'key': entry['sync_key'], 'new': [], 'listed': 0,
+                          'stopped': False, 'listings': {}, 'error': None,
+                          'remaining': state['pending'] - state['seen'], 'new_ids': set()}
+                started, requests = time.monotonic(), ydl.request_count
+                try:
+                    self.list_new(ydl, entry['url'], state, result, 0)
+                except Exception as e:
+                    result['error'] = str(e)
+                result['elapsed'] = time.monotonic() - started
+                result['requests'] = ydl.request_count - requests
+                # Queued entries not listed again stay pending unless the listing was read in full
+                remaining = result.pop('remaining')
+                del result['new_ids']
+                kept = remaining if result['stopped'] or result['error'] else set()
+                result['pending'] = kept | {item['id'] for item in result['new']}
+                self.synced.emit(result)
+
+    def list_new(self, ydl, url, state, result, depth):
+        info = ydl.extract_info(url, download=False, process=False)
+        hops = 0
+        while info and info.get('_type') in ('url', 'url_transparent') and hops < PLAYLIST_SYNC_DEPTH:
+            info = ydl.extract_info(info['url'], download=False, process=False, ie_key=info.get('ie_key'))
+            hops += 1
+        if not info:
+            return
+        if info.get('_type') not in ('playlist', 'multi_video'):
+            self.add_entry(info, url, state, result)
+            return
+
+        listing = state['listings'].get(url, {})
+        count = info.get('playlist_count')
+        oldest_first = listing.get('oldest_first', False)
+        first = True
+        for entry in info.get('entries') or ():
+            if self.is_cancelled:
+                result['stopped'] = True
+                break
+            if not entry:
+                continue
+            kind = self.listing_kind(ydl, entry)
+            # An 'any' entry is extracted to tell, unless it was downloaded before and so is an item
+            if depth < PLAYLIST_SYNC_DEPTH and (
+                    kind == 'playlist' or (kind == 'any' and (entry.get('id') or entry.get('url')) not in state['seen'])):
+                self.list_new(ydl, entry['url'], state, result, depth + 1)
+                continue
+            result['listed'] += 1
+            known = (entry.get('id') or entry.get('url')) in state['seen']
+            if known:
+                result['remaining'].discard(entry.get('id') or entry.get('url'))
+            if first and known and count and listing.get('count') and count > listing['count']:
+                oldest_first = True  # grew, but not at the front
+            first = False
+            older = entry.get('upload_date') and state['newest_date'] and entry['upload_date'] < state['newest_date']
+            if (known or older) and not oldest_first and not result['remaining']:
+                result['stopped'] = True
+                break
+            if not known:
+                self.add_entry(entry, entry.get('url'), state, result)
+        result['listings'][url] = {'count': count, 'oldest_first': oldest_first}
+
+    @staticmethod
+    def listing_kind(ydl, entry):
+        """For a flat entry: 'playlist' if its extractor only returns playlists (a channel
+        tab), 'any' if it can return either, so only the extracted result's _type tells;
+        None for items and extractors that do not say"""
+        if entry.get('_type') not in ('url', 'url_transparent') or not entry.get('ie_key'):
+            return None
+        ie = ydl.get_info_extractor(entry['ie_key'])
+        kind = getattr(ie, '_RETURN_TYPE', None)
+        return kind if ie.ie_key() != 'Generic' and kind in ('playlist', 'any') else None
+
+    @staticmethod
+    def add_entry(entry, url, state, result):
+        entry_id = entry.get('id') or url  # flat entries from feeds may only have a URL
+        if not entry_id or entry_id in state['seen'] or not url:
+            return
+        if entry_id in result['new_ids']:
+            return  # also listed on another tab
+        result['new_ids'].add(entry_id)
+        result['remaining'].discard(entry_id)
+        result['new'].append({
+            'id': entry_id,
+            'url': entry.get('webpage_url') or url,
+            'title': entry.get('title'),
+            'upload_date': entry.get('upload_date'),
+        })
+
+    def cancel(self):
+        self.is_cancelled = True
+
+# Proxy pool: strategy combo label -> ProxyPool.strategy
+PROXY_STRATEGIES = {
+    "Least Loaded": 'least_loaded',
+    "Lowest Latency": 'lowest_latency',
+}
+PROXY_PROBE_INTERVAL = 60
+PROXY_MAX_FAILURES = 3
+
+class ProxyPool:
+    """Weighted proxy endpoints with periodic health/latency probes. Proxies are
+    ejected after repeated probe or network failures and re-admitted by their
+    next successful probe."""
+
+    def __init__(self, endpoints, strategy='least_loaded', probe_url=PROXY_PROBE_URL,
+                 probe_interval=PROXY_PROBE_INTERVAL, max_failures=PROXY_MAX_FAILURES):
+        self.strategy = strategy
+        self.probe_url = probe_url
+        self.probe_interval = probe_interval
+        self.max_failures = max_failures
+        self.proxies = [{
+            'url': url,
+            'weight': weight,
+            'healthy': True,
+            'failures': 0,
+            'latency': None,
+            'active': 0,
+            'jobs': 0,
+            'failed_jobs': 0,
+            'bytes': 0,
+            'seconds': 0.0,
+            'ejections': 0,
+        } for url, weight in endpoints]
+        self.lock = threading.Lock()
+        self._stop_event = threading.Event()
+        self._thread = None
+
+    @staticmethod
+    def parse(text):
+        """Parse 'url [weight]' lines; blank lines and # comments are ignored"""
+        endpoints = []
+        for line in text.splitlines():
+            parts = line.split('#', 1)[0].split()
+            if not parts:
+                continue
+            try:
+                weight = float(parts[1]) if len(parts) > 1 else 1.0
+            except ValueError:
+                weight = 1.0
+            endpoints.append((parts[0], max(weight, 0.01)))
+        return endpoints
+
+    def __len__(self):
+        return len(self.proxies)
+
+    def _find(self, url):
+        return next((proxy for proxy in self.proxies if proxy['url'] == url), None)
+
+    def start(self):
+        if self._thread is None:
+            self._thread = threading.Thread(target=self._probe_loop, name='proxy-probe', daemon=True)
+            self._thread.start()
+
+    def stop(self):
+        self._stop_event.set()
+
+    def _probe_loop(self):
+        while not self._stop_event.is_set():
+            self.probe_all()
+            self._stop_event.wait(self.probe_interval)
+
+    def probe_all(self):
+        """Probe every proxy, ejected ones included so they can be re-admitted"""
+        with concurrent.futures.ThreadPoolExecutor(max_workers=min(8, len(self.proxies) or 1)) as pool:
+            list(pool.map(lambda proxy: self.probe(proxy['url']), list(self.proxies)))
+
+    def probe(self, url, timeout=5):
+        start = time.monotonic()
+        try:
+            scheme = urllib.parse.urlsplit(url).scheme
+            if scheme in ('http', 'https'):
+                opener = urllib.request.build_opener(urllib.request.ProxyHandler({'http': url, 'https': url}))
+                with opener.open(self.probe_url, timeout=timeout) as response:
+                    response.read(1024)
+            else:
+                # urllib cannot speak SOCKS; settle for a TCP connect check
+                parsed = urllib.parse.urlsplit(url)
+                socket.create_connection((parsed.hostname, parsed.port or 1080), timeout=timeout).close()
+        except Exception:
+            self.record_result(url, False)
+            return False
+        self.record_result(url, True, time.monotonic() - start)
+        return True
+
+    def record_result(self, url, ok, latency=None):
+        with self.lock:
+            proxy = self._find(url)
+            if proxy is None:
+                return
+            if ok:
+                proxy['failures'] = 0
+                proxy['healthy'] = True
+                if latency is not None:
+                    # Smooth latency so one slow probe does not reorder everything
+                    previous = proxy['latency']
+                    proxy['latency'] = latency if previous is None else 0.7 * previous + 0.3 * latency
+            else:
+                proxy['failures'] += 1
+                if proxy['healthy'] and proxy['failures'] >= self.max_failures:
+                    proxy['healthy'] = False
+                    proxy['ejections'] += 1
+
+    def acquire(self):
+        """Pick a proxy for a new job and count it as active; None if the pool is empty"""
+        with self.lock:
+            candidates = [proxy for proxy in self.proxies if proxy['healthy']]
+            if not candidates:
+                # Everything is ejected: keep going through the least-failing ones
+                candidates = sorted(self.proxies, key=lambda proxy: proxy['failures'])[:1]
+            if not candidates:
+                return None
+
+            def load(proxy):
+                return proxy['active'] / proxy['weight']
+
+            if self.strategy == 'lowest_latency':
+                # Latency scaled by load, so the fastest proxy is preferred without taking every job
+                proxy = min(candidates, key=lambda p: (p['latency'] is None, (p['latency'] or 0) * (1 + load(p))))
+            else:
+                proxy = min(candidates, key=lambda p: (load(p), p['latency'] or 0))
+            proxy['active'] += 1
+            proxy['jobs'] += 1
+            return proxy['url']
+
+    def release(self, url, ok=True, bytes_downloaded=0, seconds=0.0, network_error=False):
+        with self.lock:
+            proxy = self._find(url)
+            if proxy is None:
+                return
+            proxy['active'] = max(0, proxy['active'] - 1)
+            proxy['bytes'] += bytes_downloaded
+            proxy['seconds'] += seconds
+            if not ok:
+                proxy['failed_jobs'] += 1
+        # A job that failed on the network counts like a failed probe
+        if network_error:
+            self.record_result(url, False)
+
+    def stats(self):
+        with self.lock:
+            return [dict(proxy, throughput=proxy['bytes'] / proxy['seconds'] if proxy['seconds'] else 0.0)
+                    for proxy in self.proxies]
+
+SETTINGS_PATH = os.path.join(os.path.expanduser('~'), '.ytdl_settings.json')
+
+def load_settings_file(path=SETTINGS_PATH):
+    """Saved settings over SETTINGS_DEFAULTS, for modes that run without the settings tab"""
+    settings = dict(SETTINGS_DEFAULTS)
+    if os.path.exists(path):
+        with open(path, 'r') as f:
+            settings.update(json.load(f))
+    return settings
+
+# Calibration: thread count, job parallelism and transcode pool size measured on this machine
+CALIBRATION_LEVELS = (1, 2, 4, 8, 16, 32)  # connections tried for the throughput curve
+CALIBRATION_LEVEL_SECONDS = 3  # download time per connection count
+CALIBRATION_ENCODE_SECONDS = 20  # synthetic audio per test encode
+CALIBRATION_DISK_MB = 256  # written to the scratch folder
+CALIBRATION_KNEE = 0.9  # the smallest setting reaching this share of the best rate is recommended
+CALIBRATION_THREAD_CAP = 16  # recommended when the download rate still rises at the last level
+CALIBRATION_CONNECTION_MB_S = 2  # assumed per-connection rate when no test URL is given
+
+def calibration_knee(curve, ceiling=None):
+    """Smallest level in {level: rate} that reaches CALIBRATION_KNEE of the best rate,
+    or of ceiling when something else (the disk) caps the rate lower"""
+    target = CALIBRATION_KNEE * min(max(curve.values()), ceiling or math.inf)
+    return min(level for level, rate in curve.items() if rate >= target)
+
+def measure_transcode(report=print):
+    """{encodes at once: seconds of audio encoded per second} for the MP3 conversion the
+    transcode pool runs, on synthetic noise, up to twice the CPU count; {} without FFmpeg"""
+    load_yt_dlp()
+    from yt_dlp.postprocessor.ffmpeg import FFmpegPostProcessor
+    executable = FFmpegPostProcessor().executable
+    if not executable:
+        return {}
+    command = [executable, '-nostdin', '-loglevel', 'error', '-f', 'lavfi',
+               '-i', f'anoisesrc=d={CALIBRATION_ENCODE_SECONDS}:r=44100',
+               *audio_output_args('mp3'), '-f', 'null', '-']
+    cpus = os.cpu_count() or 1
+    levels = sorted({level for level in (1, 2, 4, 8, 16, 32, 64) if level <= 2 * cpus} | {cpus})
+    curve = {}
+    for level in levels:
+        start = time.monotonic()
+        encodes = [subprocess.Popen(command, stdout=subprocess.DEVNULL, stderr=subprocess.PIPE)
+                   for _ in range(level)]
+        for encode in encodes:
+            _, errors = encode.communicate()
+            if encode.returncode:
+                raise RuntimeError(f"Test encode failed: {errors.decode(errors='replace').strip()}")
+        curve[level] = level * CALIBRATION_ENCODE_SECONDS / (time.monotonic() - start)
+        report(f"Transcode: {level} at once, {curve[level]:.0f}x realtime")
+    return curve
+
+def measure_disk(directory, size_mb=CALIBRATION_DISK_MB):
+    """MB/s writing size_mb to a scratch file in directory, flushed to the disk"""
+    path = os.path.join(directory, f'.ytdl-calibration-{os.getpid()}')
+    block = os.urandom(1024 * 1024)
+    start = time.monotonic()
+    try:
+        with open(path, 'wb') as f:
+            for _ in range(size_mb):
+                f.write(block)
+        flush_timing(path)
+        return size_mb / (time.monotonic() - start)
+    finally:
+        os.remove(path)
+
+def measure_throughput(url, levels=CALIBRATION_LEVELS, seconds=CALIBRATION_LEVEL_SECONDS, report=print):
+    """{connections: MB/s} downloading url over each number of connections at once. Each
+    connection reads from its own offset (a Range request, if the server takes them) and
+    starts over at the end until time is up."""
+    try:
+        with urllib.request.urlopen(urllib.request.Request(url, method='HEAD'), timeout=20) as response:
+            size = int(response.headers.get('Content-Length') or 0)
+    except urllib.error.URLError:
+        size = 0  # no HEAD: every connection reads from the start
+
+    def read(offset, deadline, counts):
+        while time.monotonic() < deadline:
+            headers = {'Range': f'bytes={offset}-'} if offset else {}
+            with urllib.request.urlopen(urllib.request.Request(url, headers=headers), timeout=20) as response:
+                while time.monotonic() < deadline:
+                    block = response.read(256 * 1024)
+                    if not block:
+                        break
+                    counts.append(len(block))
+            offset = 0
+
+    curve = {}
+    for level in levels:
+        counts = []
+        start = time.monotonic()
+        with concurrent.futures.ThreadPoolExecutor(level) as pool:
+            readers = [pool.submit(read, size * n // level, start + seconds, counts) for n in range(level)]
+            for reader in readers:
+                reader.result()
+        curve[level] = sum(counts) / 1048576 / (time.monotonic() - start)
+        report(f"Download: {level} connection(s), {curve[level]:.1f} MB/s")
+    return curve
+
+def calibrate(scratch_dir, url=None, report=print):
+    """Measure this machine and recommend transcode_workers (encodes at once before
+    throughput stops growing), thread_count and job_parallelism. With url, thread_count is
+    the connections needed to reach the download rate the link and the scratch disk allow;
+    without it, the connections at CALIBRATION_CONNECTION_MB_S each the disk can keep up
+    with, at most one per CPU. job_parallelism is what node_capacity gives for the two."""
+    transcode = measure_transcode(report)
+    disk = measure_disk(scratch_dir)
+    report(f"Disk: {disk:.0f} MB/s to {scratch_dir}")
+    result = {
+        'transcode_workers': calibration_knee(transcode) if transcode else SETTINGS_DEFAULTS['transcode_workers'],
+    }
+    throughput = {}
+    if url:
+        throughput = measure_throughput(url, report=report)
+        thread_count = calibration_knee(throughput, disk)
+        if thread_count == max(throughput) and thread_count > CALIBRATION_THREAD_CAP:
+            report(f"Download rate still rising at {thread_count} connections; "
+                   f"recommending {CALIBRATION_THREAD_CAP}")
+            thread_count = CALIBRATION_THREAD_CAP
+    else:
+        thread_count = max(1, min(CALIBRATION_THREAD_CAP, os.cpu_count() or 1,
+                                  int(disk // CALIBRATION_CONNECTION_MB_S)))
+        report(f"No test URL: estimating {thread_count} threads from the disk rate and CPU count. Give a "
+               "large file on the servers you download from (--url, or Test Download URL in Settings) "
+               "to measure it.")
+    result['thread_count'] = thread_count
+    result['job_parallelism'] = node_capacity(result)
+    result['calibration'] = {
+        'measured': datetime.now().strftime('%Y-%m-%d %H:%M:%S'),
+        'cpu_count': os.cpu_count(),
+        'endpoint': url,
+        'threads_estimated': not url,
+        'disk_mb_s': round(disk, 1),
+        'download_mb_s': {str(level): round(rate, 1) for level, rate in throughput.items()},
+        'transcode_realtime': {str(level): round(rate, 1) for level, rate in transcode.items()},
+    }
+    return result
+
+def save_calibration(result, path=SETTINGS_PATH):
+    """Write calibrate()'s recommendations into the settings file, keeping the other settings"""
+    settings = {}
+    if os.path.exists(path):
+        with open(path, 'r') as f:
+            settings = json.load(f)
+    settings.update(result)
+    tmp_path = path + '.tmp'
+    with open(tmp_path, 'w') as f:
+        json.dump(settings, f, indent=4)
+    os.replace(tmp_path, path)
+
+class CalibrationWorker(QThread):
+    """Runs calibrate() in the background for the settings tab"""
+    progress = pyqtSignal(str)
+    calibrated = pyqtSignal(dict)
+    failed = pyqtSignal(str)
+
+    def __init__(self, scratch_dir, url=None):
+        super().__init__()
+        self.scratch_dir = scratch_dir
+        self.url = url
+
+    def run(self):
+        try:
+            self.calibrated.emit(calibrate(self.scratch_dir, self.url, self.progress.emit))
+        except Exception as e:
+            self.failed.emit(str(e))
+
+def run_calibration(args):
+    """Entry point for --calibrate: measure, print and save the recommended settings"""
+    settings = load_settings_file()
+    scratch_dir = args.output or settings.get('output_dir') or str(Path.home() / "Downloads")
+    os.makedirs(scratch_dir, exist_ok=True)
+    result = calibrate(scratch_dir, args.url, lambda line: print(line, flush=True))
+    for key in ('thread_count', 'job_parallelism', 'transcode_workers'):
+        print(f"{key}: {settings.get(key)} -> {result[key]}")
+    if args.dry_run:
+        return
+    save_calibration(result)
+    print(f"saved to {SETTINGS_PATH}")
+
+# Service mode: a daemon that owns the queue and takes jobs over a local HTTP API
+DAEMON_HOST = '127.0.0.1'
+DAEMON_PORT = 8765
+DAEMON_CALL_TIMEOUT = 30  # seconds an API call waits for the Qt thread
+DAEMON_EVENT_BACKLOG = 1000  # events buffered per subscriber before it is dropped
+DAEMON_KEEPALIVE = 15  # seconds between keepalive lines on an idle event stream
+DAEMON_PROGRESS_INTERVAL = 0.5  # seconds between progress events for a job
+DAEMON_AUDIO_FORMATS = ('mp3', 'wav', 'flac')
+
+def daemon_token(path=SETTINGS_PATH):
+    """API token the daemon requires from clients; created in the settings file on first use"""
+    settings = {}
+    if os.path.exists(path):
+        with open(path, 'r') as f:
+            settings = json.load(f)
+    if not settings.get('daemon_token'):
+        settings['daemon_token'] = secrets.token_urlsafe(32)
+        tmp_path = path + '.tmp'
+        with open(tmp_path, 'w') as f:
+            json.dump(settings, f, indent=4)
+        os.chmod(tmp_path, 0o600)
+        os.replace(tmp_path, path)
+    return settings['daemon_token']
+
+def check_episode_id(episode_id):
+    """episode_id from an API request, which becomes a file name; raises ValueError
+    if it could point outside the output folder"""
+    if episode_id is None or episode_id == '':
+        return None
+    episode_id = str(episode_id)
+    if '..' in episode_id or any(char in episode_id for char in ('/', '\\', '\0')):
+        raise ValueError("episode_id must not contain path separators or '..'")
+    return episode_id
+
+def parse_job_request(request):
+    """Queue entry from a JSON job request ({url, episode_id, section, format, also, quality,
+    subtitles, playlist, priority, output_dir}); raises ValueError for invalid fields"""
+    url = complete_url(str(request.get('url') or '').strip())
+    if not url:
+        raise ValueError("url is required")
+    fmt = request.get('format', 'video')
+    if fmt != 'video' and fmt not in DAEMON_AUDIO_FORMATS:
+        raise ValueError(f"format must be 'video' or one of {', '.join(DAEMON_AUDIO_FORMATS)}")
+    also = request.get('also', [])
+    if not isinstance(also, list) or any(codec not in DAEMON_AUDIO_FORMATS for codec in also):
+        raise ValueError(f"also must be a list of {', '.join(DAEMON_AUDIO_FORMATS)}")
+    quality = request.get('quality', 'Best')
+    if quality not in ('Best', 'High', 'Medium', 'Low'):
+        raise ValueError("quality must be Best, High, Medium or Low")
+    section = request.get('section') or None
+    if isinstance(section, list):  # [start, end] seconds, as parse_url_list gives it
+        try:
+            section = format_section(section)
+        except (TypeError, ValueError):
+            section = ''
+    if section is not None:
+        section = parse_section(str(section))
+        if section is None:
+            raise ValueError("section must be a time range such as 1:02:00-1:10:30 or 45:00-")
+
+    problem = url_problem(url)
+    if problem:
+        raise ValueError(f"{url}: {problem}")
+
+    noplaylist = not request.get('playlist', False)
+    media_key, url = canonical_media(url, noplaylist)
+    return {
+        'url': url,
+        'episode_id': check_episode_id(request.get('episode_id')),
+        'section': section,
+        'media_key': media_key,
+        'priority': int(request.get('priority', 0)),
+        'request': {
+            'format_data': None if fmt == 'video' else {'type': 'audio', 'ext': fmt},
+            'extra_outputs': also,
+            'section': section,
+            'quality': quality,
+            'writesubtitles': bool(request.get('subtitles', False)),
+            'noplaylist': noplaylist,
+            'output_dir': request.get('output_dir'),
+        },
+    }
+
+def job_request_options(settings, spec, episode_id, output_dir=None):
+    """DownloadWorker options for the 'request' part of a parsed job request"""
+    return build_download_options(
+        settings, output_dir or spec['output_dir'], spec['format_data'], spec['quality'],
+        spec['writesubtitles'], spec['noplaylist'], episode_id, spec.get('extra_outputs', ()),
+        spec.get('section'))
+
+class JobDaemon(QObject):
+    """Headless download service. Owns a DownloadQueue and runs it continuously;
+    jobs arrive through DaemonServer. Everything except call() and the event
+    subscriptions runs on the Qt thread."""
+    command = pyqtSignal(object)
+
+    def __init__(self, output_dir, settings=None):
+        super().__init__()
+        self.output_dir = output_dir
+        self.settings = settings or load_settings_file()
+        self.token = self.settings.get('daemon_token') or daemon_token()
+        self.queue = DownloadQueue(order=QUEUE_ORDERS.get(self.settings.get('queue_order'), 'fifo'))
+        self.flights = MediaFlights()
+        self.worker = None
+        self.current_job = None
+        self.current_flight = None
+        self.retry_scheduled = False
+        self.last_progress = 0
+        self.subscribers = []
+        self.subscribers_lock = threading.Lock()
+        self.command.connect(self._run_command)
+
+    def call(self, fn, *args):
+        """Run fn on the Qt thread from any thread and return its result"""
+        reply = queue.Queue(maxsize=1)
+        self.command.emit((fn, args, reply))
+        ok, value = reply.get(timeout=DAEMON_CALL_TIMEOUT)
+        if not ok:
+            raise value
+        return value
+
+    def _run_command(self, command):
+        fn, args, reply = command
+        try:
+            reply.put((True, fn(*args)))
+        except Exception as e:
+            reply.put((False, e))
+
+    def subscribe(self):
+        events = queue.Queue(maxsize=DAEMON_EVENT_BACKLOG)
+        with self.subscribers_lock:
+            self.subscribers.append(events)
+        return events
+
+    def unsubscribe(self, events):
+        with self.subscribers_lock:
+            if events in self.subscribers:
+                self.subscribers.remove(events)
+
+    def publish(self, event, **fields):
+        fields.update({'event': event, 'time': round(time.time(), 3)})
+        with self.subscribers_lock:
+            for events in list(self.subscribers):
+                try:
+                    events.put_nowait(fields)
+                except queue.Full:
+                    # A client that stopped reading is dropped rather than stalling the queue
+                    self.subscribers.remove(events)
+
+    def job_view(self, job):
+        return {key: job.get(key) for key in (
+            'id', 'url', 'episode_id', 'state', 'priority', 'pinned', 'paused',
+            'downloaded', 'total', 'error', 'category')}
+
+    def submit(self, request):
+        """Queue a job from an API request; returns (job view, created)"""
+        entry = parse_job_request(request)
+        entry['request']['output_dir'] = self.allowed_output_dir(entry['request']['output_dir'])
+        job = self.queue.add(entry)
+        if job is None:
+            return self.job_view(self.queue.find_duplicate(entry)), False
+        self.publish('job_added', job=self.job_view(job))
+        if self.worker is None:
+            QTimer.singleShot(0, self.start_next)
+        return self.job_view(job), True
+
+    def allowed_output_dir(self, output_dir):
+        """Output folder for a request: the daemon's own unless the request names one
+        inside it or inside one of the output roots from the settings"""
+        if not output_dir:
+            return self.output_dir
+        roots = [self.output_dir] + [line.strip() for line in self.settings.get('output_roots', '').splitlines()
+                                     if line.strip()]
+        path = os.path.realpath(os.path.join(self.output_dir, os.path.expanduser(str(output_dir))))
+        for root in roots:
+            root = os.path.realpath(root)
+            try:
+                if os.path.commonpath([path, root]) == root:
+                    return path
+            except ValueError:  # different drives
+                continue
+        raise ValueError(f"output_dir must be inside {', '.join(roots)}")
+
+    def list_jobs(self):
+        return [self.job_view(job) for job in self.queue.ordered_jobs()]
+
+    def get_job(self, job_id):
+        if not 0 <= job_id < len(self.queue):
+            raise KeyError(job_id)
+        return self.job_view(self.queue.get(job_id))
+
+    def cancel(self, job_id):
+        job = self.queue.get(self.get_job(job_id)['id'])
+        if job['state'] in ('pending', 'deferred', 'attached'):
+            self.queue.finish(job, 'cancelled')
+            self.publish('job_finished', job=self.job_view(job))
+        elif job['state'] == 'active' and self.worker:
+            self.worker.cancel()
+        return self.job_view(job)
+
+    def reprioritise(self, job_id, changes):
+        """Apply priority, move, pinned and paused changes to a pending job"""
+        job = self.queue.get(self.get_job(job_id)['id'])
+        if 'priority' in changes:
+            job['priority'] = int(changes['priority'])
+            self.queue.order = 'priority'
+        if 'move' in changes:
+            self.queue.move(job_id, int(changes['move']))
+        if 'pinned' in changes:
+            self.queue.set_pinned(job_id, bool(changes['pinned']))
+        if 'paused' in changes:
+            self.queue.set_paused(job_id, bool(changes['paused']))
+            if not changes['paused'] and self.worker is None:
+                QTimer.singleShot(0, self.start_next)
+        self.publish('job_updated', job=self.job_view(job))
+        return self.job_view(job)
+
+    def start_next(self):
+        if self.worker is not None:
+            return
+        job = self.queue.next_job()
+        if job is None:
+            deferred = self.queue.deferred_jobs()
+            if deferred and not self.retry_scheduled:
+                self.retry_scheduled = True
+                retry_pass = max(deferred_job['retry_pass'] for deferred_job in deferred) + 1
+                QTimer.singleShot(RETRY_PASS_DELAY_MS * retry_pass, self.start_retry_pass)
+            return
+
+        options = job_request_options(self.settings, job['request'], job['episode_id'])
+        job['outtmpl'] = options['outtmpl']
+
+        flight = (job.get('media_key'), format_identity(options))
+        claim = self.flights.claim(flight, job)
+        if claim == 'finished':
+            self.reuse_media(job, self.flights.finished[flight])
+            QTimer.singleShot(0, self.start_next)
+            return
+        if claim == 'attached':
+            self.queue.finish(job, 'attached')
+            QTimer.singleShot(0, self.start_next)
+            return
+
+        self.current_job = job
+        self.current_flight = flight
+        self.worker = create_download_worker(job['url'], options)
+        self.worker.progress.connect(self.on_progress)
+        self.worker.status_update.connect(self.on_status)
+        self.worker.error.connect(self.on_worker_error)
+        self.worker.finished.connect(self.on_finished)
+        self.worker.start()
+        self.publish('job_started', job=self.job_view(job))
+
+    def start_retry_pass(self):
+        # Jobs are only deferred while they have retry passes left
+        self.retry_scheduled = False
+        self.queue.requeue_deferred()
+        self.start_next()
+
+    def reuse_media(self, job, files):
+        src = files[0]
+        dst = src
+        if job['episode_id']:
+            dst = os.path.join(os.path.dirname(job['outtmpl']), job['episode_id'] + os.path.splitext(src)[1])
+        try:
+            link_media(src, dst)
+        except OSError as e:
+            job['error'] = str(e)
+            self.queue.finish(job, 'failed')
+        else:
+            self.queue.finish(job, 'done')
+        self.publish('job_finished', job=self.job_view(job))
+
+    def on_progress(self, progress):
+        if 'total' in progress and self.current_job:
+            self.current_job['downloaded'] = progress['downloaded']
+            self.current_job['total'] = progress['total']
+            now = time.monotonic()
+            if now - self.last_progress < DAEMON_PROGRESS_INTERVAL and progress['downloaded'] < progress['total']:
+                return
+            self.last_progress = now
+            self.publish('progress', id=self.current_job['id'], downloaded=progress['downloaded'],
+                         total=progress['total'], speed=progress.get('speed'), eta=progress.get('eta'))
+
+    def on_status(self, message):
+        if message.startswith("Downloading at"):
+            return  # speed and ETA are in the progress events
+        if self.current_job:
+            self.publish('status', id=self.current_job['id'], message=message)
+
+    def on_finished(self, success):
+        job, worker = self.current_job, self.worker
+        category = worker.error_category
+        if success:
+            state = 'done'
+        elif category == ERROR_CANCELLED:
+            state = 'cancelled'
+        elif category in RETRYABLE_ERRORS and job['retry_pass'] < BATCH_RETRY_PASSES:
+            state = 'deferred'
+        else:
+            state = 'failed'
+        job['category'] = category
+        self.queue.finish(job, state)
+
+        flight, self.current_flight = self.current_flight, None
+        if success:
+            files = [path for key, path in worker.media_files if key == flight[0]]
+            files = files or [path for _, path in worker.media_files]
+            waiters = self.flights.complete(flight, files)
+            for key, path in worker.media_files:
+                waiters += self.flights.complete((key, flight[1]), [path])
+            for waiter in waiters:
+                if waiter['state'] == 'cancelled':
+                    continue
+                if files:
+                    self.reuse_media(waiter, files)
+                else:
+                    self.queue.finish(waiter, 'pending')
+        else:
+            for waiter in self.flights.fail(flight):
+                if waiter['state'] != 'cancelled':
+                    self.queue.finish(waiter, 'pending')
+
+        self.publish('job_finished', job=self.job_view(job))
+        self.current_job = None
+        self.worker = None
+        worker.wait()
+        worker.release()
+        QTimer.singleShot(0, self.start_next)
+
+    def on_worker_error(self, message):
+        if self.current_job:
+            self.current_job['error'] = message
+
+    def shutdown(self):
+        if self.worker:
+            self.worker.cancel()
+            self.worker.wait()
+
+class JsonRequestHandler(http.server.BaseHTTPRequestHandler):
+    """Request handler base for the JSON APIs of the service modes"""
+    server_version = "yt-mtdl"
+
+    def log_message(self, format, *args):
+        pass
+
+    def _send_json(self, status, payload):
+        body = json.dumps(payload).encode('utf-8')
+        self.send_response(status)
+        self.send_header('Content-Type', 'application/json')
+        self.send_header('Content-Length', str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def _read_json(self):
+        # Browsers may send text/plain cross-site without a preflight; JSON bodies may not
+        content_type = self.headers.get('Content-Type', '').split(';')[0].strip().lower()
+        if content_type != 'application/json':
+            raise ValueError("Content-Type must be application/json")
+        length = int(self.headers.get('Content-Length') or 0)
+        if not length:
+            return {}
+        payload = json.loads(self.rfile.read(length).decode('utf-8'))
+        if not isinstance(payload, dict):
+            raise ValueError("request body must be a JSON object")
+        return payload
+
+class DaemonRequestHandler(JsonRequestHandler):
+    """JSON API for JobDaemon:
+
+    POST /jobs                    submit {url, episode_id, format, also, quality, subtitles, playlist, priority}
+    GET  /jobs, GET /jobs/<id>    list jobs / one job
+    POST /jobs/<id>/cancel        cancel (DELETE /jobs/<id> does the same)
+    POST /jobs/<id>/priority      {priority, move, pinned, paused}
+    GET  /events                  newline-delimited JSON progress events until the client disconnects
+
+    Every request needs "Authorization: Bearer <daemon_token from the settings file>".
+    """
+
+    def _dispatch(self, method):
+        daemon = self.server.job_daemon
+        if not hmac.compare_digest(self.headers.get('Authorization', ''), f'Bearer {daemon.token}'):
+            return self._send_json(401, {'error': f'missing or wrong API token (daemon_token in {SETTINGS_PATH})'})
+        parts = [part for part in urllib.parse.urlparse(self.path).path.split('/') if part]
+        try:
+            if method == 'GET' and parts == ['events']:
+                return self._stream_events(daemon)
+            if parts == ['jobs']:
+                if method == 'GET':
+                    return self._send_json(200, {'jobs': daemon.call(daemon.list_jobs)})
+                if method == 'POST':
+                    job, created = daemon.call(daemon.submit, self._read_json())
+                    return self._send_json(201 if created else 409, {'job': job, 'created': created})
+            if len(parts) >= 2 and parts[0] == 'jobs':
+                job_id = int(parts[1])
+                action = parts[2] if len(parts) > 2 else None
+                if method == 'GET' and action is None:
+                    return self._send_json(200, {'job': daemon.call(daemon.get_job, job_id)})
+                if (method == 'DELETE' and action is None) or (method == 'POST' and action == 'cancel'):
+                    return self._send_json(200, {'job': daemon.call(daemon.cancel, job_id)})
+                if method == 'POST' and action == 'priority':
+                    return self._send_json(200, {'job': daemon.call(daemon.reprioritise, job_id, self._read_json())})
+            self._send_json(404, {'error': 'not found'})
+        except KeyError:
+            self._send_json(404, {'error': 'no such job'})
+        except ValueError as e:
+            self._send_json(400, {'error': str(e)})
+        except Exception as e:
+            self._send_json(500, {'error': str(e)})
+
+    def _stream_events(self, daemon):
+        events = daemon.subscribe()
+        self.send_response(200)
+        self.send_header('Content-Type', 'application/x-ndjson')
+        self.send_header('Connection', 'close')
+        self.end_headers()
+        try:
+            while True:
+                try:
+                    event = events.get(timeout=DAEMON_KEEPALIVE)
+                except queue.Empty:
+                    event = {'event': 'keepalive', 'time': round(time.time(), 3)}
+                self.wfile.write(json.dumps(event).encode('utf-8') + b'\n')
+                self.wfile.flush()
+        except (BrokenPipeError, ConnectionResetError, OSError):
+            pass
+        finally:
+            daemon.unsubscribe(events)
+
+    def do_GET(self):
+        self._dispatch('GET')
+
+    def do_POST(self):
+        self._dispatch('POST')
+
+    def do_DELETE(self):
+        self._dispatch('DELETE')
+
+class DaemonHTTPServer(http.server.ThreadingHTTPServer):
+    daemon_threads = True
+
+    def __init__(self, address, job_daemon):
+        self.job_daemon = job_daemon
+        super().__init__(address, DaemonRequestHandler)
+
+if hasattr(socket, 'AF_UNIX'):
+    class DaemonUnixServer(socketserver.ThreadingMixIn, socketserver.UnixStreamServer):
+        """Same API over a UNIX socket, for clients that should not need a TCP port"""
+        daemon_threads = True
+
+        def __init__(self, path, job_daemon):
+            self.job_daemon = job_daemon
+            if os.path.exists(path):
+                os.remove(path)
+            super().__init__(path, DaemonRequestHandler)
+            os.chmod(path, 0o600)
+
+        def get_request(self):
+            request, _ = super().get_request()
+            # BaseHTTPRequestHandler expects a (host, port) style client address
+            return request, ('unix', 0)
+
+def daemon_request(base_url, method, path, payload=None, timeout=10, token=None):
+    """Call the daemon's HTTP API; returns (status, decoded JSON body)"""
+    data = json.dumps(payload).encode('utf-8') if payload is not None else None
+    headers = {'Content-Type': 'application/json'}
+    if token:
+        headers['Authorization'] = f'Bearer {token}'
+    request = urllib.request.Request(base_url.rstrip('/') + path, data=data, method=method,
+                                     headers=headers)
+    try:
+        with urllib.request.urlopen(request, timeout=timeout) as response:
+            return response.status, json.loads(response.read().decode('utf-8'))
+    except urllib.error.HTTPError as e:
+        return e.code, json.loads(e.read().decode('utf-8') or '{}')
+
+def parse_service_args(argv):
+    """Command line for the headless modes (--daemon, --coordinator, --worker, --calibrate)"""
+    import argparse
+    parser = argparse.ArgumentParser(prog='yt-mtdl.py', description="Headless service modes")
+    mode = parser.add_mutually_exclusive_group(required=True)
+    mode.add_argument('--daemon', action='store_true', help="run the download queue as a local service")
+    mode.add_argument('--coordinator', action='store_true', help="serve a shared job queue to worker nodes")
+    mode.add_argument('--worker', metavar='STORE',
+                      help="lease jobs from a coordinator URL or a SQLite queue file and download them")
+    mode.add_argument('--calibrate', action='store_true',
+                      help="measure this machine and save recommended thread, job and transcode settings")
+    parser.add_argument('--host', default=DAEMON_HOST)
+    parser.add_argument('--port', type=int, help=f"daemon: {DAEMON_PORT}, coordinator: {CLUSTER_PORT}")
+    parser.add_argument('--socket', help="daemon: also listen on this UNIX socket path")
+    parser.add_argument('--output', help="output directory (calibrate: where the disk test writes)")
+    parser.add_argument('--db', default=CLUSTER_DB_PATH, help="coordinator: SQLite queue file")
+    parser.add_argument('--import', dest='import_file', help="coordinator: queue the URLs in this list file")
+    parser.add_argument('--format', default='video', help="coordinator: format for imported URLs")
+    parser.add_argument('--lease', type=float, default=CLUSTER_LEASE_SECONDS, help="coordinator: lease timeout (s)")
+    parser.add_argument('--capacity', type=int, help="worker: concurrent jobs (default from settings)")
+    parser.add_argument('--name', help="worker: node name (default host-pid)")
+    parser.add_argument('--drain', action='store_true', help="worker: exit once the queue is empty")
+    parser.add_argument('--url', help="calibrate: a large file on the servers you download from, "
+                                      "to measure the thread count with")
+    parser.add_argument('--dry-run', action='store_true', help="calibrate: print the recommendation without saving it")
+    return parser.parse_args(argv)
+
+def run_daemon(args):
+    """Entry point for --daemon: serve the job API until interrupted"""
+    import signal
+    if args.port is None:
+        args.port = DAEMON_PORT
+
+    app = QCoreApplication(sys.argv[:1])
+    settings = load_settings_file()
+    output_dir = args.output or settings.get('output_dir') or str(Path.home() / "Downloads")
+    job_daemon = JobDaemon(output_dir, settings)
+
+    servers = [DaemonHTTPServer((args.host, args.port), job_daemon)]
+    if args.socket:
+        servers.append(DaemonUnixServer(args.socket, job_daemon))
+    for server in servers:
+        threading.Thread(target=server.serve_forever, daemon=True).start()
+    print(f"yt-mtdl daemon listening on http://{args.host}:{servers[0].server_address[1]}"
+          + (f" and {args.socket}" if args.socket else ""), flush=True)
+    print(f"API token: daemon_token in {SETTINGS_PATH}", flush=True)
+
+    # Let Ctrl+C / SIGTERM through the Qt event loop
+    signal.signal(signal.SIGINT, lambda *_: app.quit())
+    signal.signal(signal.SIGTERM, lambda *_: app.quit())
+    tick = QTimer()
+    tick.timeout.connect(lambda: None)
+    tick.start(500)
+
+    app.exec()
+    for server in servers:
+        server.shutdown()
+        server.server_close()
+    if args.socket and os.path.exists(args.socket):
+        os.remove(args.socket)
+    job_daemon.shutdown()
+
+# Coordinator/worker mode: nodes lease jobs from a shared queue
+CLUSTER_PORT = 8766
+CLUSTER_DB_PATH = os.path.join(os.path.expanduser('~'), '.ytdl_cluster.db')
+CLUSTER_LEASE_SECONDS = 60  # a node that stops renewing loses its jobs after this
+CLUSTER_POLL_INTERVAL_MS = 1000
+CLUSTER_MAX_ATTEMPTS = 3  # leases per job, including ones lost to dead nodes
+NODE_THREADS_PER_JOB = 4  # download threads each concurrent job gets on a node
+
+class SqliteJobStore:
+    """Shared job queue for coordinator/worker mode, kept in SQLite. Jobs are leased
+    to a node for a limited time and go back to the queue if the lease is not renewed.
+
+    Other stores only need the same methods: add, lease, renew, complete, heartbeat,
+    stats and jobs (HttpJobStore forwards them to a coordinator)."""
+
+    def __init__(self, path=CLUSTER_DB_PATH, lease_seconds=CLUSTER_LEASE_SECONDS):
+        self.path = path
+        self.lease_seconds = lease_seconds
+        self.lock = threading.Lock()
+        self.db = sqlite3.connect(path, timeout=30, isolation_level=None, check_same_thread=False)
+        self.db.row_factory = sqlite3.Row
+        self.db.execute('PRAGMA journal_mode=WAL')
+        self.db.executescript("""
+            CREATE TABLE IF NOT EXISTS jobs (
+                id INTEGER PRIMARY KEY,
+                url TEXT NOT NULL,
+                episode_id TEXT,
+                media_key TEXT,
+                priority INTEGER NOT NULL DEFAULT 0,
+                request TEXT NOT NULL,
+                state TEXT NOT NULL DEFAULT 'queued',  -- queued, leased, done, failed
+                worker TEXT,
+                lease_expires REAL,
+                attempts INTEGER NOT NULL DEFAULT 0,
+                error TEXT,
+                category TEXT,
+                created REAL NOT NULL,
+                finished REAL
+            );
+            CREATE INDEX IF NOT EXISTS jobs_queue ON jobs (state, priority, id);
+            CREATE TABLE IF NOT EXISTS workers (
+                name TEXT PRIMARY KEY,
+                capacity INTEGER,
+                active INTEGER,
+                last_seen REAL
+            );
+        """)
+
+    def _transaction(self):
+        # BEGIN IMMEDIATE takes the write lock up front, so two nodes sharing the
+        # file cannot lease the same job
+        self.db.execute('BEGIN IMMEDIATE')
+
+    def add(self, entry):
+        """Queue a parsed job request; returns (job id, created)"""
+        with self.lock:
+            self._transaction()
+            try:
+                if entry.get('media_key'):
+                    rows = self.db.execute(
+                        "SELECT id, request FROM jobs WHERE media_key = ? AND episode_id IS ? AND state != 'failed'",
+                        (entry['media_key'], entry.get('episode_id'))).fetchall()
+                    row = next((row for row in rows if json.loads(row['request']).get('section')
+                                == entry['request'].get('section')), None)
+                    if row:
+                        self.db.execute('COMMIT')
+                        return row['id'], False
+                cursor = self.db.execute(
+                    "INSERT INTO jobs (url, episode_id, media_key, priority, request, created) VALUES (?, ?, ?, ?, ?, ?)",
+                    (entry['url'], entry.get('episode_id'), entry.get('media_key'), entry.get('priority', 0),
+                     json.dumps(entry['request']), time.time()))
+                self.db.execute('COMMIT')
+                return cursor.lastrowid, True
+            except Exception:
+                self.db.execute('ROLLBACK')
+                raise
+
+    def _requeue_expired(self, now):
+        self.db.execute(
+            "UPDATE jobs SET state = CASE WHEN attempts >= ? THEN 'failed' ELSE 'queued' END, "
+            "error = 'lease expired on ' || worker, worker = NULL, lease_expires = NULL "
+            "WHERE state = 'leased' AND lease_expires < ?", (CLUSTER_MAX_ATTEMPTS, now))
+
+    def lease(self, worker, count):
+        """Lease up to count jobs to a node; returns job dicts"""
+        if count <= 0:
+            return []
+        now = time.time()
+        with self.lock:
+            self._transaction()
+            try:
+                self._requeue_expired(now)
+                rows = self.db.execute(
+                    "SELECT * FROM jobs WHERE state = 'queued' ORDER BY priority DESC, id LIMIT ?", (count,)).fetchall()
+                for row in rows:
+                    self.db.execute(
+                        "UPDATE jobs SET state = 'leased', worker = ?, lease_expires = ?, attempts = attempts + 1 "
+                        "WHERE id = ?", (worker, now + self.lease_seconds, row['id']))
+                self.db.execute('COMMIT')
+            except Exception:
+                self.db.execute('ROLLBACK')
+                raise
+        return [{'id': row['id'], 'url': row['url'], 'episode_id': row['episode_id'],
+                 'attempts': row['attempts'] + 1, 'request': json.loads(row['request'])} for row in rows]
+
+    def renew(self, worker, job_ids):
+        """Extend a node's leases; returns the ids it still holds"""
+        if not job_ids:
+            return []
+        with self.lock:
+            held = []
+            for job_id in job_ids:
+                cursor = self.db.execute(
+                    "UPDATE jobs SET lease_expires = ? WHERE id = ? AND worker = ? AND state = 'leased'",
+                    (time.time() + self.lease_seconds, job_id, worker))
+                if cursor.rowcount:
+                    held.append(job_id)
+            return held
+
+    def complete(self, worker, job_id, success, error=None, category=None):
+        """Record a node's result; transient failures go back to the queue while attempts
+        remain. Returns False if the node no longer held the lease."""
+        if success:
+            state = 'done'
+        elif category in RETRYABLE_ERRORS:
+            state = 'retry'
+        else:
+            state = 'failed'
+        with self.lock:
+            cursor = self.db.execute(
+                "UPDATE jobs SET state = CASE WHEN ? = 'retry' THEN "
+                "(CASE WHEN attempts >= ? THEN 'failed' ELSE 'queued' END) ELSE ? END, "
+                "worker = CASE WHEN ? = 'retry' THEN NULL ELSE worker END, "
+                "lease_expires = NULL, error = ?, category = ?, finished = ? "
+                "WHERE id = ? AND worker = ? AND state = 'leased'",
+                (state, CLUSTER_MAX_ATTEMPTS, state, state, error, category, time.time(), job_id, worker))
+            return cursor.rowcount > 0
+
+    def heartbeat(self, worker, capacity, active):
+        with self.lock:
+            self.db.execute(
+                "INSERT INTO workers (name, capacity, active, last_seen) VALUES (?, ?, ?, ?) "
+                "ON CONFLICT(name) DO UPDATE SET capacity = excluded.capacity, active = excluded.active, "
+                "last_seen = excluded.last_seen", (worker, capacity, active, time.time()))
+
+    def stats(self):
+        with self.lock:
+            self._requeue_expired(time.time())
+            counts = {row['state']: row['n'] for row in
+                      self.db.execute("SELECT state, COUNT(*) AS n FROM jobs GROUP BY state")}
+            workers = [dict(row) for row in self.db.execute("SELECT * FROM workers ORDER BY name")]
+        return {'jobs': counts, 'workers': workers}
+
+    def jobs(self):
+        with self.lock:
+            rows = self.db.execute(
+                "SELECT id, url, episode_id, state, worker, attempts, error, category FROM jobs ORDER BY id").fetchall()
+        return [dict(row) for row in rows]
+
+class HttpJobStore:
+    """Job store client for nodes on other hosts; forwards calls to a coordinator"""
+
+    def __init__(self, base_url):
+        self.base_url = base_url
+
+    def _call(self, path, payload):
+        status, body = daemon_request(self.base_url, 'POST', path, payload)
+        if status != 200:
+            raise OSError(f"coordinator returned {status}: {body.get('error')}")
+        return body['result']
+
+    def add(self, entry):
+        body = self._call('/store/add', {'entry': entry})
+        return body['id'], body['created']
+
+    def lease(self, worker, count):
+        return self._call('/store/lease', {'worker': worker, 'count': count})
+
+    def renew(self, worker, job_ids):
+        return self._call('/store/renew', {'worker': worker, 'job_ids': job_ids})
+
+    def complete(self, worker, job_id, success, error=None, category=None):
+        return self._call('/store/complete', {'worker': worker, 'job_id': job_id, 'success': success,
+                                              'error': error, 'category': category})
+
+    def heartbeat(self, worker, capacity, active):
+        return self._call('/store/heartbeat', {'worker': worker, 'capacity': capacity, 'active': active})
+
+    def stats(self):
+        return daemon_request(self.base_url, 'GET', '/stats')[1]
+
+    def jobs(self):
+        return daemon_request(self.base_url, 'GET', '/jobs')[1]['jobs']
+
+def open_job_store(location, lease_seconds=CLUSTER_LEASE_SECONDS):
+    """Coordinator URL -> HttpJobStore, anything else is a SQLite file path"""
+    if location.startswith(('http://', 'https://')):
+        return HttpJobStore(location)
+    if location.startswith('sqlite://'):
+        location = location[len('sqlite://'):]
+    return SqliteJobStore(location, lease_seconds)
+
+class CoordinatorRequestHandler(JsonRequestHandler):
+    """Coordinator API: job submission and status for users, /store/* for nodes
+
+    POST /jobs                    submit a job request (same fields as the daemon)
+    GET  /jobs, GET /stats        job list / counts per state and node heartbeats
+    POST /store/<method>          SqliteJobStore calls from HttpJobStore
+    """
+
+    def do_GET(self):
+        store = self.server.store
+        path = urllib.parse.urlparse(self.path).path.rstrip('/')
+        if path == '/jobs':
+            self._send_json(200, {'jobs': store.jobs()})
+        elif path == '/stats':
+            self._send_json(200, store.stats())
+        else:
+            self._send_json(404, {'error': 'not found'})
+
+    def do_POST(self):
+        store = self.server.store
+        path = urllib.parse.urlparse(self.path).path.rstrip('/')
+        try:
+            payload = self._read_json()
+            if path == '/jobs':
+                job_id, created = store.add(parse_job_request(payload))
+                return self._send_json(201 if created else 409, {'id': job_id, 'created': created})
+            if path == '/store/add':
+                entry = dict(payload['entry'], episode_id=check_episode_id(payload['entry'].get('episode_id')))
+                job_id, created = store.add(entry)
+                return self._send_json(200, {'result': {'id': job_id, 'created': created}})
+            if path == '/store/lease':
+                return self._send_json(200, {'result': store.lease(payload['worker'], int(payload['count']))})
+            if path == '/store/renew':
+                return self._send_json(200, {'result': store.renew(payload['worker'], payload['job_ids'])})
+            if path == '/store/complete':
+                return self._send_json(200, {'result': store.complete(
+                    payload['worker'], payload['job_id'], payload['success'],
+                    payload.get('error'), payload.get('category'))})
+            if path == '/store/heartbeat':
+                store.heartbeat(payload['worker'], payload['capacity'], payload['active'])
+                return self._send_json(200, {'result': True})
+            self._send_json(404, {'error': 'not found'})
+        except (KeyError, ValueError) as e:
+            self._send_json(400, {'error': str(e)})
+        except Exception as e:
+            self._send_json(500, {'error': str(e)})
+
+class CoordinatorServer(http.server.ThreadingHTTPServer):
+    daemon_threads = True
+
+    def __init__(self, address, store):
+        self.store = store
+        super().__init__(address, CoordinatorRequestHandler)
+
+def node_capacity(settings):
+    """Concurrent jobs for a node: job_parallelism when set by hand,
+    otherwise download threads shared NODE_THREADS_PER_JOB per job, capped by how many
+    FFmpeg conversions the node should run at once"""
+    if settings.get('job_parallelism'):
+        return int(settings['job_parallelism'])
+    by_threads = max(1, int(settings['thread_count']) // NODE_THREADS_PER_JOB)
+    return max(1, min(by_threads, int(settings['transcode_workers'])))
+
+class ClusterNode(QObject):
+    """Worker node: leases jobs from a job store up to its capacity, runs each in a
+    DownloadWorker and renews the leases while they run"""
+
+    def __init__(self, store, output_dir, settings, name=None, capacity=None, drain=False):
+        super().__init__()
+        self.store = store
+        self.output_dir = output_dir
+        self.settings = dict(settings)
+        self.name = name or f"{socket.gethostname()}-{os.getpid()}"
+        self.capacity = capacity or node_capacity(settings)
+        # Each running job gets its share of the node's download threads
+        self.settings['thread_count'] = max(1, int(settings['thread_count']) // self.capacity)
+        self.drain = drain
+        self.workers = {}  # job id -> DownloadWorker
+        self.placed = {}  # job id -> job, while it runs on one of the output volumes
+        self.volumes = output_volumes_for(settings, output_dir)
+        self.completed = 0
+
+        self.poll_timer = QTimer(self)
+        self.poll_timer.timeout.connect(self.poll)
+        self.renew_timer = QTimer(self)
+        self.renew_timer.timeout.connect(self.renew)
+
+    def start(self, lease_seconds=CLUSTER_LEASE_SECONDS):
+        self.poll_timer.start(CLUSTER_POLL_INTERVAL_MS)
+        self.renew_timer.start(int(lease_seconds * 1000 / 3))
+        self.log(f"node {self.name} started, capacity {self.capacity}")
+        self.poll()
+
+    def log(self, message):
+        print(f"[{datetime.now().strftime('%H:%M:%S')}] {message}", flush=True)
+
+    def poll(self):
+        try:
+            self.store.heartbeat(self.name, self.capacity, len(self.workers))
+            jobs = self.store.lease(self.name, self.capacity - len(self.workers))
+        except (OSError, sqlite3.Error) as e:
+            self.log(f"job store unavailable: {str(e)}")
+            return
+        for job in jobs:
+            self.start_job(job)
+        if self.drain and not self.workers and not jobs:
+            counts = self.store.stats()['jobs']
+            if not counts.get('queued') and not counts.get('leased'):
+                self.log(f"queue drained, {self.completed} job(s) completed here")
+                QCoreApplication.quit()
+
+    def start_job(self, job):
+        output_dir = self.output_dir
+        if self.volumes:
+            job = dict(job, section=job['request'].get('section'))
+            self.placed[job['id']] = job
+            try:
+                output_dir = self.volumes.place(job)
+            except OSError as e:
+                output_dir = self.volumes.choose(job)
+                self.log(f"could not update the output index: {str(e)}")
+        options = job_request_options(self.settings, job['request'], job['episode_id'], output_dir)
+        worker = create_download_worker(job['url'], options)
+        worker.finished.connect(lambda success, job_id=job['id']: self.on_finished(job_id, success))
+        worker.error.connect(lambda message, job_id=job['id']: self.log(f"job {job_id}: {message}"))
+        self.workers[job['id']] = worker
+        worker.start()
+        self.log(f"job {job['id']} started (attempt {job['attempts']}): {job['url']}")
+
+    def renew(self):
+        if not self.workers:
+            return
+        try:
+            held = set(self.store.renew(self.name, list(self.workers)))
+        except (OSError, sqlite3.Error) as e:
+            self.log(f"could not renew leases: {str(e)}")
+            return
+        for job_id, worker in self.workers.items():
+            if job_id not in held:
+                # The lease expired and the job may already run elsewhere
+                self.log(f"job {job_id}: lease lost, cancelling")
+                worker.cancel()
+
+    def on_finished(self, job_id, success):
+        worker = self.workers.pop(job_id)
+        error = None if success else (worker.error_category and ERROR_LABELS[worker.error_category])
+        try:
+            recorded = self.store.complete(self.name, job_id, success, error, worker.error_category)
+        except (OSError, sqlite3.Error) as e:
+            self.log(f"job {job_id}: could not report result: {str(e)}")
+            recorded = False
+        if success and recorded:
+            self.completed += 1
+        self.log(f"job {job_id} {'done' if success else 'failed'}" + ("" if recorded else " (lease no longer held)"))
+        worker.wait()
+        if job_id in self.placed:
+            files = [path for _, path in worker.media_files] if success else ()
+            try:
+                self.volumes.finish(self.placed.pop(job_id), files, worker.write_timings)
+            except OSError as e:
+                self.log(f"could not update the output index: {str(e)}")
+        worker.release()
+        QTimer.singleShot(0, self.poll)
 
-    def _progress_hook(self, d):
-        if d['status'] == 'downloading':
-            total = d.get('total_bytes', 0)
-            if total == 0:
-                total = d.get('total_bytes_estimate', 0)
-            
-            downloaded = d.get('downloaded_bytes', 0)
-            
-            if total > 0:
-                progress = {
-                    'downloaded': downloaded,
-                    'total': total,
-                    'filename': d.get('filename', 'Unknown'),
-                    'speed': d.get('speed', 0),
-                    'eta': d.get('eta', 0)
-                }
-                self.progress.emit(progress)
-                
-                if 'speed' in d and d['speed']:
-                    speed = d['speed'] / 1024 / 1024
-                    status = f"Downloading at {speed:.1f} MB/s"
-                    if d.get('eta'):
-                        status += f" (ETA: {d['eta']} seconds)"
-                    self.status_update.emit(status)
-        
-        elif d['status'] == 'finished':
-            self.status_update.emit(f"Download complete, starting conversion...")
-            self.progress.emit({'format': "Converting...", 'percent': 0})
-        
-        elif d['status'] == 'started_conversion':
-            self.status_update.emit("Starting audio conversion...")
-            self.progress.emit({'format': "Converting...", 'percent': 0})
-        
-        elif d['status'] == 'converting':
-            if d.get('postprocessor') == 'FFmpegExtractAudio':
-                # For audio conversion, try different percentage indicators
-                percent = d.get('percent', d.get('progress', 0) * 100)
-                if percent:
-                    self.progress.emit({'format': f"Converting... {percent:.1f}%", 'percent': percent})
-                    self.status_update.emit(f"Converting audio: {percent:.1f}% complete")
+    def stop(self):
+        self.poll_timer.stop()
+        self.renew_timer.stop()
+        for worker in self.workers.values():
+            worker.cancel()
+        for worker in self.workers.values():
+            worker.wait()
 
-    def cancel(self):
-        self.is_cancelled = True
+def run_coordinator(args):
+    """Entry point for --coordinator: serve the shared queue until interrupted"""
+    store = SqliteJobStore(args.db, args.lease)
+    if args.import_file:
+        with open(args.import_file, 'r', encoding='utf-8') as f:
+            entries = parse_url_list(f)
+        created = 0
+        for entry in entries:
+            try:
+                created += store.add(parse_job_request(dict(entry, format=args.format)))[1]
+            except ValueError as e:
+                print(f"rejected {e}", flush=True)
+        print(f"queued {created} of {len(entries)} imported URLs", flush=True)
+
+    server = CoordinatorServer((args.host, args.port or CLUSTER_PORT), store)
+    print(f"yt-mtdl coordinator listening on http://{args.host}:{server.server_address[1]} "
+          f"(queue: {args.db})", flush=True)
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
+
+def run_worker_node(args):
+    """Entry point for --worker: lease and download jobs until interrupted (or drained)"""
+    import signal
+    app = QCoreApplication(sys.argv[:1])
+    settings = load_settings_file()
+    output_dir = args.output or settings.get('output_dir') or str(Path.home() / "Downloads")
+    store = open_job_store(args.worker, args.lease)
+    node = ClusterNode(store, output_dir, settings, args.name, args.capacity, args.drain)
+
+    signal.signal(signal.SIGINT, lambda *_: app.quit())
+    signal.signal(signal.SIGTERM, lambda *_: app.quit())
+    node.start(args.lease)
+    app.exec()
+    node.stop()
 
 class MainWindow(QMainWindow):
     def __init__(self):
@@ -408,8 +5418,30 @@ class MainWindow(QMainWindow):
         
         # Initialize variables
         self.worker = None
-        self.pending_urls = []
-        self.current_url_index = 0
+        self.queue = DownloadQueue()
+        self.current_job = None
+        self.batch_running = False
+        self.batch_waiting = False
+        self.batch_report = None
+        self.flights = MediaFlights()
+        self.current_flight = None
+        self.probe_worker = None
+        self.sync_worker = None
+        self.import_worker = None
+        self.calibration_worker = None
+        self.integrity_worker = None
+        self.unverified = []  # (job, expected media) for finished batch items not yet probed
+        self.sync_backlog = []  # playlists imported while a sync was running
+        self.playlist_sync = None
+        self.disk_budget = None
+        self.proxy_pool = None
+        self.proxy_pool_config = None
+        self.output_volumes = None
+        self.output_volumes_config = None
+        self.worker_proxy = None
+        self.worker_started = 0
+        self.settings = {}
+        self.settings_tab_built = False
         
         # Create UI
         self.init_ui()
@@ -425,6 +5457,7 @@ class MainWindow(QMainWindow):
         # Set up download information
         self.successful_downloads = 0
         self.failed_downloads = 0
+        self.retried_downloads = 0
         
         # Set up status bar
         self.statusBar().showMessage("Ready")
@@ -536,20 +5569,47 @@ class MainWindow(QMainWindow):
         self.url_input.setPlaceholderText("Enter YouTube URL here or import from text file")
         url_input_layout.addWidget(self.url_input)
         
-        import_btn = QPushButton("Import URLs")
-        import_btn.clicked.connect(self.import_urls)
-        import_btn.setFixedWidth(120)
-        url_input_layout.addWidget(import_btn)
+        self.import_btn = QPushButton("Import URLs")
+        self.import_btn.clicked.connect(self.import_urls)
+        self.import_btn.setFixedWidth(120)
+        url_input_layout.addWidget(self.import_btn)
         
         url_layout.addLayout(url_input_layout)
         
-        # URL list
-        self.url_list = QTextEdit()
-        self.url_list.setPlaceholderText("Imported URLs will appear here")
-        self.url_list.setMaximumHeight(100)
-        self.url_list.setReadOnly(True)
+        # URL queue - imported URLs in the order they will be downloaded
+        self.url_list = QListWidget()
+        self.url_list.setMaximumHeight(140)
         url_layout.addWidget(self.url_list)
         
+        queue_layout = QHBoxLayout()
+        queue_layout.addWidget(QLabel("Order:"))
+        self.queue_order_combo = QComboBox()
+        self.queue_order_combo.addItems(list(QUEUE_ORDERS))
+        self.queue_order_combo.setToolTip("Size orders use estimates fetched in the background")
+        self.queue_order_combo.currentTextChanged.connect(self.on_queue_order_changed)
+        queue_layout.addWidget(self.queue_order_combo)
+        queue_layout.addStretch()
+        
+        move_up_btn = QPushButton("Move Up")
+        move_up_btn.clicked.connect(lambda: self.move_selected_job(-1))
+        queue_layout.addWidget(move_up_btn)
+        
+        move_down_btn = QPushButton("Move Down")
+        move_down_btn.clicked.connect(lambda: self.move_selected_job(1))
+        queue_layout.addWidget(move_down_btn)
+        
+        pin_btn = QPushButton("Pin")
+        pin_btn.setToolTip("Pinned items are downloaded next, whatever the order")
+        pin_btn.clicked.connect(self.toggle_selected_pin)
+        queue_layout.addWidget(pin_btn)
+        
+        pause_btn = QPushButton("Pause")
+        pause_btn.setToolTip("Paused items are skipped until resumed")
+        pause_btn.clicked.connect(self.toggle_selected_pause)
+        queue_layout.addWidget(pause_btn)
+        
+        url_layout.addLayout(queue_layout)
+        
         url_group.setLayout(url_layout)
         download_layout.addWidget(url_group)
 
@@ -576,6 +5636,27 @@ class MainWindow(QMainWindow):
         options_layout.addWidget(self.subtitle_check, 1, 0, 1, 2)
         options_layout.addWidget(self.playlist_check, 1, 2, 1, 2)
         
+        # Further outputs encoded from the same download
+        options_layout.addWidget(QLabel("Also Save As:"), 2, 0)
+        extra_layout = QHBoxLayout()
+        self.extra_output_checks = {}
+        for codec in AUDIO_ENCODERS:
+            check = QCheckBox(codec.upper())
+            check.setToolTip(f"Also encode {codec.upper()} from the downloaded file, alongside the main format")
+            self.extra_output_checks[codec] = check
+            extra_layout.addWidget(check)
+        extra_layout.addStretch()
+        options_layout.addLayout(extra_layout, 2, 1, 1, 3)
+        
+        # Part of the item only; batch items take theirs from the import file
+        options_layout.addWidget(QLabel("Section:"), 3, 0)
+        self.section_input = QLineEdit()
+        self.section_input.setPlaceholderText("Whole item, or start-end such as 1:02:00-1:10:30")
+        self.section_input.setToolTip("Download only this time range of a single URL. In an import file, "
+                                      "put the range before the URL on its line, with a ':' in it "
+                                      "or '@' in front (@90-120).")
+        options_layout.addWidget(self.section_input, 3, 1, 1, 3)
+        
         options_group.setLayout(options_layout)
         download_layout.addWidget(options_group)
 
@@ -634,14 +5715,12 @@ class MainWindow(QMainWindow):
         
         download_layout.addLayout(button_layout)
 
-        # Settings tab
-        settings_tab = QWidget()
-        settings_layout = QVBoxLayout(settings_tab)
-        settings_layout.setSpacing(15)
-        self.tab_widget.addTab(settings_tab, "Settings")
-        
-        # Add settings controls
-        self.create_settings_tab(settings_layout)
+        # Settings tab - controls are created the first time the tab is opened
+        self.settings_tab = QWidget()
+        self.settings_layout = QVBoxLayout(self.settings_tab)
+        self.settings_layout.setSpacing(15)
+        self.tab_widget.addTab(self.settings_tab, "Settings")
+        self.tab_widget.currentChanged.connect(self.on_tab_changed)
         
         # Set the scroll area's widget
         scroll.setWidget(container)
@@ -665,6 +5744,58 @@ class MainWindow(QMainWindow):
             
             self.status_text.append("Formats loaded successfully")
 
+    def on_tab_changed(self, index):
+        if self.tab_widget.widget(index) is self.settings_tab:
+            self.ensure_settings_tab()
+
+    def ensure_settings_tab(self):
+        """Build the Settings tab on first view and fill it from the loaded settings"""
+        if self.settings_tab_built:
+            return
+        self.create_settings_tab(self.settings_layout)
+        self.settings_tab_built = True
+        self.apply_settings_tab_values(self.settings)
+
+    def current_settings(self):
+        """Settings-tab values, read from the widgets once the tab exists"""
+        values = dict(SETTINGS_DEFAULTS)
+        values.update({key: self.settings[key] for key in SETTINGS_DEFAULTS if key in self.settings})
+        if self.settings_tab_built:
+            values.update({
+                'use_proxy': self.use_proxy.isChecked(),
+                'proxy_url': self.proxy_input.text(),
+                'rate_limit': self.rate_limit.value(),
+                'thread_count': self.thread_spin.value(),
+                'retry_attempts': self.retry_spin.value(),
+                'segmented_http': self.segmented_check.isChecked(),
+                'streaming_assembly': self.streaming_check.isChecked(),
+                'transcode_workers': self.transcode_spin.value(),
+                'job_parallelism': self.job_parallelism_spin.value(),
+                'execution_backend': self.backend_combo.currentData(),
+                'fragment_engine': self.fragment_engine_combo.currentData(),
+                'async_fragment_requests': self.async_requests_spin.value(),
+                'min_free_mb': self.min_free_spin.value(),
+                'pipe_transcode': self.pipe_transcode_check.isChecked(),
+                'checksum_algorithm': self.checksum_combo.currentData(),
+                'playlist_sync': self.playlist_sync_check.isChecked(),
+                'section_keyframe_cuts': self.section_cuts_check.isChecked(),
+                'verify_media': self.verify_media_check.isChecked(),
+                'format_ranking': self.format_ranking_check.isChecked(),
+                'codec_preference': self.codec_combo.currentText(),
+                'max_item_mb': self.max_item_spin.value(),
+                'max_item_kbps': self.max_kbps_spin.value(),
+                'max_audio_kbps': self.max_audio_kbps_spin.value(),
+                'use_proxy_pool': self.use_proxy_pool.isChecked(),
+                'proxy_pool': self.proxy_pool_input.toPlainText(),
+                'proxy_strategy': self.proxy_strategy_combo.currentText(),
+                'output_roots': self.output_roots_input.toPlainText(),
+                'output_policy': self.output_policy_combo.currentText(),
+                'proxy_probe_url': self.proxy_probe_input.text().strip() or PROXY_PROBE_URL,
+                'daemon_url': self.daemon_url_input.text().strip() or SETTINGS_DEFAULTS['daemon_url'],
+                'calibration_url': self.calibration_url_input.text().strip(),
+            })
+        return values
+
     def create_settings_tab(self, layout):
         # Download settings
         download_group = QGroupBox("Download Settings")
@@ -688,6 +5819,109 @@ class MainWindow(QMainWindow):
         self.rate_limit.setToolTip("0 means no speed limit")
         download_layout.addWidget(self.rate_limit, 1, 1)
         
+        # Retry settings
+        download_layout.addWidget(QLabel("Retry Attempts:"), 2, 0)
+        self.retry_spin = QSpinBox()
+        self.retry_spin.setRange(1, 10)
+        self.retry_spin.setValue(SETTINGS_DEFAULTS['retry_attempts'])
+        self.retry_spin.setToolTip("Attempts per item for network and throttling errors, with increasing delays")
+        download_layout.addWidget(self.retry_spin, 2, 1)
+        
+        # Segmented downloads for single-file formats
+        self.segmented_check = QCheckBox("Segmented HTTP Downloads")
+        self.segmented_check.setToolTip("Fetch single-file formats over one connection per download thread")
+        download_layout.addWidget(self.segmented_check, 3, 0, 1, 2)
+        
+        # In-order fragment assembly for HLS/DASH formats
+        self.streaming_check = QCheckBox("Streaming Fragment Assembly")
+        self.streaming_check.setToolTip("Append HLS/DASH fragments straight to the output file "
+                                        "instead of writing and re-reading each fragment")
+        download_layout.addWidget(self.streaming_check, 4, 0, 1, 2)
+
+        # FFmpeg conversions a worker node runs at once
+        download_layout.addWidget(QLabel("Transcode Workers:"), 5, 0)
+        self.transcode_spin = QSpinBox()
+        self.transcode_spin.setRange(1, 64)
+        self.transcode_spin.setValue(SETTINGS_DEFAULTS['transcode_workers'])
+        self.transcode_spin.setToolTip("Concurrent conversions; also caps how many jobs a worker node takes")
+        download_layout.addWidget(self.transcode_spin, 5, 1)
+
+        download_layout.addWidget(QLabel("Execution Backend:"), 6, 0)
+        self.backend_combo = QComboBox()
+        for label, backend in EXECUTION_BACKENDS.items():
+            self.backend_combo.addItem(label, backend)
+        self.backend_combo.setToolTip("Processes run each download in a separate worker process, "
+                                      "keeping the interface responsive and isolating crashes")
+        download_layout.addWidget(self.backend_combo, 6, 1)
+
+        download_layout.addWidget(QLabel("Keep Free Space (MB):"), 7, 0)
+        self.min_free_spin = QSpinBox()
+        self.min_free_spin.setRange(100, 1000000)
+        self.min_free_spin.setSingleStep(256)
+        self.min_free_spin.setValue(SETTINGS_DEFAULTS['min_free_mb'])
+        self.min_free_spin.setToolTip("Batch items are held, and downloads stopped, "
+                                      "before the output drive gets this full")
+        download_layout.addWidget(self.min_free_spin, 7, 1)
+
+        # MP3/WAV/FLAC encoded from the incoming stream
+        self.pipe_transcode_check = QCheckBox("Convert Audio While Downloading")
+        self.pipe_transcode_check.setToolTip("Pipe the audio stream into FFmpeg as it downloads instead of "
+                                             "saving it first; formats that need seeking still download first")
+        download_layout.addWidget(self.pipe_transcode_check, 8, 0, 1, 2)
+
+        download_layout.addWidget(QLabel("Output Checksums:"), 9, 0)
+        self.checksum_combo = QComboBox()
+        for label, algorithm in CHECKSUM_ALGORITHMS.items():
+            self.checksum_combo.addItem(label, algorithm)
+        self.checksum_combo.setToolTip("Hash each finished file as it is written and list it in a "
+                                       "manifest in the output folder after a batch (xxHash needs "
+                                       "the xxhash package, otherwise SHA-256 is used)")
+        download_layout.addWidget(self.checksum_combo, 9, 1)
+
+        # Daily re-runs of the same channels queue only what is new
+        self.playlist_sync_check = QCheckBox("Incremental Playlist Sync")
+        self.playlist_sync_check.setToolTip("With Download Playlist on, imported channel and playlist URLs are "
+                                            "listed newest first up to the first entry already downloaded, "
+                                            "and only the new entries are queued")
+        download_layout.addWidget(self.playlist_sync_check, 10, 0, 1, 2)
+
+        self.section_cuts_check = QCheckBox("Frame-Accurate Section Cuts")
+        self.section_cuts_check.setToolTip("Re-encode around the start and end of time-range downloads so they "
+                                           "cut exactly there; otherwise streams are copied and the cut falls "
+                                           "on the nearest keyframe")
+        download_layout.addWidget(self.section_cuts_check, 11, 0, 1, 2)
+
+        download_layout.addWidget(QLabel("Fragment Fetching:"), 12, 0)
+        self.fragment_engine_combo = QComboBox()
+        for label, engine in FRAGMENT_ENGINES.items():
+            self.fragment_engine_combo.addItem(label, engine)
+        self.fragment_engine_combo.setToolTip("Async fetches HLS/DASH fragments on one event loop over reused "
+                                              "connections, for streams with very many small fragments. "
+                                              "HTTP/2 needs the httpx and h2 packages. Downloads through a "
+                                              "proxy use threads.")
+        download_layout.addWidget(self.fragment_engine_combo, 12, 1)
+
+        download_layout.addWidget(QLabel("Async Fragment Requests:"), 13, 0)
+        self.async_requests_spin = QSpinBox()
+        self.async_requests_spin.setRange(1, 1024)
+        self.async_requests_spin.setValue(ASYNC_FRAGMENT_REQUESTS)
+        self.async_requests_spin.setToolTip("Fragment requests in flight per download with async fetching")
+        download_layout.addWidget(self.async_requests_spin, 13, 1)
+
+        download_layout.addWidget(QLabel("Jobs per Worker Node:"), 14, 0)
+        self.job_parallelism_spin = QSpinBox()
+        self.job_parallelism_spin.setRange(0, 64)
+        self.job_parallelism_spin.setSpecialValueText("Auto")
+        self.job_parallelism_spin.setToolTip("Jobs a worker node runs at once, sharing its download threads; "
+                                             "Auto derives it from the thread count and transcode workers")
+        download_layout.addWidget(self.job_parallelism_spin, 14, 1)
+
+        self.verify_media_check = QCheckBox("Verify Files After Batch")
+        self.verify_media_check.setToolTip("Check every file a batch produced with ffprobe against the "
+                                           "duration and streams yt-dlp reported; items with truncated or "
+                                           "incomplete files are downloaded again once")
+        download_layout.addWidget(self.verify_media_check, 15, 0, 1, 2)
+        
         download_group.setLayout(download_layout)
         layout.addWidget(download_group)
         
@@ -708,6 +5942,126 @@ class MainWindow(QMainWindow):
         proxy_group.setLayout(proxy_layout)
         layout.addWidget(proxy_group)
         
+        # Proxy pool settings
+        pool_group = QGroupBox("Proxy Pool")
+        pool_layout = QGridLayout()
+        pool_layout.setSpacing(10)
+        
+        self.use_proxy_pool = QCheckBox("Use Proxy Pool (overrides the single proxy)")
+        pool_layout.addWidget(self.use_proxy_pool, 0, 0, 1, 2)
+        
+        self.proxy_pool_input = QTextEdit()
+        self.proxy_pool_input.setPlaceholderText("One proxy per line, optional weight:\nhttp://proxy1:8080 2\nsocks5://proxy2:1080")
+        self.proxy_pool_input.setMaximumHeight(90)
+        pool_layout.addWidget(self.proxy_pool_input, 1, 0, 1, 2)
+        
+        pool_layout.addWidget(QLabel("Assignment:"), 2, 0)
+        self.proxy_strategy_combo = QComboBox()
+        self.proxy_strategy_combo.addItems(list(PROXY_STRATEGIES))
+        pool_layout.addWidget(self.proxy_strategy_combo, 2, 1)
+        
+        pool_layout.addWidget(QLabel("Health Check URL:"), 3, 0)
+        self.proxy_probe_input = QLineEdit()
+        self.proxy_probe_input.setPlaceholderText(PROXY_PROBE_URL)
+        pool_layout.addWidget(self.proxy_probe_input, 3, 1)
+        
+        pool_group.setLayout(pool_layout)
+        layout.addWidget(pool_group)
+        
+        # Batch items spread over several disks
+        volumes_group = QGroupBox("Output Volumes")
+        volumes_layout = QGridLayout()
+        volumes_layout.setSpacing(10)
+        
+        self.output_roots_input = QTextEdit()
+        self.output_roots_input.setPlaceholderText("Further output folders for batches, one per line:\n"
+                                                   "/mnt/disk2/videos\n/mnt/disk3/videos")
+        self.output_roots_input.setToolTip("Batch items are placed on the output folder or one of these. "
+                                           "An item keeps its folder on retries, and output-index.json in "
+                                           "the output folder records where each item went.")
+        self.output_roots_input.setMaximumHeight(90)
+        volumes_layout.addWidget(self.output_roots_input, 0, 0, 1, 2)
+        
+        volumes_layout.addWidget(QLabel("Placement:"), 1, 0)
+        self.output_policy_combo = QComboBox()
+        self.output_policy_combo.addItems(list(OUTPUT_POLICIES))
+        self.output_policy_combo.setToolTip("Most free space, in turn, or the folder whose disk took the "
+                                            "last finished files fastest")
+        volumes_layout.addWidget(self.output_policy_combo, 1, 1)
+        
+        volumes_group.setLayout(volumes_layout)
+        layout.addWidget(volumes_group)
+        
+        # Codec preference and caps applied when picking formats
+        format_group = QGroupBox("Format Selection")
+        format_layout = QGridLayout()
+        format_layout.setSpacing(10)
+        self.format_ranking_check = QCheckBox("Bandwidth-Optimal Formats")
+        self.format_ranking_check.setToolTip("Pick the smallest video and audio streams at each quality level "
+                                             "instead of yt-dlp's default ranking")
+        format_layout.addWidget(self.format_ranking_check, 0, 0, 1, 2)
+        
+        format_layout.addWidget(QLabel("Codec Preference:"), 1, 0)
+        self.codec_combo = QComboBox()
+        self.codec_combo.addItems(CODEC_PREFERENCES.keys())
+        self.codec_combo.setToolTip("Codecs allowed, in order of preference; players without AV1/VP9 "
+                                    "support need H.264")
+        format_layout.addWidget(self.codec_combo, 1, 1)
+        
+        format_layout.addWidget(QLabel("Max Size per Item (MB):"), 2, 0)
+        self.max_item_spin = QSpinBox()
+        self.max_item_spin.setRange(0, 1000000)
+        self.max_item_spin.setSpecialValueText("No Limit")
+        self.max_item_spin.setToolTip("Lower quality levels are used for items that would be larger")
+        format_layout.addWidget(self.max_item_spin, 2, 1)
+        
+        format_layout.addWidget(QLabel("Max Bitrate (kbit/s):"), 3, 0)
+        self.max_kbps_spin = QSpinBox()
+        self.max_kbps_spin.setRange(0, 1000000)
+        self.max_kbps_spin.setSpecialValueText("No Limit")
+        self.max_kbps_spin.setToolTip("Video and audio combined")
+        format_layout.addWidget(self.max_kbps_spin, 3, 1)
+        
+        format_layout.addWidget(QLabel("Max Audio Bitrate (kbit/s):"), 4, 0)
+        self.max_audio_kbps_spin = QSpinBox()
+        self.max_audio_kbps_spin.setRange(0, 1000)
+        self.max_audio_kbps_spin.setSpecialValueText("No Limit")
+        format_layout.addWidget(self.max_audio_kbps_spin, 4, 1)
+        format_group.setLayout(format_layout)
+        layout.addWidget(format_group)
+        
+        # Measured defaults for this machine
+        calibration_group = QGroupBox("Calibration")
+        calibration_layout = QGridLayout()
+        calibration_layout.setSpacing(10)
+        calibration_layout.addWidget(QLabel("Test Download URL:"), 0, 0)
+        self.calibration_url_input = QLineEdit()
+        self.calibration_url_input.setPlaceholderText("Blank: estimate the thread count from the disk and CPUs")
+        self.calibration_url_input.setToolTip("A large file on the kind of server you download from, "
+                                              "to measure how many download threads the link needs")
+        calibration_layout.addWidget(self.calibration_url_input, 0, 1)
+        self.calibrate_btn = QPushButton("Calibrate Now")
+        self.calibrate_btn.setToolTip("Measure FFmpeg encoding, disk writes to the output folder and, with a "
+                                      "test URL, download throughput, then set Transcode Workers, "
+                                      "Thread Count and Jobs per Worker Node (about a minute)")
+        self.calibrate_btn.clicked.connect(self.start_calibration)
+        calibration_layout.addWidget(self.calibrate_btn, 1, 1)
+        calibration_group.setLayout(calibration_layout)
+        layout.addWidget(calibration_group)
+        
+        # Service mode client settings
+        daemon_group = QGroupBox("Download Daemon")
+        daemon_layout = QGridLayout()
+        daemon_layout.setSpacing(10)
+        daemon_layout.addWidget(QLabel("Daemon URL:"), 0, 0)
+        self.daemon_url_input = QLineEdit()
+        self.daemon_url_input.setPlaceholderText(SETTINGS_DEFAULTS['daemon_url'])
+        self.daemon_url_input.setToolTip("Where Tools > Send Queue to Daemon submits jobs "
+                                         "(start one with: yt-mtdl.py --daemon)")
+        daemon_layout.addWidget(self.daemon_url_input, 0, 1)
+        daemon_group.setLayout(daemon_layout)
+        layout.addWidget(daemon_group)
+        
         # Save button
         save_layout = QHBoxLayout()
         save_layout.addStretch()
@@ -775,51 +6129,287 @@ class MainWindow(QMainWindow):
         if file_path:
             try:
                 with open(file_path, 'r', encoding='utf-8') as f:
-                    lines = [line.strip() for line in f if line.strip()]
-                
-                # Parse URLs and episode identifiers
-                parsed_urls = []
-                for line in lines:
-                    parts = line.split()
-                    if len(parts) >= 2:  # Has both identifier and URL
-                        episode_id = parts[0]
-                        url = parts[-1]  # Take the last part as URL
-                        parsed_urls.append({
-                            'episode_id': episode_id,
-                            'url': url
-                        })
-                    elif len(parts) == 1:  # Only URL
-                        parsed_urls.append({
-                            'episode_id': None,
-                            'url': parts[0]
-                        })
-                
-                if parsed_urls:
-                    self.url_list.clear()
-                    self.url_list.append(f"Found {len(parsed_urls)} URLs:")
-                    for entry in parsed_urls:
-                        display_text = f"{entry['episode_id']} - {entry['url']}" if entry['episode_id'] else entry['url']
-                        self.url_list.append(display_text)
-                    
-                    self.pending_urls = parsed_urls
-                    self.current_url_index = 0
-                    
-                    # Remove this line:
-                    # self.url_input.setText("Multiple URLs imported")
-                    
-                    QMessageBox.information(self, "Import Successful", f"Successfully imported {len(parsed_urls)} URLs")
-                else:
-                    QMessageBox.warning(self, "Import Failed", "No valid URLs found in the file")
-            
+                    parsed_urls = parse_url_list(f)
             except Exception as e:
                 QMessageBox.critical(self, "Error", f"Failed to import URLs: {str(e)}")
+                return
+            
+            if not parsed_urls:
+                QMessageBox.warning(self, "Import Failed", "No valid URLs found in the file")
+                return
+            
+            # Checking needs the extractor index, so it runs in the background
+            self.import_btn.setEnabled(False)
+            self.status_text.append(f"Checking {len(parsed_urls)} imported URL(s)...")
+            self.import_worker = UrlImportWorker(parsed_urls, not self.playlist_check.isChecked(),
+                                                 self.current_settings()['playlist_sync'])
+            self.import_worker.checked.connect(self.on_urls_checked)
+            self.import_worker.finished.connect(self.on_import_finished)
+            self.import_worker.start()
+
+    def stop_url_import(self):
+        if self.import_worker:
+            self.import_worker.checked.disconnect(self.on_urls_checked)
+            self.import_worker.finished.disconnect(self.on_import_finished)
+            self.import_worker.cancel()
+            # The current extractor lookup finishes on its own; the window keeps the thread until then
+            self.import_worker.setParent(self)
+            self.import_worker.finished.connect(self.import_worker.deleteLater)
+            self.import_worker = None
+        self.import_btn.setEnabled(True)
+
+    def on_import_finished(self):
+        self.import_worker = None
+        self.import_btn.setEnabled(True)
+
+    def on_urls_checked(self, parsed_urls, sync_entries, rejected, cache_error):
+        if cache_error:
+            self.status_text.append(f"Could not cache extractor index: {cache_error}")
+        
+        if parsed_urls or sync_entries:
+            if not self.batch_running:
+                self.stop_queue_probe()
+                self.stop_playlist_sync()
+                self.queue = DownloadQueue(order=QUEUE_ORDERS[self.queue_order_combo.currentText()])
+            # A running batch is extended rather than replaced
+            added = sum(1 for entry in parsed_urls if self.queue.add(entry) is not None)
+            self.refresh_queue_list()
+            self.start_queue_probe()
+            self.start_playlist_sync(sync_entries)
+            
+            message = f"Successfully imported {added} URLs"
+            if added < len(parsed_urls):
+                message += f"\nSkipped {len(parsed_urls) - added} duplicate(s) of queued items"
+            if sync_entries:
+                message += f"\nListing {len(sync_entries)} playlist(s) for new entries in the background"
+            if rejected:
+                message += f"\nRejected {len(rejected)} URL(s):\n" + "\n".join(rejected[:IMPORT_REJECTS_SHOWN])
+                if len(rejected) > IMPORT_REJECTS_SHOWN:
+                    message += f"\n... and {len(rejected) - IMPORT_REJECTS_SHOWN} more"
+            QMessageBox.information(self, "Import Successful", message)
+        else:
+            QMessageBox.warning(self, "Import Failed", f"All {len(rejected)} URL(s) were rejected:\n"
+                                + "\n".join(rejected[:IMPORT_REJECTS_SHOWN]))
 
     def start_download(self):
-        if hasattr(self, 'pending_urls') and self.pending_urls:
+        if self.queue.has_pending():
+            self.batch_running = True
+            self.batch_report = BatchReport(self.queue.order)
+            self.unverified = []
+            self.disk_budget = DiskSpaceBudget(self.current_settings()['min_free_mb'] * 1024 * 1024)
+            # Planning pass: estimate every item, then compare the batch with free space
+            if not self.start_queue_probe(planning=True):
+                self.report_disk_plan()
             self.start_bulk_download()
         else:
             self.start_single_download()
 
+    def selected_job_id(self):
+        item = self.url_list.currentItem()
+        return item.data(Qt.ItemDataRole.UserRole) if item else None
+
+    def describe_job(self, job):
+        labels = {'active': "[Downloading] ", 'attached': "[Attached] ", 'done': "[Done] ", 'failed': "[Failed] ", 'deferred': "[Retry] ",
+                  'cancelled': "[Cancelled] ", 'sent': "[Sent to Daemon] "}
+        text = labels.get(job['state'], "")
+        if job['state'] == 'pending':
+            if job['pinned']:
+                text += "[Pinned] "
+            if job['paused']:
+                text += "[Paused] "
+            elif job['held']:
+                text += "[Held: Disk Space] "
+        text += f"{job['episode_id']} - {job['url']}" if job['episode_id'] else job['url']
+        if job.get('section'):
+            text += f" [{format_section(job['section'])}]"
+        if job['estimate_bytes']:
+            text += f" (~{job['estimate_bytes'] / 1024 / 1024:.1f}MB)"
+        elif job['duration']:
+            text += f" ({int(job['duration']) // 60}:{int(job['duration']) % 60:02d})"
+        return text
+
+    def refresh_queue_list(self):
+        selected = self.selected_job_id()
+        self.url_list.clear()
+        for job in self.queue.ordered_jobs():
+            item = QListWidgetItem(self.describe_job(job))
+            item.setData(Qt.ItemDataRole.UserRole, job['id'])
+            self.url_list.addItem(item)
+            if job['id'] == selected:
+                self.url_list.setCurrentItem(item)
+
+    def on_queue_order_changed(self, text):
+        self.queue.order = QUEUE_ORDERS[text]
+        self.refresh_queue_list()
+        self.start_queue_probe()
+
+    def move_selected_job(self, offset):
+        job_id = self.selected_job_id()
+        if job_id is not None and self.queue.move(job_id, offset):
+            # Manual moves switch to priority order; keep the combo in sync quietly
+            self.queue_order_combo.blockSignals(True)
+            self.queue_order_combo.setCurrentText("Manual Priority")
+            self.queue_order_combo.blockSignals(False)
+            self.refresh_queue_list()
+
+    def toggle_selected_pin(self):
+        job_id = self.selected_job_id()
+        if job_id is not None:
+            job = self.queue.get(job_id)
+            self.queue.set_pinned(job_id, not job['pinned'])
+            self.refresh_queue_list()
+
+    def toggle_selected_pause(self):
+        job_id = self.selected_job_id()
+        if job_id is None:
+            return
+        job = self.queue.get(job_id)
+        self.queue.set_paused(job_id, not job['paused'])
+        self.refresh_queue_list()
+        
+        # Resume a batch that was only waiting on paused items
+        if self.batch_waiting and not job['paused']:
+            self.batch_waiting = False
+            self.start_bulk_download()
+
+    def start_queue_probe(self, planning=False):
+        """Fetch size/duration estimates for queued jobs when a size order or the batch
+        disk plan needs them; returns True if a probe is running"""
+        if not planning and self.queue.order not in ('shortest', 'largest'):
+            return False
+        if self.probe_worker and self.probe_worker.isRunning():
+            return True
+        jobs = [job for job in self.queue.pending_jobs() if job['estimate_bytes'] is None and job['duration'] is None]
+        if not jobs:
+            return False
+        self.probe_worker = QueueProbeWorker(jobs, self._get_download_options())
+        self.probe_worker.estimated.connect(self.on_job_estimated)
+        self.probe_worker.finished.connect(self.on_probe_finished)
+        self.probe_worker.start()
+        self.status_text.append(f"Estimating sizes for {len(jobs)} queued item(s)...")
+        return True
+
+    def get_playlist_sync(self):
+        if self.playlist_sync is None:
+            self.playlist_sync = PlaylistSync()
+        return self.playlist_sync
+
+    def start_playlist_sync(self, entries):
+        """List imported playlists in the background; their new entries are queued as they arrive"""
+        if not entries:
+            return
+        if self.sync_worker and self.sync_worker.isRunning():
+            self.sync_backlog.extend(entries)
+            return
+        sync = self.get_playlist_sync()
+        for entry in entries:
+            entry['sync_key'] = entry['media_key'] or entry['url']
+        states = {entry['sync_key']: sync.state(entry['sync_key']) for entry in entries}
+        self.sync_worker = PlaylistSyncWorker(entries, states, self._get_download_options())
+        self.sync_worker.synced.connect(self.on_playlist_synced)
+        self.sync_worker.finished.connect(self.on_playlist_sync_finished)
+        self.sync_worker.start()
+        self.status_text.append(f"Listing {len(entries)} playlist(s) for new entries...")
+
+    def stop_playlist_sync(self):
+        self.sync_backlog = []
+        if self.sync_worker:
+            self.sync_worker.synced.disconnect(self.on_playlist_synced)
+            self.sync_worker.finished.disconnect(self.on_playlist_sync_finished)
+            self.sync_worker.cancel()
+            self.sync_worker = None
+
+    def on_playlist_sync_finished(self):
+        entries, self.sync_backlog = self.sync_backlog, []
+        self.start_playlist_sync(entries)
+
+    def on_playlist_synced(self, result):
+        url = result['entry']['url']
+        if result['error']:
+            self.status_text.append(f"Playlist sync failed for {url}: {result['error']}")
+            return
+        self.get_playlist_sync().record_sync(result['key'], result)
+        added = 0
+        for item in result['new']:
+            media_key, item_url = canonical_media(item['url'])
+            entry = {'episode_id': None, 'url': item_url, 'media_key': media_key,
+                     'sync': (result['key'], item['id'], item['upload_date'])}
+            if self.queue.add(entry) is not None:
+                added += 1
+        self.status_text.append(
+            f"Synced {url}: {len(result['new'])} new of {result['listed']} listed "
+            f"({added} queued), {result['requests']} request(s) in {result['elapsed']:.1f}s"
+            + (", stopped at an entry already downloaded" if result['stopped'] else ""))
+        self.refresh_queue_list()
+        self.start_queue_probe()
+        # A running batch picks new entries up with its next item; one waiting on paused items starts now
+        if self.batch_waiting and added:
+            self.batch_waiting = False
+            self.start_bulk_download()
+
+    def mark_synced(self, job):
+        """Remember a downloaded playlist entry so the next sync stops at it"""
+        if job.get('sync'):
+            self.get_playlist_sync().mark_downloaded(*job['sync'])
+
+    def stop_queue_probe(self):
+        if self.probe_worker:
+            self.probe_worker.estimated.disconnect(self.on_job_estimated)
+            self.probe_worker.finished.disconnect(self.on_probe_finished)
+            self.probe_worker.cancel()
+            self.probe_worker = None
+
+    def on_job_estimated(self, job_id, estimate_bytes, duration):
+        self.queue.set_estimate(job_id, estimate_bytes, duration)
+        self.refresh_queue_list()
+
+    def on_probe_finished(self):
+        if self.batch_running:
+            self.report_disk_plan()
+
+    def job_disk_usage(self, job):
+        options = self._get_download_options(job['episode_id'], job.get('section'), self.job_output_dir(job))
+        return estimate_disk_usage(self.queue.estimated_size(job), job['duration'], options)
+
+    def report_disk_plan(self):
+        """Compare the estimated disk use of the rest of the batch with free space"""
+        jobs = self.queue.pending_jobs()
+        usages = [self.job_disk_usage(job) for job in jobs if self.queue.estimated_size(job) is not None]
+        if not usages:
+            return
+        try:
+            plan = {path: (needed, volume_free_bytes(path)) for path, needed in plan_disk_usage(usages).items()}
+        except OSError as e:
+            self.status_text.append(f"Could not check free disk space: {str(e)}")
+            return
+        
+        unknown = len(jobs) - len(usages)
+        self.status_text.append(f"\nDisk plan for {len(usages)} item(s)"
+                                + (f" ({unknown} without a size estimate)" if unknown else "") + ":")
+        min_free = self.disk_budget.min_free
+        for path, (needed, free) in plan.items():
+            line = f"  {path}: ~{needed / 1024 ** 3:.1f}GB needed, {free / 1024 ** 3:.1f}GB free"
+            if needed + min_free > free:
+                line += (f" - not enough for the whole batch, items will be held to keep "
+                         f"{min_free / 1024 / 1024:.0f}MB free")
+            self.status_text.append(line)
+
+    def admit_job(self, job):
+        """DownloadQueue.next_job hook: hold jobs that would take a volume below the
+        free-space minimum; returns the reason or None"""
+        try:
+            shortfall = self.disk_budget.shortfall(peak_disk_usage(self.job_disk_usage(job)))
+        except OSError:
+            return None  # let the download report the problem
+        if shortfall:
+            path, missing = shortfall
+            return f"needs {missing / 1024 / 1024:.0f}MB more free space on {path}"
+        return None
+
+    def resume_held_batch(self):
+        if self.batch_running and not (self.worker and self.worker.isRunning()):
+            self.start_bulk_download()
+
     def setup_error_logging(self):
         self.error_log_path = os.path.join(os.path.expanduser('~'), '.ytdl_errors.log')
         
@@ -834,6 +6424,14 @@ class MainWindow(QMainWindow):
         save_errors_action = QAction('Save Error Log', self)
         save_errors_action.triggered.connect(self.save_error_log)
         tools_menu.addAction(save_errors_action)
+        
+        proxy_stats_action = QAction('View Proxy Pool Stats', self)
+        proxy_stats_action.triggered.connect(self.view_proxy_stats)
+        tools_menu.addAction(proxy_stats_action)
+        
+        daemon_action = QAction('Send Queue to Daemon', self)
+        daemon_action.triggered.connect(self.send_queue_to_daemon)
+        tools_menu.addAction(daemon_action)
 
     def log_error(self, error_info):
         self.error_log.append(error_info)
@@ -848,6 +6446,8 @@ class MainWindow(QMainWindow):
         for error in self.error_log:
             log_text += f"Time: {error['timestamp']}\n"
             log_text += f"URL: {error['url']}\n"
+            if error.get('category'):
+                log_text += f"Category: {ERROR_LABELS[error['category']]} ({error.get('attempts', 1)} attempts)\n"
             log_text += f"Error: {error['error']}\n"
             log_text += "-" * 50 + "\n"
 
@@ -869,51 +6469,326 @@ class MainWindow(QMainWindow):
                 for error in self.error_log:
                     f.write(f"Time: {error['timestamp']}\n")
                     f.write(f"URL: {error['url']}\n")
+                    if error.get('category'):
+                        f.write(f"Category: {ERROR_LABELS[error['category']]} ({error.get('attempts', 1)} attempts)\n")
                     f.write(f"Error: {error['error']}\n")
                     f.write("-" * 50 + "\n")
         except Exception as e:
             QMessageBox.warning(self, "Error", f"Failed to save error log: {str(e)}")
 
     def start_bulk_download(self):
-        if self.current_url_index >= len(self.pending_urls):
-            total_downloads = len(self.pending_urls)
-            success_count = self.successful_downloads
-            error_count = self.failed_downloads
-            
-            summary_msg = f"Downloads completed!\n\nSuccessful: {success_count}\nFailed: {error_count}"
-            
-            if error_count > 0:
-                reply = QMessageBox.question(
-                    self,
-                    "Downloads Complete",
-                    f"{summary_msg}\n\nWould you like to view the error log?",
-                    QMessageBox.StandardButton.Yes | QMessageBox.StandardButton.No,
-                    QMessageBox.StandardButton.Yes
-                )
-                if reply == QMessageBox.StandardButton.Yes:
-                    self.view_error_log()
+        job = self.queue.next_job(self.admit_job if self.disk_budget else None)
+        if job is None:
+            if self.queue.held_count():
+                held = next(job for job in self.queue.pending_jobs() if job['held'])
+                self.status_text.append(f"\nHolding {self.queue.held_count()} item(s) for disk space "
+                                        f"({held['held']}); checking again in {DISK_RECHECK_MS // 1000}s")
+                self.refresh_queue_list()
+                QTimer.singleShot(DISK_RECHECK_MS, self.resume_held_batch)
+            elif self.queue.deferred_jobs():
+                self.start_retry_pass()
+            elif self.queue.paused_count():
+                # Nothing runnable until an item is resumed
+                self.batch_waiting = True
+                self.status_text.append(f"\nWaiting on {self.queue.paused_count()} paused item(s)")
+            elif self.unverified:
+                self.start_integrity_sweep()
             else:
-                QMessageBox.information(self, "Complete", summary_msg)
-            
-            # Reset counters
-            self.successful_downloads = 0
-            self.failed_downloads = 0
-            self.progress_bar.setFormat("%p%")
+                self.finish_batch()
+            return
+        
+        url = job['url']
+        episode_id = job['episode_id']
+        options = self._get_download_options(episode_id, job.get('section'), self.job_output_dir(job))
+        job['outtmpl'] = options['outtmpl']
+        
+        # Same media and format as an earlier or in-flight job: reuse its file
+        flight = (job.get('media_key'), format_identity(options))
+        claim = self.flights.claim(flight, job)
+        if claim == 'finished':
+            self.reuse_media(job, self.flights.finished[flight])
+            QTimer.singleShot(0, self.start_bulk_download)
+            return
+        if claim == 'attached':
+            self.queue.finish(job, 'attached')
+            self.status_text.append(f"\n{url} is already downloading, waiting for it")
+            self.refresh_queue_list()
+            QTimer.singleShot(0, self.start_bulk_download)
             return
         
-        current_entry = self.pending_urls[self.current_url_index]
-        url = current_entry['url']
-        episode_id = current_entry['episode_id']
+        self.current_job = job
+        self.current_flight = flight
+        if self.output_volumes:
+            try:
+                self.output_volumes.place(job, self.queue.estimated_size(job))
+            except OSError as e:
+                self.status_text.append(f"Could not update the output index: {str(e)}")
+        if self.disk_budget:
+            try:
+                self.disk_budget.reserve(job['id'], peak_disk_usage(self.job_disk_usage(job)))
+            except OSError:
+                pass
+        job['proxy'] = self.assign_proxy(options)
+        self.batch_report.job_started(job)
+        position = self.queue.started_count()
         
-        self.status_text.append(f"\nStarting download {self.current_url_index + 1} of {len(self.pending_urls)}")
+        self.status_text.append(f"\nStarting download {position} of {len(self.queue)}")
         self.status_text.append(f"URL: {url}")
         if episode_id:
             self.status_text.append(f"Episode ID: {episode_id}")
+        if self.output_volumes:
+            self.status_text.append(f"Output folder: {os.path.dirname(options['outtmpl'])}")
         
-        self.progress_bar.setFormat(f"%p% (File {self.current_url_index + 1}/{len(self.pending_urls)})")
+        self.progress_bar.setFormat(f"%p% (File {position}/{len(self.queue)})")
         
-        options = self._get_download_options(episode_id)
         self.start_worker(url, options)
+        self.refresh_queue_list()
+
+    def complete_current_job(self, state, category=None):
+        job = self.current_job
+        if self.disk_budget:
+            self.disk_budget.release(job['id'])
+        # Jobs stopped for disk space go back to the queue and are held until it frees up
+        self.queue.finish(job, 'pending' if state == 'held' else state)
+        if self.batch_report:
+            details = dict(self.worker.write_stats() or {}, **(self.worker.selection_stats() or {}),
+                           **(self.worker.section_stats() or {}))
+            self.batch_report.job_finished(job, state, self.worker.downloaded_bytes(), category, details)
+            if state == 'done':
+                self.batch_report.files.extend(self.worker.checksums)
+        if state == 'done':
+            # A playlist entry counts as synced once its files pass the check
+            if self.current_settings()['verify_media'] and self.worker.expected_media:
+                self.unverified.append((job, self.worker.expected_media))
+            else:
+                self.mark_synced(job)
+        if self.output_volumes:
+            files = [path for _, path in self.worker.media_files] if state == 'done' else ()
+            try:
+                self.output_volumes.finish(job, files, self.worker.write_timings)
+            except OSError as e:
+                self.status_text.append(f"Could not update the output index: {str(e)}")
+        self.complete_flight(state == 'done')
+        self.refresh_queue_list()
+
+    def complete_flight(self, success):
+        """Hand the current job's output to jobs waiting on the same media, or release them"""
+        flight, self.current_flight = self.current_flight, None
+        if flight is None:
+            return
+        if not success:
+            for job in self.flights.fail(flight):
+                self.queue.finish(job, 'pending')
+            return
+        
+        media_files = self.worker.media_files
+        files = [path for key, path in media_files if key == flight[0]] or [path for _, path in media_files]
+        waiters = self.flights.complete(flight, files)
+        # Playlist entries can be reused by later single-video jobs too
+        for key, path in media_files:
+            waiters += self.flights.complete((key, flight[1]), [path])
+        for job in waiters:
+            if files:
+                self.reuse_media(job, files)
+            else:
+                self.queue.finish(job, 'pending')
+
+    def reuse_media(self, job, files):
+        """Finish a job with a link to another job's output instead of downloading"""
+        src = files[0]
+        if job['episode_id']:
+            dst = os.path.join(os.path.dirname(job['outtmpl']), job['episode_id'] + os.path.splitext(src)[1])
+        else:
+            dst = src
+        
+        if self.batch_report:
+            self.batch_report.job_started(job)
+        try:
+            method = link_media(src, dst)
+        except OSError as e:
+            self.status_text.append(f"Failed to reuse {src} for {job['url']}: {str(e)}")
+            self.failed_downloads += 1
+            self.queue.finish(job, 'failed')
+            if self.batch_report:
+                self.batch_report.job_finished(job, 'failed', 0, classify_error(str(e), e))
+        else:
+            self.status_text.append(f"\nReused {os.path.basename(src)} for {job['url']} ({method})")
+            self.successful_downloads += 1
+            self.queue.finish(job, 'done')
+            self.mark_synced(job)
+            if self.batch_report:
+                self.batch_report.job_finished(job, 'done', 0, None, {'reused_from': src, 'link': method})
+                # A link or copy has the source's bytes, so its checksum carries over
+                source = next((entry for entry in self.batch_report.files if entry['path'] == src), None)
+                if source is not None and dst != src:
+                    self.batch_report.files.append(dict(source, path=dst, url=job['url']))
+        self.refresh_queue_list()
+
+    def start_integrity_sweep(self):
+        """Probe the files the batch produced; the sweep's results come back to on_integrity_verified"""
+        expectations = [expected for _, files in self.unverified for expected in files]
+        self.status_text.append(f"\nVerifying {len(expectations)} file(s) with ffprobe...")
+        self.integrity_worker = IntegritySweepWorker(expectations)
+        self.integrity_worker.verified.connect(self.on_integrity_verified)
+        self.integrity_worker.failed.connect(self.on_integrity_failed)
+        self.integrity_worker.start()
+
+    def stop_integrity_sweep(self):
+        if self.integrity_worker:
+            self.integrity_worker.verified.disconnect(self.on_integrity_verified)
+            self.integrity_worker.failed.disconnect(self.on_integrity_failed)
+            self.integrity_worker.cancel()
+            # Probes already running finish on their own; the window keeps the thread until then
+            self.integrity_worker.setParent(self)
+            self.integrity_worker.finished.connect(self.integrity_worker.deleteLater)
+            self.integrity_worker = None
+
+    def on_integrity_verified(self, results):
+        """Delete files that failed the check and queue only their jobs again, once"""
+        self.integrity_worker = None
+        if not self.batch_running:
+            return
+        batch, self.unverified = self.unverified, []
+        by_path = {result['path']: result for result in results}
+        requeued = 0
+        for job, files in batch:
+            bad = [by_path[expected['path']] for expected in files if by_path[expected['path']]['problems']]
+            for result in (by_path[expected['path']] for expected in files):
+                result.update(url=job['url'], episode_id=job.get('episode_id'), requeued=False)
+            if not bad:
+                self.mark_synced(job)
+                continue
+            for result in bad:
+                self.status_text.append(f"Integrity check failed for {os.path.basename(result['path'])}: "
+                                        f"{'; '.join(result['problems'])}")
+            self.successful_downloads -= 1
+            requeue = job.get('integrity_requeues', 0) < INTEGRITY_REQUEUES
+            self.batch_report.job_failed_check(job, [problem for result in bad for problem in result['problems']],
+                                               requeue)
+            if not requeue:
+                self.failed_downloads += 1
+                self.queue.finish(job, 'failed')
+                continue
+            # Good files of a playlist job stay, so yt-dlp only fetches the bad ones again
+            paths = {result['path'] for result in bad}
+            for path in paths:
+                try:
+                    os.remove(path)
+                except OSError:
+                    pass
+            self.batch_report.files = [entry for entry in self.batch_report.files if entry['path'] not in paths]
+            for result in bad:
+                result['requeued'] = True
+            job['integrity_requeues'] = job.get('integrity_requeues', 0) + 1
+            self.queue.finish(job, 'pending')
+            requeued += 1
+        self.batch_report.integrity.extend(results)
+        failures = sum(1 for result in results if result['problems'])
+        self.status_text.append(f"Verified {len(results)} file(s): {failures} failed"
+                                + (f", re-queued {requeued} item(s)" if requeued else ""))
+        self.refresh_queue_list()
+        self.start_bulk_download()
+
+    def on_integrity_failed(self, message):
+        self.integrity_worker = None
+        if not self.batch_running:
+            return
+        self.status_text.append(f"Integrity check skipped: {message}")
+        # Unchecked files count as downloaded, as they do with the check turned off
+        for job, _ in self.unverified:
+            self.mark_synced(job)
+        self.unverified = []
+        self.start_bulk_download()
+
+    def finish_batch(self):
+        self.batch_running = False
+        self.current_job = None
+        self.disk_budget = None
+        self.remove_scratch_files()
+        success_count = self.successful_downloads
+        error_count = self.failed_downloads
+        
+        summary_msg = f"Downloads completed!\n\nSuccessful: {success_count}\nFailed: {error_count}"
+        if self.retried_downloads:
+            summary_msg += f"\nRetried after transient errors: {self.retried_downloads}"
+        
+        if self.batch_report:
+            summary = self.batch_report.summary()
+            summary_msg += (f"\nItems per hour: {summary['items_per_hour']:.1f}"
+                            f"\nMean turnaround: {summary['mean_turnaround']:.0f}s")
+            if 'files_verified' in summary:
+                summary_msg += (f"\nVerified {summary['files_verified']} file(s) with ffprobe, "
+                                f"{summary['integrity_failures']} failed the check")
+            if 'format_bytes_saved' in summary:
+                summary_msg += (f"\nFormat selection saved {summary['format_bytes_saved'] / 1024 / 1024:.1f}MB "
+                                f"against the default formats")
+            try:
+                self.batch_report.save()
+                summary_msg += f"\n\nBatch report saved to {BATCH_REPORT_PATH}"
+            except Exception as e:
+                self.status_text.append(f"Failed to save batch report: {str(e)}")
+            if self.batch_report.files:
+                try:
+                    manifest = self.batch_report.save_manifest(self.output_path.text())
+                    summary_msg += f"\nChecksum manifest saved to {manifest}"
+                except Exception as e:
+                    self.status_text.append(f"Failed to save checksum manifest: {str(e)}")
+        
+        if error_count > 0:
+            reply = QMessageBox.question(
+                self,
+                "Downloads Complete",
+                f"{summary_msg}\n\nWould you like to view the error log?",
+                QMessageBox.StandardButton.Yes | QMessageBox.StandardButton.No,
+                QMessageBox.StandardButton.Yes
+            )
+            if reply == QMessageBox.StandardButton.Yes:
+                self.view_error_log()
+        else:
+            QMessageBox.information(self, "Complete", summary_msg)
+        
+        # Reset counters
+        self.successful_downloads = 0
+        self.failed_downloads = 0
+        self.retried_downloads = 0
+        self.progress_bar.setFormat("%p%")
+
+    def remove_scratch_files(self):
+        """Delete what failed and cancelled items left in the .temp folder of each output root,
+        except what a later run can resume from"""
+        volumes = self.get_output_volumes()
+        size = 0
+        for root in volumes.roots if volumes else [self.output_path.text()]:
+            scratch = os.path.join(root, '.temp')
+            if not os.path.isdir(scratch):
+                continue
+            for path in scratch_leftovers(scratch):
+                if os.path.isdir(path):
+                    shutil.rmtree(path, ignore_errors=True)
+                    continue
+                try:
+                    size += os.path.getsize(path)
+                    os.remove(path)
+                except OSError:
+                    pass
+            try:
+                os.rmdir(scratch)  # only if nothing was kept
+            except OSError:
+                pass
+        if size:
+            self.status_text.append(f"Removed {size / 1024 / 1024:.1f}MB of leftover temporary files")
+
+    def start_retry_pass(self):
+        """Re-queue transient failures at the end of the batch instead of failing them"""
+        retries = self.queue.requeue_deferred()
+        self.retried_downloads += len(retries)
+        self.refresh_queue_list()
+        
+        retry_pass = max(job['retry_pass'] for job in retries)
+        delay = RETRY_PASS_DELAY_MS * retry_pass
+        self.status_text.append(f"\nRetry pass {retry_pass}: retrying {len(retries)} item(s) "
+                                f"after transient errors in {delay // 1000}s")
+        QTimer.singleShot(delay, self.start_bulk_download)
 
     def start_single_download(self):
         url = self.url_input.text().strip()
@@ -921,11 +6796,21 @@ class MainWindow(QMainWindow):
             QMessageBox.warning(self, "Error", "Please enter a URL")
             return
         
-        options = self._get_download_options()
+        section = None
+        if self.section_input.text().strip():
+            section = parse_section(self.section_input.text())
+            if section is None:
+                QMessageBox.warning(self, "Error", "Section must be a time range such as 1:02:00-1:10:30 "
+                                    "(either side can be left out)")
+                return
+        
+        options = self._get_download_options(section=section)
+        self.assign_proxy(options)
         self.start_worker(url, options)
 
     def get_available_formats(self, url):
         try:
+            yt_dlp = load_yt_dlp()
             ydl_opts = {
                 'quiet': True,
                 'no_warnings': True
@@ -1001,78 +6886,144 @@ class MainWindow(QMainWindow):
             self.status_text.append(f"Error fetching formats: {str(e)}")
             return []
 
-    def _get_download_options(self, episode_id=None):
-        selected_format = self.format_combo.currentIndex()
-        format_data = self.format_combo.itemData(selected_format)
+    def selected_extra_outputs(self):
+        return [codec for codec, check in self.extra_output_checks.items() if check.isChecked()]
+
+    def _get_download_options(self, episode_id=None, section=None, output_dir=None):
+        format_data = self.format_combo.itemData(self.format_combo.currentIndex())
+        return build_download_options(
+            self.current_settings(), output_dir or self.output_path.text(), format_data,
+            self.quality_combo.currentText(), self.subtitle_check.isChecked(),
+            not self.playlist_check.isChecked(), episode_id, self.selected_extra_outputs(), section)
+
+    def get_output_volumes(self):
+        """Output roots batch items are spread over, rebuilt when their settings change; None if
+        there is only the output folder"""
+        settings = self.current_settings()
+        config = (self.output_path.text(), settings['output_roots'], settings['output_policy'])
+        if self.output_volumes_config != config:
+            self.output_volumes = output_volumes_for(settings, self.output_path.text())
+            self.output_volumes_config = config
+        return self.output_volumes
+
+    def job_output_dir(self, job):
+        volumes = self.get_output_volumes()
+        return volumes.choose(job) if volumes else self.output_path.text()
+
+    def get_proxy_pool(self):
+        """The configured proxy pool, rebuilt when its settings change; None if disabled"""
+        settings = self.current_settings()
+        endpoints = ProxyPool.parse(settings['proxy_pool'])
+        if not settings['use_proxy_pool'] or not endpoints:
+            return None
         
-        if episode_id:
-            output_template = os.path.join(self.output_path.text(), f'{episode_id}.%(ext)s')
-        else:
-            output_template = os.path.join(self.output_path.text(), '%(title)s.%(ext)s')
-    
-        # Base options
-        options = {
-            'outtmpl': output_template,
-            'writesubtitles': self.subtitle_check.isChecked(),
-            'noplaylist': not self.playlist_check.isChecked(),
-            'thread_count': self.thread_spin.value(),
-            'keepvideo': False,
-        }
-    
-        # Handle quality selection for video formats
-        quality_map = {
-            "Best": None,  # No limit = best available
-            "High": "1080",
-            "Medium": "720",
-            "Low": "480"
-        }
-        selected_quality = self.quality_combo.currentText()
-        height_limit = quality_map[selected_quality]
-    
-        # Format selection
-        if format_data and format_data['type'] == 'audio':
-            ext = format_data['ext']
-            options.update({
-                'format': 'bestaudio/best',
-                'postprocessors': [{
-                    'key': 'FFmpegExtractAudio',
-                    'preferredcodec': ext,
-                    'preferredquality': '320' if ext == 'mp3' else None,
-                    'nopostoverwrites': False
-                }],
-                'extractaudio': True,
-                'addmetadata': True,
-                'writethumbnail': False,
-                'postprocessor_args': [
-                    '-vn',
-                    '-acodec', {'mp3': 'libmp3lame', 'wav': 'pcm_s16le', 'flac': 'flac'}[ext],
-                    '-ar', '44100',
-                    '-ac', '2',
-                    '-b:a', '320k'
-                ],
-            })
-        else:
-            # Video format selection with quality consideration
-            if height_limit:
-                format_str = f'bestvideo[height<={height_limit}]+bestaudio/best[height<={height_limit}]'
-            else:
-                format_str = 'bestvideo+bestaudio/best'
-            
-            options.update({
-                'format': format_str,
-                'merge_output_format': 'mp4'
-            })
-    
-        if self.use_proxy.isChecked() and self.proxy_input.text().strip():
-            options['proxy'] = self.proxy_input.text().strip()
+        config = (tuple(endpoints), settings['proxy_probe_url'])
+        if self.proxy_pool is None or self.proxy_pool_config != config:
+            if self.proxy_pool:
+                self.proxy_pool.stop()
+            self.proxy_pool = ProxyPool(endpoints, probe_url=settings['proxy_probe_url'])
+            self.proxy_pool_config = config
+            self.proxy_pool.start()
+        self.proxy_pool.strategy = PROXY_STRATEGIES.get(settings['proxy_strategy'], 'least_loaded')
+        return self.proxy_pool
+
+    def assign_proxy(self, options):
+        """Route the next job through the proxy pool, if one is configured"""
+        pool = self.get_proxy_pool()
+        self.worker_proxy = pool.acquire() if pool else None
+        if self.worker_proxy:
+            options['proxy'] = self.worker_proxy
+        return self.worker_proxy
+
+    def release_proxy(self, success):
+        if self.worker_proxy and self.proxy_pool:
+            self.proxy_pool.release(
+                self.worker_proxy, success, self.worker.downloaded_bytes(),
+                time.monotonic() - self.worker_started,
+                network_error=self.worker.error_category == ERROR_NETWORK)
+        self.worker_proxy = None
+
+    def send_queue_to_daemon(self):
+        """Submit the pending queue items to a running daemon with the current download choices"""
+        jobs = self.queue.pending_jobs()
+        if not jobs:
+            QMessageBox.information(self, "Daemon", "There are no pending items to send. Import URLs first.")
+            return
         
-        if self.rate_limit.value() > 0:
-            options['ratelimit'] = self.rate_limit.value() * 1024
-    
-        return options
+        format_data = self.format_combo.itemData(self.format_combo.currentIndex())
+        base_url = self.current_settings()['daemon_url']
+        submitted = duplicates = 0
+        rejected = []
+        try:
+            token = daemon_token()
+            for job in jobs:
+                status, reply = daemon_request(base_url, 'POST', '/jobs', {
+                    'url': job['url'],
+                    'episode_id': job['episode_id'],
+                    'section': format_section(job['section']) if job.get('section') else None,
+                    'format': format_data['ext'] if format_data and format_data['type'] == 'audio' else 'video',
+                    'quality': self.quality_combo.currentText(),
+                    'subtitles': self.subtitle_check.isChecked(),
+                    'playlist': self.playlist_check.isChecked(),
+                    'also': self.selected_extra_outputs(),
+                    'priority': job['priority'],
+                    'output_dir': self.output_path.text(),
+                }, token=token)
+                if status == 201:
+                    submitted += 1
+                    self.queue.finish(job, 'sent')
+                elif status == 409:
+                    duplicates += 1
+                    self.queue.finish(job, 'sent')
+                elif status == 401:
+                    QMessageBox.warning(self, "Daemon", f"The daemon at {base_url} refused the API token: "
+                                        f"{reply.get('error')}")
+                    return
+                else:
+                    rejected.append(f"{job['url']}: {reply.get('error', status)}")
+        except OSError as e:
+            QMessageBox.warning(self, "Daemon", f"Could not reach the daemon at {base_url}: {str(e)}")
+            return
+        finally:
+            self.refresh_queue_list()
+        
+        QMessageBox.information(self, "Daemon", f"Sent {submitted} item(s) to {base_url}"
+                                + (f"\n{duplicates} were already queued there" if duplicates else "")
+                                + (f"\n{len(rejected)} were rejected:\n" + "\n".join(rejected[:5]) if rejected else ""))
+
+    def view_proxy_stats(self):
+        if not self.proxy_pool:
+            QMessageBox.information(self, "Proxy Pool", "The proxy pool is not in use.")
+            return
+        
+        stats_text = "Proxy Pool:\n\n"
+        for proxy in self.proxy_pool.stats():
+            latency = f"{proxy['latency'] * 1000:.0f} ms" if proxy['latency'] is not None else "n/a"
+            stats_text += f"Proxy: {proxy['url']} (weight {proxy['weight']:g})\n"
+            stats_text += f"State: {'healthy' if proxy['healthy'] else 'ejected'}, latency {latency}\n"
+            stats_text += (f"Jobs: {proxy['jobs']} ({proxy['active']} active, {proxy['failed_jobs']} failed), "
+                           f"ejected {proxy['ejections']} times\n")
+            stats_text += (f"Transferred: {proxy['bytes'] / 1024 / 1024:.1f}MB "
+                           f"at {proxy['throughput'] / 1024 / 1024:.2f} MB/s\n")
+            stats_text += "-" * 50 + "\n"
+        
+        dialog = QDialog(self)
+        dialog.setWindowTitle("Proxy Pool Stats")
+        dialog.setMinimumSize(600, 400)
+        
+        layout = QVBoxLayout(dialog)
+        text_edit = QTextEdit()
+        text_edit.setReadOnly(True)
+        text_edit.setText(stats_text)
+        layout.addWidget(text_edit)
+        
+        dialog.exec()
 
     def start_worker(self, url, options):
-        self.worker = DownloadWorker(url, options)
+        if self.worker_proxy:
+            self.status_text.append(f"Using proxy: {self.worker_proxy}")
+        self.worker_started = time.monotonic()
+        self.worker = create_download_worker(url, options)
         self.worker.progress.connect(self.update_progress)
         self.worker.finished.connect(self.download_finished)
         self.worker.error.connect(self.download_error)
@@ -1086,6 +7037,13 @@ class MainWindow(QMainWindow):
         self.status_text.clear()
         self.status_text.append("Starting download...")
 
+    def release_worker(self):
+        """Hand the finished worker's thread back to the pool and drop its job state"""
+        worker, self.worker = self.worker, None
+        if worker:
+            worker.wait()
+            worker.release()
+
     def cancel_download(self):
         if self.worker:
             self.worker.cancel()
@@ -1105,19 +7063,23 @@ class MainWindow(QMainWindow):
         # Reset Downloads
         self.successful_downloads = 0
         self.failed_downloads = 0
+        self.retried_downloads = 0
         
         # Re-enable buttons
         self.download_btn.setEnabled(True)
         self.cancel_btn.setEnabled(False)
         
         # Clear bulk download data
-        if hasattr(self, 'pending_urls'):
-            delattr(self, 'pending_urls')
-        if hasattr(self, 'current_url_index'):
-            delattr(self, 'current_url_index')
+        self.stop_url_import()
+        self.stop_queue_probe()
+        self.stop_integrity_sweep()
+        self.queue = DownloadQueue(order=QUEUE_ORDERS[self.queue_order_combo.currentText()])
+        self.current_job = None
+        self.batch_running = False
+        self.batch_waiting = False
+        self.unverified = []
         
         # Reset placeholders
-        self.url_list.setPlaceholderText("Imported URLs will appear here")
         self.status_text.setPlaceholderText("Download status will appear here")
         
         # Update status bar
@@ -1134,8 +7096,8 @@ class MainWindow(QMainWindow):
             percentage = (progress['downloaded'] / progress['total']) * 100
             self.progress_bar.setValue(int(percentage))
             
-            if hasattr(self, 'pending_urls'):
-                self.progress_bar.setFormat(f"{percentage:.1f}% (File {self.current_url_index + 1}/{len(self.pending_urls)})")
+            if self.batch_running:
+                self.progress_bar.setFormat(f"{percentage:.1f}% (File {self.queue.started_count()}/{len(self.queue)})")
             else:
                 self.progress_bar.setFormat(f"{percentage:.1f}%")
             
@@ -1161,10 +7123,17 @@ class MainWindow(QMainWindow):
         )
 
     def download_finished(self, success):
+        self.release_proxy(success)
         if success:
             self.successful_downloads += 1
-            if hasattr(self, 'pending_urls'):
-                self.current_url_index += 1
+            section = self.worker.section_stats()
+            if section:
+                self.status_text.append(
+                    f"Section {section['section']}: fetched {section['section_bytes'] / 1024 / 1024:.1f}MB "
+                    f"of ~{section['full_bytes'] / 1024 / 1024:.1f}MB for the whole item "
+                    f"({section['section_fraction']:.0%})")
+            if self.batch_running:
+                self.complete_current_job('done')
                 self.progress_bar.setFormat("%p%")
                 QTimer.singleShot(2000, self.start_bulk_download)
             else:
@@ -1172,8 +7141,8 @@ class MainWindow(QMainWindow):
                 self.cancel_btn.setEnabled(False)
                 self.status_text.append("Download and conversion completed successfully!")
                 self.progress_bar.setFormat("%p%")
-        else:
-            self.failed_downloads += 1
+        # Failures were handled by download_error, which runs first
+        self.release_worker()
         
         self.progress_bar.setValue(100)
         self.update_status_bar()
@@ -1186,9 +7155,20 @@ class MainWindow(QMainWindow):
         
         # Remove the QMessageBox.critical popup
         
-        if hasattr(self, 'pending_urls'):
-            self.current_url_index += 1
+        category = self.worker.error_category if self.worker else None
+        if self.batch_running:
+            if category == ERROR_DISK_FULL:
+                self.complete_current_job('held', category)
+                self.status_text.append("Held until there is enough free disk space")
+            elif category in RETRYABLE_ERRORS and self.current_job['retry_pass'] < BATCH_RETRY_PASSES:
+                self.complete_current_job('deferred', category)
+                self.status_text.append("Deferred to the retry pass at the end of the batch")
+            else:
+                self.failed_downloads += 1
+                self.complete_current_job('failed', category)
             QTimer.singleShot(1000, self.start_bulk_download)  # Reduced delay to 1 second
+        else:
+            self.failed_downloads += 1
 
     def update_status_bar(self):
         if not hasattr(self, 'status_label'):
@@ -1200,44 +7180,73 @@ class MainWindow(QMainWindow):
         else:
             self.status_label.setText("Status: Ready")
 
+    def start_calibration(self):
+        if self.calibration_worker and self.calibration_worker.isRunning():
+            return
+        scratch_dir = self.output_path.text() or str(Path.home() / "Downloads")
+        try:
+            os.makedirs(scratch_dir, exist_ok=True)
+        except OSError as e:
+            QMessageBox.warning(self, "Error", f"Cannot write to the output folder: {str(e)}")
+            return
+        url = self.calibration_url_input.text().strip() or None
+        self.calibration_worker = CalibrationWorker(scratch_dir, url)
+        self.calibration_worker.progress.connect(self.status_text.append)
+        self.calibration_worker.calibrated.connect(self.on_calibrated)
+        self.calibration_worker.failed.connect(self.on_calibration_failed)
+        self.calibration_worker.finished.connect(lambda: self.calibrate_btn.setEnabled(True))
+        self.calibrate_btn.setEnabled(False)
+        self.status_text.append("\nCalibrating" + (f" against {url}..." if url else "..."))
+        self.calibration_worker.start()
+
+    def on_calibrated(self, result):
+        self.settings.update(result)
+        self.apply_settings_tab_values(result)
+        self.status_text.append(f"Calibrated: {result['thread_count']} threads, {result['job_parallelism']} "
+                                f"jobs per worker node, {result['transcode_workers']} transcode workers")
+        try:
+            save_calibration(result)
+        except (OSError, ValueError) as e:
+            QMessageBox.warning(self, "Error", f"Failed to save settings: {str(e)}")
+
+    def on_calibration_failed(self, message):
+        self.status_text.append(f"Calibration failed: {message}")
+
     def save_settings(self):
-        settings = {
+        settings = dict(self.settings)
+        settings.update(self.current_settings())
+        settings.update({
             'output_dir': self.output_path.text(),
-            'use_proxy': self.use_proxy.isChecked(),
-            'proxy_url': self.proxy_input.text(),
-            'rate_limit': self.rate_limit.value(),
-            'thread_count': self.thread_spin.value(),
             'format': self.format_combo.currentText(),
             'quality': self.quality_combo.currentText(),
             'subtitles': self.subtitle_check.isChecked(),
             'playlist': self.playlist_check.isChecked(),
-        }
+            'extra_outputs': self.selected_extra_outputs(),
+            'queue_order': self.queue_order_combo.currentText(),
+        })
+        # The daemon token may have been created after this window loaded the settings
+        if not settings.get('daemon_token'):
+            token = load_settings_file().get('daemon_token')
+            if token:
+                settings['daemon_token'] = token
         
         try:
-            settings_path = os.path.join(os.path.expanduser('~'), '.ytdl_settings.json')
-            with open(settings_path, 'w') as f:
+            with open(SETTINGS_PATH, 'w') as f:
                 json.dump(settings, f, indent=4)
+            self.settings = settings
             self.status_text.append("Settings saved successfully!")
         except Exception as e:
             QMessageBox.warning(self, "Error", f"Failed to save settings: {str(e)}")
 
     def load_settings(self):
         try:
-            settings_path = os.path.join(os.path.expanduser('~'), '.ytdl_settings.json')
-            if os.path.exists(settings_path):
-                with open(settings_path, 'r') as f:
+            if os.path.exists(SETTINGS_PATH):
+                with open(SETTINGS_PATH, 'r') as f:
                     settings = json.load(f)
+                self.settings = settings
                 
                 if 'output_dir' in settings:
                     self.output_path.setText(settings['output_dir'])
-                if 'use_proxy' in settings:
-                    self.use_proxy.setChecked(settings['use_proxy'])
-                if 'proxy_url' in settings:
-                    self.proxy_input.setText(settings['proxy_url'])
-                if 'rate_limit' in settings:
-                    self.rate_limit.setValue(settings['rate_limit'])
-                if 'thread_count' in settings:
-                    self.thread_spin.setValue(settings['thread_count'])
                 if 'format' in settings:
                     index = self.format_combo.findText(settings['format'])
                     if index >= 0:
@@ -1250,9 +7259,89 @@ class MainWindow(QMainWindow):
                     self.subtitle_check.setChecked(settings['subtitles'])
                 if 'playlist' in settings:
                     self.playlist_check.setChecked(settings['playlist'])
+                for codec in settings.get('extra_outputs', []):
+                    if codec in self.extra_output_checks:
+                        self.extra_output_checks[codec].setChecked(True)
+                if 'queue_order' in settings:
+                    index = self.queue_order_combo.findText(settings['queue_order'])
+                    if index >= 0:
+                        self.queue_order_combo.setCurrentIndex(index)
+            else:
+                self.status_text.append("First run: Settings > Calibrate Now measures this machine "
+                                        "and sets transcode and thread defaults for it")
         except Exception as e:
             self.status_text.append(f"Note: Using default settings ({str(e)})")
 
+    def apply_settings_tab_values(self, settings):
+        if 'use_proxy' in settings:
+            self.use_proxy.setChecked(settings['use_proxy'])
+        if 'proxy_url' in settings:
+            self.proxy_input.setText(settings['proxy_url'])
+        if 'rate_limit' in settings:
+            self.rate_limit.setValue(settings['rate_limit'])
+        if 'thread_count' in settings:
+            self.thread_spin.setValue(settings['thread_count'])
+        if 'retry_attempts' in settings:
+            self.retry_spin.setValue(settings['retry_attempts'])
+        if 'segmented_http' in settings:
+            self.segmented_check.setChecked(settings['segmented_http'])
+        if 'streaming_assembly' in settings:
+            self.streaming_check.setChecked(settings['streaming_assembly'])
+        if 'transcode_workers' in settings:
+            self.transcode_spin.setValue(settings['transcode_workers'])
+        if 'job_parallelism' in settings:
+            self.job_parallelism_spin.setValue(settings['job_parallelism'])
+        if 'execution_backend' in settings:
+            index = self.backend_combo.findData(settings['execution_backend'])
+            if index >= 0:
+                self.backend_combo.setCurrentIndex(index)
+        if 'fragment_engine' in settings:
+            index = self.fragment_engine_combo.findData(settings['fragment_engine'])
+            if index >= 0:
+                self.fragment_engine_combo.setCurrentIndex(index)
+        if 'async_fragment_requests' in settings:
+            self.async_requests_spin.setValue(settings['async_fragment_requests'])
+        if 'min_free_mb' in settings:
+            self.min_free_spin.setValue(settings['min_free_mb'])
+        if 'pipe_transcode' in settings:
+            self.pipe_transcode_check.setChecked(settings['pipe_transcode'])
+        if 'checksum_algorithm' in settings:
+            index = self.checksum_combo.findData(settings['checksum_algorithm'])
+            if index >= 0:
+                self.checksum_combo.setCurrentIndex(index)
+        if 'playlist_sync' in settings:
+            self.playlist_sync_check.setChecked(settings['playlist_sync'])
+        if 'section_keyframe_cuts' in settings:
+            self.section_cuts_check.setChecked(settings['section_keyframe_cuts'])
+        if 'verify_media' in settings:
+            self.verify_media_check.setChecked(settings['verify_media'])
+        if 'format_ranking' in settings:
+            self.format_ranking_check.setChecked(settings['format_ranking'])
+        if 'codec_preference' in settings:
+            self.codec_combo.setCurrentText(settings['codec_preference'])
+        if 'max_item_mb' in settings:
+            self.max_item_spin.setValue(settings['max_item_mb'])
+        if 'max_item_kbps' in settings:
+            self.max_kbps_spin.setValue(settings['max_item_kbps'])
+        if 'max_audio_kbps' in settings:
+            self.max_audio_kbps_spin.setValue(settings['max_audio_kbps'])
+        if 'use_proxy_pool' in settings:
+            self.use_proxy_pool.setChecked(settings['use_proxy_pool'])
+        if 'proxy_pool' in settings:
+            self.proxy_pool_input.setPlainText(settings['proxy_pool'])
+        if 'proxy_strategy' in settings:
+            self.proxy_strategy_combo.setCurrentText(settings['proxy_strategy'])
+        if 'output_roots' in settings:
+            self.output_roots_input.setPlainText(settings['output_roots'])
+        if 'output_policy' in settings:
+            self.output_policy_combo.setCurrentText(settings['output_policy'])
+        if 'proxy_probe_url' in settings:
+            self.proxy_probe_input.setText(settings['proxy_probe_url'])
+        if 'daemon_url' in settings:
+            self.daemon_url_input.setText(settings['daemon_url'])
+        if 'calibration_url' in settings:
+            self.calibration_url_input.setText(settings['calibration_url'])
+
     def closeEvent(self, event):
         if self.worker and self.worker.isRunning():
             reply = QMessageBox.question(
@@ -1270,8 +7359,26 @@ class MainWindow(QMainWindow):
                 event.ignore()
         else:
             event.accept()
+        
+        if event.isAccepted() and self.proxy_pool:
+            self.proxy_pool.stop()
 
 def main():
+    if sys.argv[1:] == ['--pool-worker']:
+        run_pool_worker()
+        return
+    if {'--daemon', '--coordinator', '--worker', '--calibrate'} & set(sys.argv[1:]):
+        args = parse_service_args(sys.argv[1:])
+        if args.daemon:
+            run_daemon(args)
+        elif args.coordinator:
+            run_coordinator(args)
+        elif args.calibrate:
+            run_calibration(args)
+        else:
+            run_worker_node(args)
+        return
+
     if hasattr(Qt, 'AA_EnableHighDpiScaling'):
         QApplication.setAttribute(Qt.AA_EnableHighDpiScaling, True)
     if hasattr(Qt, 'AA_UseHighDpiPixmaps'):